@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+# ======================================
+#  Copias de seguridad en caliente
+# ======================================
+# Copia una base de datos abierta con la API de backup de SQLite (nunca con
+# una copia del fichero, que puede pillar una escritura a medias). Se copian
+# pocas páginas por paso y se cede el procesador entre pasos, así que puede
+# correr en un hilo mientras el CRM sigue guardando.
+# En WAL la copia mantiene abierta una transacción de lectura sobre el
+# origen: ve una foto fija de la base de datos y no tiene que reiniciarse
+# cada vez que otra conexión escribe (sin ella, con escrituras frecuentes,
+# la copia de un fichero grande no terminaría nunca).
+# Cada copia se escribe primero como .tmp, se comprueba con integrity_check
+# y sólo entonces se renombra; se conservan las últimas BACKUP_KEEP.
+
+BACKUP_DIR = "backups"
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP = 0.005
+BACKUP_KEEP = 7
+
+
+class BackupError(Exception):
+    pass
+
+
+class BackupCancelled(BackupError):
+    pass
+
+
+def snapshot_dir(db_name, dest_dir=BACKUP_DIR):
+    """Carpeta de copias de una base de datos: <dest_dir>/<nombre sin .db>."""
+    return os.path.join(dest_dir, os.path.splitext(os.path.basename(db_name))[0])
+
+
+def list_snapshots(db_name, dest_dir=BACKUP_DIR):
+    """Copias existentes, de la más antigua a la más reciente."""
+    folder = snapshot_dir(db_name, dest_dir)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.endswith(".db")
+    )
+
+
+def check_integrity(path):
+    """Lista de problemas que encuentra PRAGMA integrity_check (vacía si está bien)."""
+    connection = sqlite3.connect(path)
+    try:
+        result = [row[0] for row in connection.execute("PRAGMA integrity_check")]
+    finally:
+        connection.close()
+    return [] if result == ["ok"] else result
+
+
+def backup_database(db_name, dest_dir=BACKUP_DIR, pages=BACKUP_PAGES_PER_STEP,
+                    sleep=BACKUP_STEP_SLEEP, keep=BACKUP_KEEP, progress=None, cancelled=None):
+    """
+    Hace una copia de db_name y devuelve su ruta.
+    progress(copiadas, total) se llama tras cada paso (en páginas) y
+    cancelled() puede devolver True para abandonar la copia (BackupCancelled).
+    Si la copia no pasa integrity_check se borra y se lanza BackupError.
+    """
+    _check_keep(keep)
+    folder = snapshot_dir(db_name, dest_dir)
+    os.makedirs(folder, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    name = os.path.splitext(os.path.basename(db_name))[0]
+    path = os.path.join(folder, f"{name}-{stamp}.db")
+    tmp_path = path + ".tmp"
+
+    def on_step(status, remaining, total):
+        if progress is not None:
+            progress(total - remaining, total)
+        if cancelled is not None and cancelled():
+            raise BackupCancelled(f"Copia de {db_name} cancelada")
+        if sleep:
+            time.sleep(sleep)
+
+    start = time.perf_counter()
+    source = sqlite3.connect(f"file:{os.path.abspath(db_name)}?mode=ro", uri=True)
+    target = sqlite3.connect(tmp_path)
+    try:
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        if wal:
+            source.execute("BEGIN")
+            source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        source.backup(target, pages=pages, progress=on_step)
+        if wal:
+            source.rollback()
+    except BaseException:
+        target.close()
+        source.close()
+        _remove(tmp_path)
+        raise
+    target.close()
+    source.close()
+
+    problems = check_integrity(tmp_path)
+    if problems:
+        _remove(tmp_path)
+        raise BackupError(f"La copia de {db_name} no pasa integrity_check: {problems[:5]}")
+
+    os.replace(tmp_path, path)
+    removed = rotate_snapshots(db_name, dest_dir, keep)
+    print(f"Copia de seguridad de {db_name} en {path} "
+          f"({time.perf_counter() - start:.1f} s, {len(removed)} copias antiguas borradas)")
+    return path
+
+
+def rotate_snapshots(db_name, dest_dir=BACKUP_DIR, keep=BACKUP_KEEP):
+    """Borra las copias más antiguas hasta dejar keep (al menos 1). Devuelve las borradas."""
+    _check_keep(keep)
+    snapshots = list_snapshots(db_name, dest_dir)
+    old = snapshots[:-keep]
+    for path in old:
+        _remove(path)
+    return old
+
+
+def last_snapshot_age(db_name, dest_dir=BACKUP_DIR):
+    """Segundos desde la última copia, o None si no hay ninguna."""
+    snapshots = list_snapshots(db_name, dest_dir)
+    if not snapshots:
+        return None
+    return time.time() - os.path.getmtime(snapshots[-1])
+
+
+def _check_keep(keep):
+    # keep=0 borraría también la copia que se acaba de escribir
+    if keep < 1:
+        raise ValueError(f"keep debe ser al menos 1 (recibido {keep})")
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
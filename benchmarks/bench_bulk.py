@@ -0,0 +1,62 @@
+"""
+Compara la carga de un catálogo de productos fila a fila (add_product, un
+commit por producto) con bulk_upsert_products (executemany por bloques en
+una sola transacción).
+
+Uso:
+    python benchmarks/bench_bulk.py [productos] [filas_por_bloque]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import DatabaseManager
+
+
+def generate_products(total):
+    for i in range(total):
+        yield (None, f"Proveedor {i % 200}", f"Producto {i}", f"Descripción del producto {i}", 21, 9.99 + i % 100, i % 50)
+
+
+def open_db(path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = DatabaseManager(path)
+        manager.connect()
+    return manager
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = open_db(os.path.join(tmp, "fila_a_fila.db"))
+        start = time.perf_counter()
+        for product in generate_products(total):
+            manager.add_product(*product[1:])
+        per_row = time.perf_counter() - start
+        manager.close()
+
+        manager = open_db(os.path.join(tmp, "masivo.db"))
+        start = time.perf_counter()
+        timings = manager.bulk_upsert_products(generate_products(total), chunk_size)
+        bulk = time.perf_counter() - start
+        loaded = manager.execute_read_query("SELECT COUNT(*) FROM PRODUCTOS")[0][0]
+        manager.close()
+
+    assert loaded == total
+    slowest = max(t["seconds"] for t in timings)
+    print(f"Productos: {total}")
+    print(f"Fila a fila (add_product):  {per_row:.3f} s ({total / per_row:,.0f} filas/s)")
+    print(f"Masivo (bulk_upsert):       {bulk:.3f} s ({total / bulk:,.0f} filas/s), "
+          f"{len(timings)} bloques, el más lento {slowest * 1000:.1f} ms")
+    print(f"Aceleración: x{per_row / bulk:.1f}")
+
+
+if __name__ == "__main__":
+    main()
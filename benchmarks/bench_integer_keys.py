@@ -0,0 +1,140 @@
+"""
+Compara el esquema con claves de texto (hasta la migración 005) con el de
+claves enteras (migración 006) en una empresa sintética de 1M de filas
+(clientes, presupuestos y oportunidades con códigos de 8 caracteres como
+los de uuid4()[:8]).
+
+Mide el tamaño del fichero (tras VACUUM) y el JOIN de oportunidades con
+sus clientes y presupuestos, completo y filtrado por cliente.
+
+Uso:
+    python benchmarks/bench_integer_keys.py [filas_totales]
+"""
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import MIGRATIONS
+
+TEXT_KEYS_VERSION = 5
+
+JOIN_TEXT = """
+    SELECT O.ID_OPORTUNIDAD, O.NOMBRE_OPORTUNIDAD, O.CLIENTE, O.INGRESO_ESPERADO,
+           C.NOMBRE, P.NOMBRE
+    FROM OPORTUNIDADES O
+    LEFT JOIN CLIENTES C ON C.ID_CLIENTE = O.CLIENTE
+    LEFT JOIN PRESUPUESTOS P ON P.ID_PRESUPUESTO = O.PRESUPUESTO
+"""
+JOIN_INTEGER = """
+    SELECT O.ID_OPORTUNIDAD, O.NOMBRE_OPORTUNIDAD, C.ID_CLIENTE, O.INGRESO_ESPERADO,
+           C.NOMBRE, P.NOMBRE
+    FROM OPORTUNIDADES O
+    LEFT JOIN CLIENTES C ON C.ID = O.CLIENTE
+    LEFT JOIN PRESUPUESTOS P ON P.ID = O.PRESUPUESTO
+"""
+BY_CLIENT_TEXT = JOIN_TEXT + " WHERE O.CLIENTE = ?"
+BY_CLIENT_INTEGER = JOIN_INTEGER + " WHERE O.CLIENTE = (SELECT ID FROM CLIENTES WHERE ID_CLIENTE = ?)"
+
+
+def migrate_to(connection, version, start=0):
+    cursor = connection.cursor()
+    cursor.execute("BEGIN")
+    for number, migration in enumerate(MIGRATIONS[start:version], start=start + 1):
+        migration(cursor)
+        cursor.execute(f"PRAGMA user_version = {number}")
+    connection.commit()
+
+
+def codes(total, rng):
+    seen = set()
+    while len(seen) < total:
+        seen.add(f"{rng.getrandbits(32):08x}")
+    return list(seen)
+
+
+def load(connection, total):
+    rng = random.Random(42)
+    n_clients, n_budgets = total // 5, total * 3 // 10
+    n_opps = total - n_clients - n_budgets
+    clients = codes(n_clients, rng)
+    budgets = codes(n_budgets, rng)
+    opps = codes(n_opps, rng)
+
+    connection.executemany(
+        "INSERT INTO CLIENTES VALUES (?, ?, ?, ?, ?, ?)",
+        ((c, f"Cliente {i}", f"Calle {i % 500}", f"+34 600 {i:06d}", f"Contacto {i}", f"c{i}@correo.com")
+         for i, c in enumerate(clients))
+    )
+    connection.executemany(
+        "INSERT INTO PRESUPUESTOS VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((b, f"Presupuesto {i}", rng.choice(clients), "2025-01-01", "2025-02-01", 100.0, 121.0)
+         for i, b in enumerate(budgets))
+    )
+    connection.executemany(
+        "INSERT INTO OPORTUNIDADES VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((o, f"Oportunidad {i}", rng.choice(clients), "2025-01-01", rng.choice(budgets), 1000.0, "NUEVO")
+         for i, o in enumerate(opps))
+    )
+    connection.commit()
+    return clients
+
+
+def measure(path, join_sql, by_client_sql, sample):
+    connection = sqlite3.connect(path)
+    connection.execute("VACUUM")
+    size = os.path.getsize(path)
+
+    start = time.perf_counter()
+    rows = connection.execute(join_sql).fetchall()
+    full_join = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for code in sample:
+        connection.execute(by_client_sql, (code,)).fetchall()
+    by_client = (time.perf_counter() - start) / len(sample)
+    connection.close()
+    return size, full_join, by_client, len(rows)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, "claves_texto.db")
+        integer_path = os.path.join(tmp, "claves_enteras.db")
+
+        connection = sqlite3.connect(text_path)
+        migrate_to(connection, TEXT_KEYS_VERSION)
+        clients = load(connection, total)
+        connection.close()
+
+        shutil.copyfile(text_path, integer_path)
+        connection = sqlite3.connect(integer_path)
+        start = time.perf_counter()
+        # Sólo la 006: las siguientes (fechas, céntimos...) no son parte de la comparación
+        migrate_to(connection, TEXT_KEYS_VERSION + 1, start=TEXT_KEYS_VERSION)
+        migration_time = time.perf_counter() - start
+        connection.close()
+
+        sample = random.Random(7).sample(clients, 1000)
+        text = measure(text_path, JOIN_TEXT, BY_CLIENT_TEXT, sample)
+        integer = measure(integer_path, JOIN_INTEGER, BY_CLIENT_INTEGER, sample)
+
+    assert text[3] == integer[3]
+    print(f"Filas: {total} (migración 006: {migration_time:.2f} s)")
+    print(f"{'esquema':<16}{'fichero (MiB)':>15}{'JOIN completo (s)':>20}{'JOIN por cliente (ms)':>24}")
+    for name, (size, full_join, by_client, _) in (("claves de texto", text), ("claves enteras", integer)):
+        print(f"{name:<16}{size / 2**20:>15.1f}{full_join:>20.3f}{by_client * 1000:>24.3f}")
+    change = (integer[0] / text[0] - 1) * 100
+    print(f"Fichero: {abs(change):.1f}% {'más grande' if change > 0 else 'más pequeño'}; "
+          f"JOIN completo x{text[1] / integer[1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+KPIs del panel leídos de las tablas de resumen (get_kpis) frente a las
+mismas agregaciones recorriendo OPORTUNIDADES, TAREAS y PRODUCTOS.
+
+Mide también lo que cuestan los triggers de resumen en una carga masiva y
+comprueba con check_kpis que, tras la carga y una tanda de cambios, los
+resúmenes coinciden con el recálculo completo.
+
+Uso:
+    python benchmarks/bench_kpis.py [filas]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import DatabaseManager
+from summaries import SUMMARIES, aggregate_query
+
+STAGES = ("NUEVO", "CALIFICADO", "PROPUESTA", "GANADO")
+TASK_STATES = ("Pendiente", "En proceso", "Completada")
+
+
+def best_of(function, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    rng = random.Random(42)
+    people = [f"Persona {i}" for i in range(50)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "kpis.db"))
+        db.connect()
+
+        start = time.perf_counter()
+        db.bulk_insert_oportunidades(
+            (f"o{i}", f"Oportunidad {i}", None, "2025-01-01", None,
+             rng.randrange(100, 10_000_000) / 100, rng.choice(STAGES))
+            for i in range(total)
+        )
+        db.bulk_insert_tareas(
+            (f"t{i}", f"Tarea {i}", "", "2025-01-01", "2025-02-01",
+             rng.choice(people), "Media", rng.choice(TASK_STATES))
+            for i in range(total)
+        )
+        db.bulk_upsert_products(
+            (None, f"Proveedor {i % 200}", f"Producto {i}", "", 21,
+             rng.randrange(100, 100000) / 100, rng.randrange(0, 500))
+            for i in range(total)
+        )
+        load_time = time.perf_counter() - start
+
+        # Tanda de cambios sueltos: cambios de etapa, cierres de tareas y borrados
+        for i in rng.sample(range(total), 2000):
+            db.update_opportunity_stage(f"o{i}", rng.choice(STAGES))
+            db.upsert_tarea(f"t{i}", "Tarea", "", "2025-01-01", "2025-02-01",
+                            rng.choice(people), "Alta", "Completada")
+            db.delete_product(i + 1)
+
+        summary_ms = best_of(db.get_kpis)
+        cursor = db.connection.cursor()
+        scan_ms = best_of(lambda: [cursor.execute(aggregate_query(s)).fetchall() for s in SUMMARIES], repeat=3)
+        differences = db.check_kpis()
+        db.close()
+
+    print(f"Filas por tabla: {total} (carga con triggers de resumen: {load_time:.1f} s)")
+    print(f"get_kpis (tablas de resumen): {summary_ms:.3f} ms")
+    print(f"GROUP BY sobre las tablas:    {scan_ms:.1f} ms")
+    assert not differences, f"resúmenes descuadrados: {list(differences)}"
+
+
+if __name__ == "__main__":
+    main()
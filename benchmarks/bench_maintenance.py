@@ -0,0 +1,78 @@
+"""
+Mantenimiento (maintenance.run_maintenance) sobre un fichero con muchas
+páginas libres tras un borrado grande, mientras otro hilo sigue guardando
+clientes como lo haría la interfaz.
+
+Muestra lo que tarda cada tarea, cuánto encoge el fichero y la latencia de
+los guardados concurrentes. Falla (AssertionError) si algún guardado espera
+más de MAX_WRITE_LATENCY_MS, es decir, si algún paso bloquea la base de
+datos demasiado tiempo.
+
+Uso:
+    python benchmarks/bench_maintenance.py [filas]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import DatabaseManager
+from maintenance import run_maintenance
+
+MAX_WRITE_LATENCY_MS = 250
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mantenimiento.db")
+        db = DatabaseManager(path)
+        db.connect()
+        db.bulk_insert_clientes(
+            (f"{i:08x}", f"Cliente {i}", f"Calle {i % 500}", "600000000", f"Contacto {i}", f"c{i}@correo.com")
+            for i in range(total)
+        )
+        with db.transaction():
+            db.cursor.execute("DELETE FROM CLIENTES WHERE ID % 10 != 0")
+        db.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_before = os.path.getsize(path)
+
+        latencies = []
+        finished = threading.Event()
+
+        def maintain():
+            try:
+                steps.extend(run_maintenance(path))
+            finally:
+                finished.set()
+
+        steps = []
+        worker = threading.Thread(target=maintain)
+        worker.start()
+        i = 0
+        while not finished.is_set():
+            start = time.perf_counter()
+            db.insert_cliente(f"n{i}", "Nuevo", "Calle", "600000000", "Contacto", "n@correo.com")
+            latencies.append((time.perf_counter() - start) * 1000)
+            i += 1
+            time.sleep(0.005)
+        worker.join()
+        db.close()
+        size_after = os.path.getsize(path)
+
+    latencies.sort()
+    print(f"Filas cargadas: {total}, borradas: {total - total // 10}")
+    print(f"Fichero: {size_before / 2**20:.1f} MiB -> {size_after / 2**20:.1f} MiB")
+    for task, detail, seconds in steps:
+        print(f"  {task:<20}{seconds * 1000:>10.0f} ms  {detail}")
+    print(f"Guardados durante el mantenimiento: {len(latencies)}, "
+          f"p50 {latencies[len(latencies) // 2]:.1f} ms, máx {latencies[-1]:.1f} ms")
+    assert latencies[-1] < MAX_WRITE_LATENCY_MS, f"un guardado esperó {latencies[-1]:.0f} ms"
+
+
+if __name__ == "__main__":
+    main()
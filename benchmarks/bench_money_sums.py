@@ -0,0 +1,99 @@
+"""
+Compara los importes REAL (hasta la migración 007) con los céntimos enteros
+(migración 008) en una empresa sintética de oportunidades con importes de
+dos decimales.
+
+Mide la suma por etapa (SUM en SQL) en los dos esquemas y comprueba cuánto
+se desvía la suma en coma flotante del valor exacto calculado con Decimal.
+
+Uso:
+    python benchmarks/bench_money_sums.py [oportunidades]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import MIGRATIONS
+from sql_money import from_cents
+
+REAL_VERSION = 7
+STAGES = ("NUEVO", "CALIFICADO", "PROPUESTA", "GANADO", "PERDIDO")
+
+SUM_BY_STAGE = "SELECT ESTADO, SUM(INGRESO_ESPERADO) FROM OPORTUNIDADES GROUP BY ESTADO"
+
+
+def migrate_to(connection, version, start=0):
+    cursor = connection.cursor()
+    cursor.execute("BEGIN")
+    for number, migration in enumerate(MIGRATIONS[start:version], start=start + 1):
+        migration(cursor)
+        cursor.execute(f"PRAGMA user_version = {number}")
+    connection.commit()
+
+
+def load(connection, total):
+    """Carga total oportunidades y devuelve la suma exacta por etapa."""
+    rng = random.Random(42)
+    exact = {stage: Decimal(0) for stage in STAGES}
+    rows = []
+    for i in range(total):
+        stage = rng.choice(STAGES)
+        amount = Decimal(rng.randrange(1, 10_000_000)).scaleb(-2)
+        exact[stage] += amount
+        rows.append((f"{i:08x}", f"Oportunidad {i}", 20089, float(amount), stage))
+    connection.executemany(
+        "INSERT INTO OPORTUNIDADES (ID_OPORTUNIDAD, NOMBRE_OPORTUNIDAD, FECHA, INGRESO_ESPERADO, ESTADO) "
+        "VALUES (?, ?, ?, ?, ?)",
+        rows
+    )
+    connection.commit()
+    return exact
+
+
+def measure(path, repeat=5):
+    connection = sqlite3.connect(path)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sums = dict(connection.execute(SUM_BY_STAGE).fetchall())
+        best = min(best, time.perf_counter() - start)
+    connection.close()
+    return sums, best
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "importes.db")
+        connection = sqlite3.connect(path)
+        migrate_to(connection, REAL_VERSION)
+        exact = load(connection, total)
+        connection.close()
+        real_sums, real_time = measure(path)
+
+        connection = sqlite3.connect(path)
+        start = time.perf_counter()
+        migrate_to(connection, len(MIGRATIONS), start=REAL_VERSION)
+        migration_time = time.perf_counter() - start
+        connection.close()
+        cents_sums, cents_time = measure(path)
+
+    print(f"Oportunidades: {total} (migración 008: {migration_time:.2f} s)")
+    print(f"{'etapa':<12}{'exacta':>20}{'error REAL':>16}{'error céntimos':>16}")
+    for stage in STAGES:
+        real_error = Decimal(repr(real_sums[stage])) - exact[stage]
+        cents_error = from_cents(cents_sums[stage]) - exact[stage]
+        print(f"{stage:<12}{exact[stage]:>20}{real_error:>16}{cents_error:>16}")
+    print(f"SUM por etapa: REAL {real_time * 1000:.1f} ms, céntimos {cents_time * 1000:.1f} ms "
+          f"(índice cubriente)")
+
+
+if __name__ == "__main__":
+    main()
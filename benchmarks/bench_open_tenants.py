@@ -0,0 +1,76 @@
+"""
+Mide cuánto cuesta abrir muchas bases de datos de empresa.
+
+Crea N ficheros de empresa en un directorio temporal (primera apertura: se
+aplican todas las migraciones) y después los vuelve a abrir ya actualizados,
+que es el camino rápido de PRAGMA user_version. Por último mide el cambio
+entre empresas recientes con TenantRegistry, que las mantiene abiertas.
+
+Uso:
+    python benchmarks/bench_open_tenants.py [numero_de_empresas]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import DatabaseManager
+from tenant_registry import CATALOG_DB, TenantRegistry
+
+
+def open_all(paths):
+    start = time.perf_counter()
+    for path in paths:
+        manager = DatabaseManager(path)
+        manager.connect()
+        manager.close()
+    return time.perf_counter() - start
+
+
+def switch_warm(registry, names, rounds=10):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name in names:
+            registry.open(name)
+    return time.perf_counter() - start
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"empresa_{i}.db") for i in range(total)]
+
+        # Los mensajes de migración no interesan aquí
+        with contextlib.redirect_stdout(io.StringIO()):
+            created = open_all(paths)
+            reopened = open_all(paths)
+
+            # El catálogo usa rutas relativas, como la aplicación
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                names = [f"empresa_{i}" for i in range(min(total, 8))]
+                registry = TenantRegistry(DatabaseManager.get_instance(CATALOG_DB))
+                for name in names:
+                    registry.register(name)
+                    registry.open(name)
+                warm = switch_warm(registry, names)
+                registry.close_all()
+                registry.catalog.close()
+            finally:
+                os.chdir(cwd)
+        switches = len(names) * 10
+
+    print(f"Empresas: {total}")
+    print(f"Creación + migraciones: {created:.3f} s ({created / total * 1000:.3f} ms/empresa)")
+    print(f"Apertura ya migrada:    {reopened:.3f} s ({reopened / total * 1000:.3f} ms/empresa)")
+    print(f"Cambio a empresa abierta (TenantRegistry): {warm / switches * 1000:.4f} ms/cambio")
+
+
+if __name__ == "__main__":
+    main()
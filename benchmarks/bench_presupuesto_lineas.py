@@ -0,0 +1,108 @@
+"""
+Coste de añadir, modificar y borrar líneas de un presupuesto según cuántas
+tenga ya, y de abrirlo (cabecera con totales + primera página de líneas).
+
+Los totales los mantienen los triggers de la migración 010 con la diferencia
+de cada línea, así que los tiempos por operación no deben crecer con el
+número de líneas. Al final se comprueba que SUBTOTAL y TOTAL coinciden con
+la suma completa de las líneas.
+
+Uso:
+    python benchmarks/bench_presupuesto_lineas.py [líneas]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import DatabaseManager
+from sql_money import line_base, line_total
+
+SAMPLE = 200
+# Líneas de partida: más de una página, para que "abrir" lea siempre una
+# página completa
+INITIAL_LINES = 1000
+# Margen para el ruido del reloj: la última muestra puede tardar como mucho
+# MAX_SLOWDOWN veces lo que la primera
+MAX_SLOWDOWN = 3
+
+
+def timed(function, repeat=SAMPLE):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def sample(db, products, rng, lineas):
+    """Microsegundos por operación con el presupuesto en su tamaño actual."""
+    def add():
+        lineas.append(db.add_presupuesto_linea("P1", rng.choice(products), rng.randint(1, 20)))
+
+    def update():
+        db.update_presupuesto_linea("P1", rng.choice(lineas), rng.randint(1, 20),
+                                    rng.randrange(100, 100000) / 100, rng.choice((4, 10, 21)))
+
+    def delete():
+        # Intercambio con la última para no pagar list.pop(i), que es O(n)
+        i = rng.randrange(len(lineas))
+        lineas[i], lineas[-1] = lineas[-1], lineas[i]
+        db.delete_presupuesto_linea("P1", lineas.pop())
+
+    def open_budget():
+        db.clear_caches()
+        db.get_presupuesto_by_id("P1")
+        db.get_presupuesto_lineas_page("P1")
+
+    return {"añadir": timed(add), "modificar": timed(update),
+            "borrar": timed(delete), "abrir": timed(open_budget)}
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "lineas.db"))
+        db.connect()
+        db.insert_cliente("C1", "Cliente", "Calle", "600000000", "Contacto", "c@correo.com")
+        db.insert_presupuesto("P1", "Presupuesto grande", "C1", "2025-01-01", "2025-02-01", 0, 0)
+        for i in range(100):
+            db.add_product(f"Proveedor {i % 10}", f"Producto {i}", "", rng.choice((4, 10, 21)),
+                           rng.randrange(100, 100000) / 100, 100)
+        products = [row[0] for row in db.get_all_products()]
+
+        lineas = []
+
+        def fill(count):
+            with db.transaction():
+                for _ in range(count):
+                    lineas.append(db.add_presupuesto_linea("P1", rng.choice(products), rng.randint(1, 20)))
+
+        fill(INITIAL_LINES)
+        first = sample(db, products, rng, lineas)
+        fill(total)
+        last = sample(db, products, rng, lineas)
+
+        stored = db.connection.execute(
+            "SELECT SUBTOTAL, TOTAL FROM PRESUPUESTOS WHERE ID_PRESUPUESTO = 'P1'"
+        ).fetchone()
+        scanned = db.connection.execute(
+            f"SELECT SUM({line_base('L')}), SUM({line_total('L')}) FROM PRESUPUESTO_LINEAS L"
+        ).fetchone()
+        db.close()
+
+    print(f"Líneas en el presupuesto: {len(lineas)}")
+    print(f"{'operación':<12}{f'{INITIAL_LINES} (µs)':>14}{f'{len(lineas)} (µs)':>14}")
+    for name in first:
+        print(f"{name:<12}{first[name]:>14.1f}{last[name]:>14.1f}")
+    assert tuple(stored) == tuple(scanned), f"totales {stored} != suma de líneas {scanned}"
+    for name in first:
+        assert last[name] < first[name] * MAX_SLOWDOWN, f"{name} crece con el número de líneas"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compara los perfiles de PRAGMA_PROFILES sobre una tabla CLIENTES grande.
+
+Para cada perfil crea una base de datos nueva, inserta N clientes en lotes
+(un commit por lote, como haría una importación) y mide una lectura completa
+de la tabla.
+
+Uso:
+    python benchmarks/bench_profiles.py [filas] [filas_por_lote]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import DatabaseManager, PRAGMA_PROFILES
+
+
+def generate_clients(total):
+    for i in range(total):
+        yield (
+            f"C{i:08d}", f"Cliente {i}", f"Calle {i % 500}, {i % 90}",
+            f"+34 600 {i % 1000000:06d}", f"Contacto {i % 1000}", f"cliente{i}@correo.com"
+        )
+
+
+def bench_profile(path, profile, total, batch_size):
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = DatabaseManager(path, profile)
+        manager.connect()
+
+    rows = generate_clients(total)
+    start = time.perf_counter()
+    while True:
+        batch = [row for _, row in zip(range(batch_size), rows)]
+        if not batch:
+            break
+        manager.cursor.executemany("""
+            INSERT INTO CLIENTES (ID_CLIENTE, NOMBRE, DIRECCION, TELEFONO, PERSONA_CONTACTO, EMAIL)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, batch)
+        manager.connection.commit()
+    insert_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clients = manager.get_all_clients()
+    read_time = time.perf_counter() - start
+
+    manager.close()
+    return total / insert_time, read_time, len(clients)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    print(f"Filas: {total}, filas por lote: {batch_size}")
+    print(f"{'perfil':<12}{'inserts/s':>14}{'lectura completa (s)':>24}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in PRAGMA_PROFILES:
+            path = os.path.join(tmp, f"{profile}.db")
+            inserts_per_sec, read_time, read_rows = bench_profile(path, profile, total, batch_size)
+            assert read_rows == total
+            print(f"{profile:<12}{inserts_per_sec:>14,.0f}{read_time:>24.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compara la memoria que ocupa un listado completo de CLIENTES según el tipo
+de fila: tuplas (lo que devuelve get_all_clients), sqlite3.Row y las clases
+con __slots__ de row_types (get_all_clients(typed=True)).
+
+Mide con tracemalloc la memoria que sigue ocupada tras el fetchall (el
+listado que la vista mantiene vivo), el pico durante la lectura y el tiempo.
+
+Uso:
+    python benchmarks/bench_row_memory.py [filas]
+"""
+import contextlib
+import gc
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import DatabaseManager
+from bench_profiles import generate_clients
+
+
+def read_tuples(manager):
+    return manager.get_all_clients()
+
+
+def read_sqlite_rows(manager):
+    cursor = manager.connection.cursor()
+    cursor.row_factory = sqlite3.Row
+    return cursor.execute("SELECT * FROM CLIENTES").fetchall()
+
+
+def read_typed(manager):
+    return manager.get_all_clients(typed=True)
+
+
+def measure(manager, reader):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = reader(manager)
+    seconds = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(rows)
+    del rows
+    return count, retained, peak, seconds
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = DatabaseManager(os.path.join(tmp, "filas.db"))
+            manager.connect()
+        manager.bulk_insert_clientes(generate_clients(total))
+
+        print(f"Clientes: {total}")
+        print(f"{'tipo de fila':<16}{'retenida (MiB)':>16}{'pico (MiB)':>14}{'bytes/fila':>12}{'tiempo (s)':>12}")
+        for name, reader in (("tupla", read_tuples), ("sqlite3.Row", read_sqlite_rows), ("__slots__", read_typed)):
+            count, retained, peak, seconds = measure(manager, reader)
+            assert count == total
+            print(f"{name:<16}{retained / 2**20:>16.1f}{peak / 2**20:>14.1f}"
+                  f"{retained / total:>12.0f}{seconds:>12.3f}")
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Memoria de pico (tracemalloc) al recorrer una tabla grande de CLIENTES con
+get_all_clients() (fetchall) frente a iter_clients() (fetchmany en bloques),
+y al exportarla a CSV con exporters.export_csv.
+
+Que el pico en streaming no crece con el número de filas lo comprueba
+tests/test_streaming.py; aquí sólo se miden las cifras con muchas filas.
+
+Uso:
+    python benchmarks/bench_streaming_reads.py [filas]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import DatabaseManager
+from exporters import export_csv
+
+
+def rows(total):
+    for i in range(total):
+        yield (f"{i:08x}", f"Cliente {i}", f"Calle {i % 500}", f"+34 600 {i % 1000000:06d}",
+               f"Contacto {i}", f"cliente{i}@correo.com")
+
+
+def peak(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak_bytes / 2**20, elapsed
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "streaming.db"), "bulk-load")
+        db.connect()
+        db.bulk_insert_clientes(rows(total))
+        db.apply_profile("balanced")
+
+        streamed, stream_peak, stream_time = peak(lambda: sum(1 for _ in db.iter_clients()))
+        exported, export_peak, export_time = peak(
+            lambda: export_csv(db, "CLIENTES", os.path.join(tmp, "clientes.csv"))
+        )
+        loaded, fetchall_peak, fetchall_time = peak(lambda: len(db.get_all_clients()))
+        db.close()
+
+    assert streamed == exported == loaded == total
+    print(f"Filas: {total}")
+    print(f"{'lectura':<22}{'pico (MiB)':>12}{'tiempo (s)':>12}")
+    print(f"{'get_all_clients':<22}{fetchall_peak:>12.1f}{fetchall_time:>12.2f}")
+    print(f"{'iter_clients':<22}{stream_peak:>12.1f}{stream_time:>12.2f}")
+    print(f"{'export_csv':<22}{export_peak:>12.1f}{export_time:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
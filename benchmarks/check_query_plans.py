@@ -0,0 +1,48 @@
+"""
+Comprueba que las consultas calientes (HOT_QUERIES) usan índices.
+
+Crea una base de datos con el esquema actual (o usa la indicada) y termina
+con código de salida 1 si alguna consulta recorre una tabla completa.
+
+Uso:
+    python benchmarks/check_query_plans.py [fichero.db]
+"""
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import DatabaseManager, HOT_QUERIES
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "planes.db")
+        if len(sys.argv) > 1:
+            # Se trabaja sobre una copia para no migrar el fichero original
+            shutil.copyfile(sys.argv[1], path)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = DatabaseManager(path)
+            manager.connect()
+
+        try:
+            for query, params in HOT_QUERIES:
+                print(f"{query}\n    {' | '.join(manager.explain(query, params))}")
+            manager.check_query_plans()
+        except AssertionError as e:
+            print(f"\nERROR: {e}")
+            return 1
+        finally:
+            manager.close()
+
+    print("\nTodas las consultas calientes usan índices.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,281 +1,474 @@
 import sqlite3
 import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import islice
+
+from entity_cache import EntityCache
+from migrations import is_catalog, migrate
+from query_stats import InstrumentedCursor, QueryStats, SLOW_QUERY_MS, shared_stats
+from row_types import ROW_TYPES
+from sql_dates import DAY_PARAM, EPOCH_JULIAN_DAY, MINUTE_PARAM, date_param, day_column, minute_column
+from sql_money import CENTS_PARAM, DEFAULT_CURRENCY, line_base, line_total, money_column
+from summaries import rebuild_summaries, summary_differences
+
+# ======================================
+#  Perfiles de durabilidad / rendimiento
+# ======================================
+# Se aplican con PRAGMA nada más abrir la conexión. cache_size negativo va en
+# KiB (-65536 = 64 MiB) y mmap_size en bytes.
+#   - safe: WAL con fsync en cada commit; no se pierde nada aunque se vaya la luz.
+#   - balanced: WAL con synchronous=NORMAL; un corte de luz puede perder el
+#     último commit, pero la base de datos nunca queda corrupta.
+#   - bulk-load: sólo para cargas masivas que se pueden repetir; sin journal
+#     en disco ni fsync.
+PRAGMA_PROFILES = {
+    "safe": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16384,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "balanced": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    "bulk-load": {
+        "busy_timeout": 5000,
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "cache_size": -262144,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+# PRAGMA del perfil que una conexión de sólo lectura no puede (ni necesita)
+# cambiar: el modo de journal lo fija la conexión principal.
+READ_ONLY_SKIPPED_PRAGMAS = ("journal_mode", "synchronous")
+
+# Consultas que se lanzan desde rutas interactivas (clics, cambios de fecha...)
+# y que nunca deben recorrer la tabla entera. Las revisa check_query_plans().
+HOT_QUERIES = [
+    ("SELECT * FROM EVENTOS WHERE FECHA = ?", (20089,)),
+    ("SELECT * FROM EVENTOS WHERE FECHA BETWEEN ? AND ? ORDER BY FECHA, HORA", (20089, 20119)),
+    ("SELECT * FROM OPORTUNIDADES WHERE CLIENTE = ?", (1,)),
+    ("SELECT * FROM OPORTUNIDADES WHERE ESTADO = ?", ("NUEVO",)),
+    ("SELECT * FROM PRESUPUESTOS WHERE CLIENTE = ?", (1,)),
+    ("SELECT * FROM PRESUPUESTOS WHERE FECHA_EXPIRACION BETWEEN ? AND ?", (20089, 20119)),
+    ("SELECT * FROM TAREAS WHERE FECHA_VENCIMIENTO < ?", (20089,)),
+    ("SELECT * FROM TAREAS WHERE ESTADO = ?", ("Pendiente",)),
+    ("SELECT * FROM PRESUPUESTO_LINEAS WHERE PRESUPUESTO = ? AND ID > ? ORDER BY ID", (1, 0)),
+]
+
+# Columnas que devuelven las lecturas de cada tabla, en el orden de siempre.
+# Desde la migración 006 las tablas tienen además una clave entera ID, que no
+# se devuelve, y OPORTUNIDADES/PRESUPUESTOS guardan en CLIENTE y PRESUPUESTO
+# el ID de la fila a la que apuntan: aquí se traducen de vuelta a su código
+# (o, si no apuntan a ninguna fila, al código guardado en CLIENTE_ORIGINAL /
+# PRESUPUESTO_ORIGINAL, ver migración 006).
+# Las fechas y horas (enteras desde la migración 007) salen como texto y los
+# importes (céntimos desde la 008) en unidades; la moneda no se devuelve.
+TABLE_COLUMNS = {
+    "CLIENTES": "ID_CLIENTE, NOMBRE, DIRECCION, TELEFONO, PERSONA_CONTACTO, EMAIL",
+    "OPORTUNIDADES": f"""
+        ID_OPORTUNIDAD, NOMBRE_OPORTUNIDAD,
+        COALESCE((SELECT C.ID_CLIENTE FROM CLIENTES C WHERE C.ID = OPORTUNIDADES.CLIENTE),
+                 OPORTUNIDADES.CLIENTE_ORIGINAL) AS CLIENTE,
+        {day_column("OPORTUNIDADES.FECHA")},
+        COALESCE((SELECT P.ID_PRESUPUESTO FROM PRESUPUESTOS P WHERE P.ID = OPORTUNIDADES.PRESUPUESTO),
+                 OPORTUNIDADES.PRESUPUESTO_ORIGINAL) AS PRESUPUESTO,
+        {money_column("OPORTUNIDADES.INGRESO_ESPERADO")}, ESTADO
+    """,
+    "PRESUPUESTOS": f"""
+        ID_PRESUPUESTO, NOMBRE,
+        COALESCE((SELECT C.ID_CLIENTE FROM CLIENTES C WHERE C.ID = PRESUPUESTOS.CLIENTE),
+                 PRESUPUESTOS.CLIENTE_ORIGINAL) AS CLIENTE,
+        {day_column("PRESUPUESTOS.FECHA_CREACION")}, {day_column("PRESUPUESTOS.FECHA_EXPIRACION")},
+        {money_column("PRESUPUESTOS.SUBTOTAL")}, {money_column("PRESUPUESTOS.TOTAL")}
+    """,
+    # IMPORTE (sin IVA) y TOTAL de cada línea se calculan al leerla
+    "PRESUPUESTO_LINEAS": f"""
+        PRESUPUESTO_LINEAS.ID,
+        (SELECT P.ID_PRESUPUESTO FROM PRESUPUESTOS P WHERE P.ID = PRESUPUESTO_LINEAS.PRESUPUESTO) AS PRESUPUESTO,
+        PRODUCTO, DESCRIPCION, CANTIDAD, {money_column("PRESUPUESTO_LINEAS.PRECIO")}, IVA,
+        {line_base("PRESUPUESTO_LINEAS")} / 100.0 AS IMPORTE, {line_total("PRESUPUESTO_LINEAS")} / 100.0 AS TOTAL
+    """,
+    "PRODUCTOS": f"id, proveedor, nombre, descripcion, iva, {money_column('PRODUCTOS.precio')}, stock",
+    "TAREAS": f"""
+        ID_TAREA, TITULO, DESCRIPCION,
+        {day_column("TAREAS.FECHA_CREACION")}, {day_column("TAREAS.FECHA_VENCIMIENTO")},
+        ASIGNADO_A, PRIORIDAD, ESTADO
+    """,
+    "EVENTOS": f"""
+        ID_EVENTO, TITULO, {day_column("EVENTOS.FECHA")}, {minute_column("EVENTOS.HORA")},
+        LUGAR, DESCRIPCION, ASIGNADO_A
+    """,
+    # Cualificadas porque FAQ se cruza con FAQ_FTS, que tiene las mismas columnas
+    "FAQ": "FAQ.ID_FAQ, FAQ.PREGUNTA, FAQ.RESPUESTA, FAQ.CATEGORIA, FAQ.ULTIMA_ACTUALIZACION",
+}
+
+# Para escribir CLIENTE / PRESUPUESTO a partir del código que manejan las vistas
+CLIENTE_ID = "(SELECT ID FROM CLIENTES WHERE ID_CLIENTE = ?)"
+PRESUPUESTO_ID = "(SELECT ID FROM PRESUPUESTOS WHERE ID_PRESUPUESTO = ?)"
+
+
+def original_code(table, param):
+    """
+    Valor de CLIENTE_ORIGINAL / PRESUPUESTO_ORIGINAL: el parámetro número
+    param (el mismo código que recibe CLIENTE_ID / PRESUPUESTO_ID) si no es
+    el de ninguna fila de table, y NULL si lo es. Así un código sin fila
+    (p. ej. "Seleccionar Cliente") se guarda tal cual, como antes de las
+    claves enteras, y uno válido no deja un código antiguo por debajo.
+    """
+    code_column = {"CLIENTES": "ID_CLIENTE", "PRESUPUESTOS": "ID_PRESUPUESTO"}[table]
+    return f"""(SELECT CODIGO FROM (SELECT ?{param} AS CODIGO)
+               WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {code_column} = CODIGO))"""
+
+
+# Un presupuesto con líneas tiene SUBTOTAL y TOTAL mantenidos por triggers
+# (migración 010): los importes del formulario sólo se guardan si no tiene.
+PRESUPUESTO_SIN_LINEAS = "NOT EXISTS (SELECT 1 FROM PRESUPUESTO_LINEAS L WHERE L.PRESUPUESTO = PRESUPUESTOS.ID)"
+
+# Paginación por clave (keyset): tabla -> (clave primaria, columnas por las que
+# se puede ordenar). Cada columna de orden tiene un índice (columna, clave).
+# Las claves de página de las columnas de fecha van como "yyyy-MM-dd".
+PAGINATION = {
+    "CLIENTES": ("ID_CLIENTE", ("ID_CLIENTE", "NOMBRE")),
+    "OPORTUNIDADES": ("ID_OPORTUNIDAD", ("ID_OPORTUNIDAD", "FECHA")),
+    "PRESUPUESTOS": ("ID_PRESUPUESTO", ("ID_PRESUPUESTO", "FECHA_EXPIRACION")),
+    "PRODUCTOS": ("id", ("id", "nombre")),
+    "TAREAS": ("ID_TAREA", ("ID_TAREA", "FECHA_VENCIMIENTO")),
+    "FAQ": ("ID_FAQ", ("ID_FAQ", "CATEGORIA")),
+}
+
+DATE_ORDER_COLUMNS = {"FECHA", "FECHA_EXPIRACION", "FECHA_VENCIMIENTO"}
+
+DEFAULT_PAGE_SIZE = 100
+
+# Aviso de cambio que DatabaseManager publica tras cada commit.
+# operation: "insert", "update", "delete", "upsert" (alta o modificación) o
+# "bulk" (muchas filas; key es None)
+ChangeEvent = namedtuple("ChangeEvent", ["table", "operation", "key"])
+
+# Tamaño máximo de cada caché de entidades (filas leídas por clave primaria)
+ENTITY_CACHE_SIZE = 1024
+
+# Filas por llamada a executemany en las cargas masivas
+BULK_CHUNK_SIZE = 5000
+
+# Filas por fetchmany en las lecturas en streaming (iter_*)
+ITER_BATCH_SIZE = 1000
 
 class DatabaseManager:
-    def __init__(self, db_name):
+    # Registro de gestores abiertos: una única conexión por fichero de base de datos
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, db_name, profile=DEFAULT_PROFILE, read_only=False):
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Perfil de base de datos desconocido: {profile}")
         self.db_name = db_name
+        self.profile = profile
+        # Conexión de sólo lectura (ver reporting()); no migra ni se registra
+        self.read_only = read_only
+        self._reader = None
         self.connection = None
         self.cursor = None
+        self._transaction_depth = 0
+        self._faq_fts = None
+        self._row_counts = {}
+        # Cachés de lecturas por ID; las invalidan los insert/update/delete de su
+        # tabla y cualquier escritura que no pase por ellos (ver _cached)
+        self._caches_version = None
+        self._caches = {
+            "CLIENTES": EntityCache(ENTITY_CACHE_SIZE),
+            "OPORTUNIDADES": EntityCache(ENTITY_CACHE_SIZE),
+            "PRESUPUESTOS": EntityCache(ENTITY_CACHE_SIZE),
+        }
+        # Suscriptores a los cambios y cambios pendientes de confirmar
+        self._listeners = []
+        self._pending_changes = []
+        # Instrumentación de consultas (ver query_stats); None = desactivada
+        self.stats = shared_stats()
+
+    @staticmethod
+    def _registry_key(db_name):
+        return os.path.abspath(db_name)
+
+    @classmethod
+    def get_instance(cls, db_name, profile=DEFAULT_PROFILE):
+        """
+        Devuelve el DatabaseManager ya abierto para ese fichero o crea, conecta
+        y registra uno nuevo. Todas las ventanas y vistas que trabajen con la
+        misma base de datos comparten así la misma conexión.
+        """
+        key = cls._registry_key(db_name)
+        with cls._registry_lock:
+            manager = cls._registry.get(key)
+            if manager is None:
+                manager = cls(db_name, profile)
+                manager.connect()
+        return manager
 
     def connect(self):
-        if not os.path.exists(self.db_name):
-            print("La base de datos no existe, creando la base de datos y tablas...")
-            self.create_db()
-        else:
-            self.connection = sqlite3.connect(self.db_name)
-            self.cursor = self.connection.cursor()
+        """
+        Abre la conexión si todavía no está abierta y aplica las migraciones
+        pendientes. Es idempotente: las llamadas posteriores no reabren el
+        fichero ni vuelven a comprobar el esquema.
+        """
+        if self.connection is not None:
+            return
 
-        self.check_tables()
+        if self.read_only:
+            self.connection = sqlite3.connect(f"file:{os.path.abspath(self.db_name)}?mode=ro", uri=True)
+            self.cursor = self._new_cursor()
+            self.apply_profile(self.profile)
+            return
+
+        new_file = not os.path.exists(self.db_name)
+        if new_file:
+            print("La base de datos no existe, creando la base de datos y tablas...")
 
-    def create_db(self):
         self.connection = sqlite3.connect(self.db_name)
-        self.cursor = self.connection.cursor()
+        self.cursor = self._new_cursor()
+        try:
+            if new_file:
+                # Sólo se puede elegir antes de crear la primera tabla; con él
+                # el mantenimiento libera espacio sin un VACUUM completo
+                self._statement("PRAGMA auto_vacuum = INCREMENTAL")
+            self.apply_profile(self.profile)
+            migrate(self.connection, registry=is_catalog(self.db_name))
+        except Exception:
+            self.connection.close()
+            self.connection = None
+            self.cursor = None
+            raise
 
-        print("Creando las tablas...")
+        DatabaseManager._registry.setdefault(self._registry_key(self.db_name), self)
 
-        # ======================================
-        #  Tabla IDENTIFICACION
-        # ======================================
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS IDENTIFICACION (
-                NOMBRE_EMPRESA TEXT NOT NULL,
-                MAIL TEXT NOT NULL,
-                PASSWORD TEXT NOT NULL
-            )
-        """)
+    def apply_profile(self, profile):
+        """
+        Aplica a la conexión abierta los PRAGMA del perfil indicado. Se puede
+        llamar en cualquier momento fuera de una transacción, por ejemplo para
+        pasar a "bulk-load" durante una importación y volver después.
+        """
+        settings = PRAGMA_PROFILES.get(profile)
+        if settings is None:
+            raise ValueError(f"Perfil de base de datos desconocido: {profile}")
+
+        for pragma, value in settings.items():
+            if self.read_only and pragma in READ_ONLY_SKIPPED_PRAGMAS:
+                continue
+            self._statement(f"PRAGMA {pragma} = {value}")
+        if self.read_only:
+            self._statement("PRAGMA query_only = ON")
+        self.profile = profile
+
+    #   TRANSACCIONES
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa varias operaciones en una única transacción:
 
-        # ======================================
-        #  Tabla CLIENTES
-        # ======================================
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS CLIENTES (
-                ID_CLIENTE TEXT PRIMARY KEY,
-                NOMBRE TEXT NOT NULL,
-                DIRECCION TEXT NOT NULL,
-                TELEFONO TEXT NOT NULL,
-                PERSONA_CONTACTO TEXT NOT NULL,
-                EMAIL TEXT NOT NULL
-            )
-        """)
+            with db.transaction():
+                db.delete_oportunidad(...)
+                db.delete_cliente(...)
 
-        # ======================================
-        #  Tabla OPORTUNIDADES
-        # ======================================
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS OPORTUNIDADES (
-                ID_OPORTUNIDAD TEXT PRIMARY KEY,
-                NOMBRE_OPORTUNIDAD TEXT NOT NULL,
-                CLIENTE TEXT NOT NULL,
-                FECHA DATE NOT NULL,
-                PRESUPUESTO TEXT NOT NULL,
-                INGRESO_ESPERADO REAL NOT NULL,
-                ESTADO TEXT NOT NULL,
-                FOREIGN KEY (CLIENTE) REFERENCES CLIENTES(ID_CLIENTE)
-            )
-        """)
+        Los métodos insert_*/update_*/delete_* no hacen commit mientras haya
+        una transacción abierta; se confirma todo junto al salir del bloque
+        (un solo fsync) o se deshace si se produce una excepción. Los bloques
+        anidados usan SAVEPOINT, así que un error interno sólo deshace su parte.
+        """
+        depth = self._transaction_depth
+        savepoint = f"sp_{depth}"
+        if depth == 0 and self.connection.in_transaction:
+            # Transacción implícita de sqlite3 que alguien dejó sin confirmar
+            # (p. ej. una escritura hecha directamente con db.cursor, sin su
+            # commit): no se sabe si estaba completa, así que se deshace
+            print("Aviso: había una transacción implícita sin confirmar; se deshace antes de empezar otra")
+            self.connection.rollback()
+            self._pending_changes.clear()
+            self.clear_caches()
+        changes_mark = len(self._pending_changes)
+        if depth == 0:
+            self._statement("BEGIN")
+        else:
+            self._statement(f"SAVEPOINT {savepoint}")
 
-        # ======================================
-        #  Tabla PRESUPUESTOS
-        # ======================================
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS PRESUPUESTOS (
-                ID_PRESUPUESTO TEXT PRIMARY KEY,
-                NOMBRE TEXT NOT NULL,
-                CLIENTE TEXT NOT NULL,
-                FECHA_CREACION DATE NOT NULL,
-                FECHA_EXPIRACION DATE NOT NULL,
-                SUBTOTAL REAL NOT NULL,
-                TOTAL REAL NOT NULL,
-                FOREIGN KEY (CLIENTE) REFERENCES CLIENTES(ID_CLIENTE)
-            )
-        """)
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if depth == 0:
+                self.connection.rollback()
+            else:
+                self._statement(f"ROLLBACK TO {savepoint}")
+                self._statement(f"RELEASE {savepoint}")
+            # Los cambios deshechos no se publican, y lo leído dentro de la
+            # transacción deshecha puede no existir ya
+            del self._pending_changes[changes_mark:]
+            self.clear_caches()
+            raise
+        else:
+            self._transaction_depth -= 1
+            if depth == 0:
+                self.connection.commit()
+                self._publish_changes()
+            else:
+                self._statement(f"RELEASE {savepoint}")
 
-        # ======================================
-        #  Tabla PRODUCTOS
-        # ======================================
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS PRODUCTOS (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                proveedor TEXT NOT NULL,
-                nombre TEXT NOT NULL,
-                descripcion TEXT NOT NULL,
-                iva INTEGER NOT NULL,
-                precio REAL NOT NULL,
-                stock INTEGER NOT NULL
-            )
-        """)
+    def in_transaction(self):
+        return self._transaction_depth > 0
 
-        # ======================================
-        #  Tabla PERFIL  (NUEVA)
-        # ======================================
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS PERFIL (
-                ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                NOMBRE_EMPRESA TEXT NOT NULL,
-                NOMBRE_USUARIO TEXT,
-                MAIL TEXT,
-                PASSWORD TEXT,
-                FOTO_PATH TEXT,
-                DESCRIPCION TEXT,
-                FOREIGN KEY (NOMBRE_EMPRESA) REFERENCES IDENTIFICACION(NOMBRE_EMPRESA)
-            )
-        """)
+    #   CONEXIÓN DE INFORMES
+    def reporting(self):
+        """
+        DatabaseManager de sólo lectura (mode=ro) sobre el mismo fichero, para
+        informes y exportaciones. Tiene su propia conexión, así que una lectura
+        larga no comparte cursor con los guardados de los formularios y, en
+        WAL, tampoco los bloquea. Se cierra junto con este gestor.
+        """
+        if self.read_only:
+            return self
+        if self._reader is None or self._reader.connection is None:
+            self._reader = DatabaseManager(self.db_name, self.profile, read_only=True)
+            self._reader.connect()
+        return self._reader
+
+    @contextmanager
+    def snapshot(self):
+        """
+        Todas las lecturas del bloque ven la misma foto de la base de datos,
+        aunque otra conexión confirme cambios mientras tanto:
 
-        self.connection.commit()
-        print("Tablas creadas correctamente.")
-
-    def check_tables(self):
-        """Verifica que las tablas estén creadas; si no, las crea."""
-        self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = [table[0] for table in self.cursor.fetchall()]
-        print(f"Tablas en la base de datos: {tables}")
-
-        # Verificación y creación de CLIENTES
-        if 'CLIENTES' not in tables:
-            print("La tabla CLIENTES no existe. Creando tabla...")
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS CLIENTES (
-                    ID_CLIENTE TEXT PRIMARY KEY,
-                    NOMBRE TEXT NOT NULL,
-                    DIRECCION TEXT NOT NULL,
-                    TELEFONO TEXT NOT NULL,
-                    PERSONA_CONTACTO TEXT NOT NULL,
-                    EMAIL TEXT NOT NULL
-                )
-            """)
-            self.connection.commit()
-            print("Tabla CLIENTES creada.")
-
-        # Verificación y creación de IDENTIFICACION
-        if 'IDENTIFICACION' not in tables:
-            print("La tabla IDENTIFICACION no existe. Creando tabla...")
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS IDENTIFICACION (
-                    NOMBRE_EMPRESA TEXT NOT NULL,
-                    MAIL TEXT NOT NULL,
-                    PASSWORD TEXT NOT NULL
-                )
-            """)
-            self.connection.commit()
-            print("Tabla IDENTIFICACION creada.")
-
-        # Verificación y creación de OPORTUNIDADES
-        if 'OPORTUNIDADES' not in tables:
-            print("La tabla OPORTUNIDADES no existe. Creando tabla...")
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS OPORTUNIDADES (
-                    ID_OPORTUNIDAD TEXT PRIMARY KEY,
-                    NOMBRE_OPORTUNIDAD TEXT NOT NULL,
-                    CLIENTE TEXT NOT NULL,
-                    FECHA DATE NOT NULL,
-                    PRESUPUESTO TEXT NOT NULL,
-                    INGRESO_ESPERADO REAL NOT NULL,
-                    ESTADO TEXT NOT NULL,
-                    FOREIGN KEY (CLIENTE) REFERENCES CLIENTES(ID_CLIENTE)
-                )
-            """)
-            self.connection.commit()
-            print("Tabla OPORTUNIDADES creada.")
-
-        # Verificación y creación de PRESUPUESTOS
-        if 'PRESUPUESTOS' not in tables:
-            print("La tabla PRESUPUESTOS no existe. Creando tabla...")
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS PRESUPUESTOS (
-                    ID_PRESUPUESTO TEXT PRIMARY KEY,
-                    NOMBRE TEXT NOT NULL,
-                    CLIENTE TEXT NOT NULL,
-                    FECHA_CREACION DATE NOT NULL,
-                    FECHA_EXPIRACION DATE NOT NULL,
-                    SUBTOTAL REAL NOT NULL,
-                    TOTAL REAL NOT NULL,
-                    FOREIGN KEY (CLIENTE) REFERENCES CLIENTES(ID_CLIENTE)
-                )
-            """)
-            self.connection.commit()
-            print("Tabla PRESUPUESTOS creada.")
-
-        # Verificación y creación de PRODUCTOS
-        if 'PRODUCTOS' not in tables:
-            print("La tabla PRODUCTOS no existe. Creando tabla...")
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS PRODUCTOS (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    proveedor TEXT NOT NULL,
-                    nombre TEXT NOT NULL,
-                    descripcion TEXT NOT NULL,
-                    iva INTEGER NOT NULL,
-                    precio REAL NOT NULL,
-                    stock INTEGER NOT NULL
-                )
-            """)
-            self.connection.commit()
-            print("Tabla PRODUCTOS creada.")
-
-        # Verificación y creación de PERFIL
-        if 'PERFIL' not in tables:
-            print("La tabla PERFIL no existe. Creando tabla...")
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS PERFIL (
-                    ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                    NOMBRE_EMPRESA TEXT NOT NULL,
-                    NOMBRE_USUARIO TEXT,
-                    MAIL TEXT,
-                    PASSWORD TEXT,
-                    FOTO_PATH TEXT,
-                    DESCRIPCION TEXT,
-                    FOREIGN KEY (NOMBRE_EMPRESA) REFERENCES IDENTIFICACION(NOMBRE_EMPRESA)
-                )
-            """)
-            self.connection.commit()
-            print("Tabla PERFIL creada.")
-
-        # Verificación y creación de TAREAS
-        if 'TAREAS' not in tables:
-            print("La tabla TAREAS no existe. Creando tabla...")
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS TAREAS (
-                    ID_TAREA TEXT PRIMARY KEY,
-                    TITULO TEXT NOT NULL,
-                    DESCRIPCION TEXT,
-                    FECHA_CREACION DATE NOT NULL,
-                    FECHA_VENCIMIENTO DATE,
-                    ASIGNADO_A TEXT,
-                    PRIORIDAD TEXT,
-                    ESTADO TEXT
-                )
-            """)
-            self.connection.commit()
-            print("Tabla TAREAS creada.")
-            
-        if 'EVENTOS' not in tables:
-            print("La tabla EVENTOS no existe. Creando tabla...")
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS EVENTOS (
-                    ID_EVENTO TEXT PRIMARY KEY,
-                    TITULO TEXT NOT NULL,
-                    FECHA DATE NOT NULL,
-                    HORA TEXT NOT NULL,
-                    LUGAR TEXT,
-                    DESCRIPCION TEXT,
-                    ASIGNADO_A TEXT
-                )
-            """)
-            self.connection.commit()
-            print("Tabla EVENTOS creada.")
-            
-        if 'FAQ' not in tables:
-            print("La tabla FAQ no existe. Creando tabla...")
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS FAQ (
-                    ID_FAQ TEXT PRIMARY KEY,
-                    PREGUNTA TEXT NOT NULL,
-                    RESPUESTA TEXT NOT NULL,
-                    CATEGORIA TEXT,
-                    ULTIMA_ACTUALIZACION DATE
-                )
-            """)
+            with db.reporting().snapshot() as reader:
+                clientes = reader.get_all_clients()
+                oportunidades = reader.get_all_oportunidades()
+
+        Vacía antes las cachés por ID, que en la conexión de informes no
+        invalidan las escrituras de la principal.
+        """
+        if self.connection.in_transaction:
+            yield self
+            return
+        self.clear_caches()
+        self._statement("BEGIN")
+        try:
+            yield self
+        finally:
+            self.connection.rollback()
+
+    #   CACHÉ DE ENTIDADES
+    def cache_stats(self):
+        """Aciertos, fallos y ocupación de la caché de cada entidad."""
+        return {table: cache.stats() for table, cache in self._caches.items()}
+
+    def clear_caches(self):
+        for cache in self._caches.values():
+            cache.clear()
+
+    def _cached(self, table, key, loader):
+        """
+        Lectura por clave a través de la caché de table. Como count_rows, las
+        cachés sólo valen mientras no cambien total_changes (escrituras de esta
+        conexión, también las hechas directamente con db.connection o
+        db.cursor) ni PRAGMA data_version (las de otras conexiones u otra
+        instancia de la aplicación); si cambian se vacían antes de leer.
+        """
+        version = (
+            self.connection.total_changes,
+            self._statement("PRAGMA data_version").fetchone()[0],
+        )
+        if version != self._caches_version:
+            self.clear_caches()
+            self._caches_version = version
+        return self._caches[table].get(key, loader)
+
+    def _commit(self):
+        """Confirma los cambios salvo que haya una transacción explícita abierta."""
+        if self._transaction_depth == 0:
             self.connection.commit()
-            print("Tabla FAQ creada.")
+            self._publish_changes()
+
+    #   AVISOS DE CAMBIOS
+    def subscribe(self, callback):
+        """
+        callback(ChangeEvent) se llamará por cada fila insertada, modificada o
+        borrada, siempre después del commit (nunca con cambios que se deshacen).
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _changed(self, table, operation, key=None):
+        """
+        Anota un cambio: invalida la caché de la entidad y deja el aviso
+        pendiente hasta el commit. Si ya se ha confirmado (execute_query hace
+        commit por su cuenta) se publica en el momento.
+        """
+        cache = self._caches.get(table)
+        if cache is not None:
+            if key is None:
+                cache.clear()
+            else:
+                cache.invalidate(key)
+
+        self._pending_changes.append(ChangeEvent(table, operation, key))
+        if not self.connection.in_transaction:
+            self._publish_changes()
+
+    def _publish_changes(self):
+        changes, self._pending_changes = self._pending_changes, []
+        for change in changes:
+            for callback in list(self._listeners):
+                try:
+                    callback(change)
+                except Exception as e:
+                    print(f"Error al notificar el cambio {change}: {e}")
 
     #   MÉTODOS GENÉRICOS
     def execute_query(self, query, params=()):
-        """Ejecuta una consulta que no devuelve resultados (INSERT, UPDATE, DELETE)."""
+        """
+        Ejecuta una consulta que no devuelve resultados (INSERT, UPDATE, DELETE).
+        Devuelve True si se ha ejecutado sin errores.
+        """
         try:
-            self.cursor.execute(query, params)
-            self.connection.commit()
+            self._execute_write(query, params)
+            self._commit()
+            return True
         except sqlite3.Error as e:
             print(f"Error al ejecutar la consulta: {e}")
+            return False
+
+    def _execute_write(self, query, params=()):
+        """
+        Ejecuta una escritura con self.cursor. sqlite3 abre una transacción
+        implícita antes de cada INSERT/UPDATE/DELETE: si la sentencia falla
+        fuera de un transaction() se deshace aquí, para que no quede abierta
+        (con el bloqueo de escritura) hasta el siguiente commit.
+        """
+        try:
+            self.cursor.execute(query, params)
+        except BaseException:
+            if self._transaction_depth == 0 and self.connection.in_transaction:
+                self.connection.rollback()
+            raise
+        return self.cursor
 
     def execute_read_query(self, query, params=()):
         """Ejecuta una consulta que devuelve resultados (SELECT)."""
@@ -286,18 +479,99 @@ class DatabaseManager:
             print(f"Error al ejecutar la consulta de lectura: {e}")
             return []
 
+    def _new_cursor(self):
+        if self.stats is None:
+            return self.connection.cursor()
+        cursor = self.connection.cursor(InstrumentedCursor)
+        cursor.stats = self.stats
+        return cursor
+
+    def _statement(self, query, params=()):
+        """
+        Sentencias internas (PRAGMA, BEGIN/SAVEPOINT, COUNT de la paginación,
+        EXPLAIN...) en un cursor propio, para no pisar los resultados de
+        self.cursor. Con la instrumentación activa también se miden.
+        """
+        return self._new_cursor().execute(query, params)
+
+    def typed_cursor(self, table):
+        """
+        Cursor nuevo que devuelve las filas de table como objetos de row_types
+        (Cliente, Oportunidad...) en lugar de tuplas. La consulta tiene que
+        devolver las columnas de TABLE_COLUMNS[table] en su orden.
+        """
+        cursor = self._new_cursor()
+        cursor.row_factory = ROW_TYPES[table].from_row
+        return cursor
+
+    def _read_cursor(self, table, typed):
+        return self.typed_cursor(table) if typed else self.cursor
+
+    #   INSTRUMENTACIÓN
+    def enable_instrumentation(self, stats=None, slow_ms=SLOW_QUERY_MS):
+        """
+        Mide a partir de ahora todas las sentencias de este gestor y devuelve
+        el QueryStats donde se acumulan (se puede compartir entre gestores).
+        Las que tarden slow_ms o más se imprimen con su EXPLAIN QUERY PLAN.
+        """
+        self.stats = stats if stats is not None else QueryStats(slow_ms)
+        if self.connection is not None:
+            self.cursor = self._new_cursor()
+        return self.stats
+
+    def disable_instrumentation(self):
+        self.stats = None
+        if self.connection is not None:
+            self.cursor = self._new_cursor()
+
+    def explain(self, query, params=()):
+        """Devuelve el plan de ejecución (columna detail de EXPLAIN QUERY PLAN)."""
+        plan = self._statement(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        return [row[3] for row in plan]
+
+    def full_scans(self, query, params=()):
+        """Pasos del plan que recorren una tabla completa (lista vacía si no hay ninguno)."""
+        return [
+            step for step in self.explain(query, params)
+            if step.startswith("SCAN ")
+            and "CONSTANT ROW" not in step and "VIRTUAL TABLE" not in step
+        ]
+
+    def check_query_plans(self, queries=HOT_QUERIES):
+        """
+        Revisa el plan de las consultas calientes y lanza AssertionError si
+        alguna recorre una tabla entera (por ejemplo, porque falta un índice).
+        """
+        problems = []
+        for query, params in queries:
+            scans = self.full_scans(query, params)
+            if scans:
+                problems.append(f"{query} -> {'; '.join(scans)}")
+        if problems:
+            raise AssertionError("Consultas sin índice:\n" + "\n".join(problems))
+
     def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
         if self.connection:
             self.connection.close()
+            self.connection = None
+            self.cursor = None
+
+        key = self._registry_key(self.db_name)
+        if DatabaseManager._registry.get(key) is self:
+            del DatabaseManager._registry[key]
 
     #   IDENTIFICACION
     def insert_empresa(self, nombre, mail, password):
         try:
-            self.cursor.execute("""
+            self._execute_write("""
                 INSERT INTO IDENTIFICACION (NOMBRE_EMPRESA, MAIL, PASSWORD)
                 VALUES (?, ?, ?)
             """, (nombre, mail, password))
-            self.connection.commit()
+            self._changed("IDENTIFICACION", "insert", nombre)
+            self._commit()
         except Exception as e:
             print(f"Error al insertar la empresa: {str(e)}")
 
@@ -326,6 +600,21 @@ class DatabaseManager:
         """, (nombre_empresa,))
         return self.cursor.fetchone()  # (mail, password) o None
 
+    #   TENANTS (catálogo de empresas, en empresa.db)
+    def insert_tenant(self, nombre_empresa, fichero):
+        """Registra el fichero de base de datos de una empresa (si no lo estaba ya)."""
+        self._execute_write("""
+            INSERT OR IGNORE INTO TENANTS (NOMBRE_EMPRESA, FICHERO) VALUES (?, ?)
+        """, (nombre_empresa, fichero))
+        self._changed("TENANTS", "insert", nombre_empresa)
+        self._commit()
+
+    def get_tenant_file(self, nombre_empresa):
+        """Fichero de la empresa o None si no está en el catálogo."""
+        self.cursor.execute("SELECT FICHERO FROM TENANTS WHERE NOMBRE_EMPRESA = ?", (nombre_empresa,))
+        result = self.cursor.fetchone()
+        return result[0] if result else None
+
     #   PERFIL 
     def get_user_profile(self, nombre_empresa):
         """
@@ -343,162 +632,317 @@ class DatabaseManager:
         - password en PASSWORD
         - photo_path en FOTO_PATH
         - descripcion en DESCRIPCION
+        Una sola sentencia: PERFIL tiene un índice UNIQUE por empresa (migración 009).
         """
-        # Primero vemos si ya existe registro en PERFIL
-        self.cursor.execute("SELECT ID FROM PERFIL WHERE NOMBRE_EMPRESA = ?", (empresa,))
-        row = self.cursor.fetchone()
-
-        if row:
-            # UPDATE
-            perfil_id = row[0]
-            try:
-                self.cursor.execute("""
-                    UPDATE PERFIL
-                    SET NOMBRE_USUARIO = ?,
-                        MAIL = ?,
-                        PASSWORD = ?,
-                        FOTO_PATH = ?,
-                        DESCRIPCION = ?
-                    WHERE ID = ?
-                """, (nombre, correo, password, photo_path, descripcion, perfil_id))
-                self.connection.commit()
-            except Exception as e:
-                print(f"Error al actualizar el perfil: {str(e)}")
-        else:
-            # INSERT
-            try:
-                self.cursor.execute("""
-                    INSERT INTO PERFIL (NOMBRE_EMPRESA, NOMBRE_USUARIO, MAIL, PASSWORD, FOTO_PATH, DESCRIPCION)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (empresa, nombre, correo, password, photo_path, descripcion))
-                self.connection.commit()
-            except Exception as e:
-                print(f"Error al insertar el perfil: {str(e)}")
+        try:
+            self._execute_write("""
+                INSERT INTO PERFIL (NOMBRE_EMPRESA, NOMBRE_USUARIO, MAIL, PASSWORD, FOTO_PATH, DESCRIPCION)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(NOMBRE_EMPRESA) DO UPDATE SET
+                    NOMBRE_USUARIO = excluded.NOMBRE_USUARIO,
+                    MAIL = excluded.MAIL,
+                    PASSWORD = excluded.PASSWORD,
+                    FOTO_PATH = excluded.FOTO_PATH,
+                    DESCRIPCION = excluded.DESCRIPCION
+            """, (empresa, nombre, correo, password, photo_path, descripcion))
+            self._changed("PERFIL", "upsert", empresa)
+            self._commit()
+        except Exception as e:
+            print(f"Error al guardar el perfil: {str(e)}")
 
     #   CLIENTES
     def insert_cliente(self, id_cliente, nombre, direccion, telefono, persona_contacto, email):
         try:
-            self.cursor.execute("""
+            self._execute_write("""
                 INSERT INTO CLIENTES (ID_CLIENTE, NOMBRE, DIRECCION, TELEFONO, PERSONA_CONTACTO, EMAIL)
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (id_cliente, nombre, direccion, telefono, persona_contacto, email))
-            self.connection.commit()
+            self._changed("CLIENTES", "insert", id_cliente)
+            self._commit()
         except Exception as e:
             print(f"Error al insertar el cliente: {str(e)}")
 
-    def get_all_clients(self):
-        self.cursor.execute("SELECT * FROM CLIENTES")
-        return self.cursor.fetchall()
+    def get_all_clients(self, typed=False):
+        cursor = self._read_cursor("CLIENTES", typed)
+        cursor.execute(f"SELECT {TABLE_COLUMNS['CLIENTES']} FROM CLIENTES")
+        return cursor.fetchall()
 
     def get_client_by_id(self, id_cliente):
-        self.cursor.execute("SELECT * FROM CLIENTES WHERE ID_CLIENTE = ?", (id_cliente,))
+        return self._cached("CLIENTES", id_cliente, self._load_client)
+
+    def _load_client(self, id_cliente):
+        self.cursor.execute(f"SELECT {TABLE_COLUMNS['CLIENTES']} FROM CLIENTES WHERE ID_CLIENTE = ?", (id_cliente,))
         return self.cursor.fetchone()
 
     def update_cliente(self, id_cliente, nombre, direccion, telefono, persona_contacto, email):
-        self.cursor.execute("""
+        self._execute_write("""
             UPDATE CLIENTES SET 
             NOMBRE = ?, DIRECCION = ?, TELEFONO = ?, PERSONA_CONTACTO = ?, EMAIL = ?
             WHERE ID_CLIENTE = ?
         """, (nombre, direccion, telefono, persona_contacto, email, id_cliente))
-        self.connection.commit()
+        self._changed("CLIENTES", "update", id_cliente)
+        self._commit()
 
     def delete_cliente(self, id_cliente):
-        self.cursor.execute("DELETE FROM CLIENTES WHERE ID_CLIENTE = ?", (id_cliente,))
-        self.connection.commit()
+        self._execute_write("DELETE FROM CLIENTES WHERE ID_CLIENTE = ?", (id_cliente,))
+        self._changed("CLIENTES", "delete", id_cliente)
+        self._commit()
     
     def get_client_name_by_id(self, id_cliente):
         """
-        Devuelve el nombre del cliente dado su ID.
+        Devuelve el nombre del cliente dado su ID (sale de la caché de clientes).
         """
-        self.cursor.execute("SELECT NOMBRE FROM CLIENTES WHERE ID_CLIENTE = ?", (id_cliente,))
-        result = self.cursor.fetchone()
-        return result[0] if result else "Desconocido"
+        client = self.get_client_by_id(id_cliente)
+        return client[1] if client else "Desconocido"
 
     #   OPORTUNIDADES
-    def insert_oportunidad(self, id_oportunidad, nombre_oportunidad, cliente, fecha, presupuesto, ingreso_esperado, estado):
+    def insert_oportunidad(self, id_oportunidad, nombre_oportunidad, cliente, fecha, presupuesto, ingreso_esperado, estado,
+                           moneda=DEFAULT_CURRENCY):
         try:
-            self.cursor.execute("""
-                INSERT INTO OPORTUNIDADES (ID_OPORTUNIDAD, NOMBRE_OPORTUNIDAD, CLIENTE, FECHA, PRESUPUESTO, INGRESO_ESPERADO, ESTADO)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (id_oportunidad, nombre_oportunidad, cliente, fecha, presupuesto, ingreso_esperado, estado))
-            self.connection.commit()
+            self._execute_write(f"""
+                INSERT INTO OPORTUNIDADES (ID_OPORTUNIDAD, NOMBRE_OPORTUNIDAD, CLIENTE, FECHA, PRESUPUESTO, INGRESO_ESPERADO, ESTADO, MONEDA,
+                                           CLIENTE_ORIGINAL, PRESUPUESTO_ORIGINAL)
+                VALUES (?, ?, {CLIENTE_ID}, {DAY_PARAM}, {PRESUPUESTO_ID}, {CENTS_PARAM}, ?, ?,
+                        {original_code("CLIENTES", 3)}, {original_code("PRESUPUESTOS", 5)})
+            """, (id_oportunidad, nombre_oportunidad, cliente, fecha, presupuesto, ingreso_esperado, estado, moneda))
+            self._changed("OPORTUNIDADES", "insert", id_oportunidad)
+            self._commit()
         except Exception as e:
             print(f"Error al insertar la oportunidad: {str(e)}")
 
-    def get_all_oportunidades(self):
-        self.cursor.execute("SELECT * FROM OPORTUNIDADES")
-        return self.cursor.fetchall()
+    def get_all_oportunidades(self, typed=False):
+        cursor = self._read_cursor("OPORTUNIDADES", typed)
+        cursor.execute(f"SELECT {TABLE_COLUMNS['OPORTUNIDADES']} FROM OPORTUNIDADES")
+        return cursor.fetchall()
 
     def get_oportunidad_by_id(self, id_oportunidad):
-        self.cursor.execute("SELECT * FROM OPORTUNIDADES WHERE ID_OPORTUNIDAD = ?", (id_oportunidad,))
+        return self._cached("OPORTUNIDADES", id_oportunidad, self._load_oportunidad)
+
+    def _load_oportunidad(self, id_oportunidad):
+        self.cursor.execute(f"SELECT {TABLE_COLUMNS['OPORTUNIDADES']} FROM OPORTUNIDADES WHERE ID_OPORTUNIDAD = ?", (id_oportunidad,))
         return self.cursor.fetchone()
 
     def update_oportunidad(self, id_oportunidad, nombre_oportunidad, cliente, fecha, presupuesto, ingreso_esperado, estado):
-        self.cursor.execute("""
+        self._execute_write(f"""
             UPDATE OPORTUNIDADES SET 
-            NOMBRE_OPORTUNIDAD = ?, CLIENTE = ?, FECHA = ?, PRESUPUESTO = ?, INGRESO_ESPERADO = ?, ESTADO = ?
+            NOMBRE_OPORTUNIDAD = ?, CLIENTE = {CLIENTE_ID}, FECHA = {DAY_PARAM}, PRESUPUESTO = {PRESUPUESTO_ID}, INGRESO_ESPERADO = {CENTS_PARAM}, ESTADO = ?,
+            CLIENTE_ORIGINAL = {original_code("CLIENTES", 2)}, PRESUPUESTO_ORIGINAL = {original_code("PRESUPUESTOS", 4)}
             WHERE ID_OPORTUNIDAD = ?
         """, (nombre_oportunidad, cliente, fecha, presupuesto, ingreso_esperado, estado, id_oportunidad))
-        self.connection.commit()
+        self._changed("OPORTUNIDADES", "update", id_oportunidad)
+        self._commit()
 
     def delete_oportunidad(self, id_oportunidad):
-        self.cursor.execute("DELETE FROM OPORTUNIDADES WHERE ID_OPORTUNIDAD = ?", (id_oportunidad,))
-        self.connection.commit()
+        self._execute_write("DELETE FROM OPORTUNIDADES WHERE ID_OPORTUNIDAD = ?", (id_oportunidad,))
+        self._changed("OPORTUNIDADES", "delete", id_oportunidad)
+        self._commit()
 
     #   PRESUPUESTOS
-    def insert_presupuesto(self, id_presupuesto, nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total):
-        self.cursor.execute("""
-            INSERT INTO PRESUPUESTOS (ID_PRESUPUESTO, NOMBRE, CLIENTE, FECHA_CREACION, FECHA_EXPIRACION, SUBTOTAL, TOTAL)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (id_presupuesto, nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total))
-        self.connection.commit()
+    def insert_presupuesto(self, id_presupuesto, nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total,
+                           moneda=DEFAULT_CURRENCY):
+        self._execute_write(f"""
+            INSERT INTO PRESUPUESTOS (ID_PRESUPUESTO, NOMBRE, CLIENTE, FECHA_CREACION, FECHA_EXPIRACION, SUBTOTAL, TOTAL, MONEDA,
+                                      CLIENTE_ORIGINAL)
+            VALUES (?, ?, {CLIENTE_ID}, {DAY_PARAM}, {DAY_PARAM}, {CENTS_PARAM}, {CENTS_PARAM}, ?,
+                    {original_code("CLIENTES", 3)})
+        """, (id_presupuesto, nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total, moneda))
+        self._changed("PRESUPUESTOS", "insert", id_presupuesto)
+        self._commit()
 
     def update_presupuesto(self, id_presupuesto, nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total):
-        self.cursor.execute("""
+        self._execute_write(f"""
             UPDATE PRESUPUESTOS SET 
-            NOMBRE = ?, CLIENTE = ?, FECHA_CREACION = ?, FECHA_EXPIRACION = ?, SUBTOTAL = ?, TOTAL = ?
+            NOMBRE = ?, CLIENTE = {CLIENTE_ID}, FECHA_CREACION = {DAY_PARAM}, FECHA_EXPIRACION = {DAY_PARAM},
+            SUBTOTAL = CASE WHEN {PRESUPUESTO_SIN_LINEAS} THEN {CENTS_PARAM} ELSE SUBTOTAL END,
+            TOTAL = CASE WHEN {PRESUPUESTO_SIN_LINEAS} THEN {CENTS_PARAM} ELSE TOTAL END,
+            CLIENTE_ORIGINAL = {original_code("CLIENTES", 2)}
             WHERE ID_PRESUPUESTO = ?
         """, (nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total, id_presupuesto))
-        self.connection.commit()
+        self._changed("PRESUPUESTOS", "update", id_presupuesto)
+        self._commit()
 
     def delete_presupuesto(self, id_presupuesto):
-        self.cursor.execute("DELETE FROM PRESUPUESTOS WHERE ID_PRESUPUESTO = ?", (id_presupuesto,))
-        self.connection.commit()
+        self._execute_write("DELETE FROM PRESUPUESTOS WHERE ID_PRESUPUESTO = ?", (id_presupuesto,))
+        self._changed("PRESUPUESTOS", "delete", id_presupuesto)
+        self._commit()
 
-    def get_all_presupuestos(self):
-        self.cursor.execute("SELECT * FROM PRESUPUESTOS")
-        return self.cursor.fetchall()
+    def get_all_presupuestos(self, typed=False):
+        cursor = self._read_cursor("PRESUPUESTOS", typed)
+        cursor.execute(f"SELECT {TABLE_COLUMNS['PRESUPUESTOS']} FROM PRESUPUESTOS")
+        return cursor.fetchall()
 
     def get_presupuesto_by_id(self, id_presupuesto):
-        self.cursor.execute("SELECT * FROM PRESUPUESTOS WHERE ID_PRESUPUESTO = ?", (id_presupuesto,))
+        return self._cached("PRESUPUESTOS", id_presupuesto, self._load_presupuesto)
+
+    def _load_presupuesto(self, id_presupuesto):
+        self.cursor.execute(f"SELECT {TABLE_COLUMNS['PRESUPUESTOS']} FROM PRESUPUESTOS WHERE ID_PRESUPUESTO = ?", (id_presupuesto,))
         return self.cursor.fetchone()
 
-    #   PRODUCTOS
-    def add_product(self, proveedor, nombre, descripcion, iva, precio, stock):
-        query = """INSERT INTO PRODUCTOS (proveedor, nombre, descripcion, iva, precio, stock)
-                   VALUES (?, ?, ?, ?, ?, ?)"""
-        self.execute_query(query, (proveedor, nombre, descripcion, iva, precio, stock))
+    def get_presupuestos_expiran_between(self, start, end):
+        """Presupuestos que caducan entre start y end (ambas incluidas)."""
+        self.cursor.execute(f"""
+            SELECT {TABLE_COLUMNS['PRESUPUESTOS']}
+            FROM PRESUPUESTOS
+            WHERE PRESUPUESTOS.FECHA_EXPIRACION BETWEEN {DAY_PARAM} AND {DAY_PARAM}
+            ORDER BY PRESUPUESTOS.FECHA_EXPIRACION, ID_PRESUPUESTO
+        """, (date_param(start), date_param(end)))
+        return self.cursor.fetchall()
+
+    def get_oportunidades_between(self, start, end):
+        """Oportunidades con fecha entre start y end (ambas incluidas)."""
+        self.cursor.execute(f"""
+            SELECT {TABLE_COLUMNS['OPORTUNIDADES']}
+            FROM OPORTUNIDADES
+            WHERE OPORTUNIDADES.FECHA BETWEEN {DAY_PARAM} AND {DAY_PARAM}
+            ORDER BY OPORTUNIDADES.FECHA, ID_OPORTUNIDAD
+        """, (date_param(start), date_param(end)))
+        return self.cursor.fetchall()
 
-    def get_all_products(self):
-        query = "SELECT * FROM PRODUCTOS"
+    #   LÍNEAS DE PRESUPUESTO
+    # SUBTOTAL y TOTAL del presupuesto los actualizan los triggers de la
+    # migración 010 con la diferencia de cada línea; nada de esto recorre las
+    # líneas, así que un presupuesto con miles se guarda igual de rápido.
+    # Cada cambio avisa también de PRESUPUESTOS (sus totales han cambiado) y
+    # va en su propia transacción: si falla (producto que no existe, CHECK de
+    # la cantidad...) se deshace entero y no queda ninguna transacción abierta.
+    def add_presupuesto_linea(self, id_presupuesto, product_id, cantidad, precio=None, iva=None, descripcion=None):
+        """
+        Añade una línea con el producto product_id y devuelve su ID. Precio (en
+        unidades), IVA y descripción se copian del producto salvo que se indiquen.
+        """
+        with self.transaction():
+            self._execute_write(f"""
+                INSERT INTO PRESUPUESTO_LINEAS (PRESUPUESTO, PRODUCTO, DESCRIPCION, CANTIDAD, PRECIO, IVA)
+                SELECT {PRESUPUESTO_ID}, id, COALESCE(?, nombre), ?, COALESCE({CENTS_PARAM}, precio), COALESCE(?, iva)
+                FROM PRODUCTOS WHERE id = ?
+            """, (id_presupuesto, descripcion, cantidad, precio, iva, product_id))
+            if self.cursor.rowcount == 0:
+                raise ValueError(f"No existe el producto {product_id}")
+            linea_id = self.cursor.lastrowid
+            self._changed("PRESUPUESTO_LINEAS", "insert", linea_id)
+            self._changed("PRESUPUESTOS", "update", id_presupuesto)
+        return linea_id
+
+    def update_presupuesto_linea(self, id_presupuesto, linea_id, cantidad, precio, iva):
+        with self.transaction():
+            self._execute_write(f"""
+                UPDATE PRESUPUESTO_LINEAS SET CANTIDAD = ?, PRECIO = {CENTS_PARAM}, IVA = ?
+                WHERE ID = ? AND PRESUPUESTO = {PRESUPUESTO_ID}
+            """, (cantidad, precio, iva, linea_id, id_presupuesto))
+            self._changed("PRESUPUESTO_LINEAS", "update", linea_id)
+            self._changed("PRESUPUESTOS", "update", id_presupuesto)
+
+    def delete_presupuesto_linea(self, id_presupuesto, linea_id):
+        with self.transaction():
+            self._execute_write(f"""
+                DELETE FROM PRESUPUESTO_LINEAS WHERE ID = ? AND PRESUPUESTO = {PRESUPUESTO_ID}
+            """, (linea_id, id_presupuesto))
+            self._changed("PRESUPUESTO_LINEAS", "delete", linea_id)
+            self._changed("PRESUPUESTOS", "update", id_presupuesto)
+
+    def get_presupuesto_lineas_page(self, id_presupuesto, after_key=None, limit=DEFAULT_PAGE_SIZE, typed=False):
+        """
+        Líneas de un presupuesto en orden de alta, por páginas: devuelve
+        (filas, siguiente_clave) como _get_page; after_key es el ID de la
+        última línea de la página anterior.
+        """
+        cursor = self._read_cursor("PRESUPUESTO_LINEAS", typed)
+        cursor.execute(f"""
+            SELECT {TABLE_COLUMNS['PRESUPUESTO_LINEAS']}
+            FROM PRESUPUESTO_LINEAS
+            WHERE PRESUPUESTO_LINEAS.PRESUPUESTO = {PRESUPUESTO_ID} AND PRESUPUESTO_LINEAS.ID > ?
+            ORDER BY PRESUPUESTO_LINEAS.ID
+            LIMIT ?
+        """, (id_presupuesto, after_key or 0, limit))
+        rows = cursor.fetchall()
+        return rows, (rows[-1][0] if len(rows) == limit else None)
+
+    def iter_presupuesto_lineas(self, id_presupuesto, batch_size=ITER_BATCH_SIZE, typed=False):
+        return self._iter_query("PRESUPUESTO_LINEAS", f"""
+            SELECT {TABLE_COLUMNS['PRESUPUESTO_LINEAS']}
+            FROM PRESUPUESTO_LINEAS
+            WHERE PRESUPUESTO_LINEAS.PRESUPUESTO = {PRESUPUESTO_ID}
+            ORDER BY PRESUPUESTO_LINEAS.ID
+        """, (id_presupuesto,), batch_size, typed)
+
+    #   LISTADOS CON NOMBRES (JOIN)
+    # Devuelven las columnas de la tabla seguidas de los nombres relacionados,
+    # para no tener que buscar cliente y presupuesto con consultas aparte.
+    _OPORTUNIDADES_DETALLE = f"""
+        SELECT O.ID_OPORTUNIDAD, O.NOMBRE_OPORTUNIDAD, COALESCE(C.ID_CLIENTE, O.CLIENTE_ORIGINAL),
+               {day_column("O.FECHA")}, COALESCE(P.ID_PRESUPUESTO, O.PRESUPUESTO_ORIGINAL),
+               {money_column("O.INGRESO_ESPERADO")}, O.ESTADO,
+               COALESCE(C.NOMBRE, 'Desconocido'), COALESCE(P.NOMBRE, 'Desconocido')
+        FROM OPORTUNIDADES O
+        LEFT JOIN CLIENTES C ON C.ID = O.CLIENTE
+        LEFT JOIN PRESUPUESTOS P ON P.ID = O.PRESUPUESTO
+    """
+
+    _PRESUPUESTOS_DETALLE = f"""
+        SELECT P.ID_PRESUPUESTO, P.NOMBRE, COALESCE(C.ID_CLIENTE, P.CLIENTE_ORIGINAL), {day_column("P.FECHA_CREACION")},
+               {day_column("P.FECHA_EXPIRACION")}, {money_column("P.SUBTOTAL")}, {money_column("P.TOTAL")},
+               COALESCE(C.NOMBRE, 'Desconocido')
+        FROM PRESUPUESTOS P
+        LEFT JOIN CLIENTES C ON C.ID = P.CLIENTE
+    """
+
+    def get_oportunidades_detalladas(self):
+        """
+        Estructura: (ID_OPORTUNIDAD, NOMBRE_OPORTUNIDAD, CLIENTE, FECHA, PRESUPUESTO,
+        INGRESO_ESPERADO, ESTADO, NOMBRE_CLIENTE, NOMBRE_PRESUPUESTO)
+        """
+        self.cursor.execute(self._OPORTUNIDADES_DETALLE)
+        return self.cursor.fetchall()
+
+    def get_oportunidad_detalle(self, id_oportunidad):
+        """Una oportunidad con los nombres de cliente y presupuesto, en una sola consulta."""
+        self.cursor.execute(self._OPORTUNIDADES_DETALLE + " WHERE O.ID_OPORTUNIDAD = ?", (id_oportunidad,))
+        return self.cursor.fetchone()
+
+    def get_presupuestos_detallados(self):
+        """
+        Estructura: (ID_PRESUPUESTO, NOMBRE, CLIENTE, FECHA_CREACION, FECHA_EXPIRACION,
+        SUBTOTAL, TOTAL, NOMBRE_CLIENTE)
+        """
+        self.cursor.execute(self._PRESUPUESTOS_DETALLE)
+        return self.cursor.fetchall()
+
+    def get_presupuesto_detalle(self, id_presupuesto):
+        """Un presupuesto con el nombre del cliente, en una sola consulta."""
+        self.cursor.execute(self._PRESUPUESTOS_DETALLE + " WHERE P.ID_PRESUPUESTO = ?", (id_presupuesto,))
+        return self.cursor.fetchone()
+
+    #   PRODUCTOS
+    def add_product(self, proveedor, nombre, descripcion, iva, precio, stock, moneda=DEFAULT_CURRENCY):
+        query = f"""INSERT INTO PRODUCTOS (proveedor, nombre, descripcion, iva, precio, stock, moneda)
+                   VALUES (?, ?, ?, ?, {CENTS_PARAM}, ?, ?)"""
+        if self.execute_query(query, (proveedor, nombre, descripcion, iva, precio, stock, moneda)):
+            self._changed("PRODUCTOS", "insert", self.cursor.lastrowid)
+
+    def get_all_products(self, typed=False):
+        query = f"SELECT {TABLE_COLUMNS['PRODUCTOS']} FROM PRODUCTOS"
+        if typed:
+            return self.typed_cursor("PRODUCTOS").execute(query).fetchall()
         return self.execute_read_query(query)
 
     def get_product(self, product_id):
-        query = "SELECT * FROM PRODUCTOS WHERE id = ?"
+        query = f"SELECT {TABLE_COLUMNS['PRODUCTOS']} FROM PRODUCTOS WHERE id = ?"
         result = self.execute_read_query(query, (product_id,))
         if result:
             return result[0]
         return None
 
     def update_product(self, product_id, proveedor, nombre, descripcion, iva, precio, stock):
-        query = """UPDATE PRODUCTOS
-                   SET proveedor = ?, nombre = ?, descripcion = ?, iva = ?, precio = ?, stock = ?
+        query = f"""UPDATE PRODUCTOS
+                   SET proveedor = ?, nombre = ?, descripcion = ?, iva = ?, precio = {CENTS_PARAM}, stock = ?
                    WHERE id = ?"""
-        self.execute_query(query, (proveedor, nombre, descripcion, iva, precio, stock, product_id))
+        if self.execute_query(query, (proveedor, nombre, descripcion, iva, precio, stock, product_id)):
+            self._changed("PRODUCTOS", "update", product_id)
 
     def delete_product(self, product_id):
         query = "DELETE FROM PRODUCTOS WHERE id = ?"
-        self.execute_query(query, (product_id,))
+        if self.execute_query(query, (product_id,)):
+            self._changed("PRODUCTOS", "delete", product_id)
 
     #   PIPELINE / ETAPAS
     def get_all_opportunities(self):
@@ -506,132 +950,344 @@ class DatabaseManager:
         Devuelve las oportunidades con un subset de columnas
         para el Pipeline (ID_OPORTUNIDAD, CLIENTE, INGRESO_ESPERADO, ESTADO).
         """
-        self.cursor.execute("SELECT ID_OPORTUNIDAD, CLIENTE, INGRESO_ESPERADO, ESTADO FROM OPORTUNIDADES")
+        self.cursor.execute(f"""
+            SELECT O.ID_OPORTUNIDAD, COALESCE(C.ID_CLIENTE, O.CLIENTE_ORIGINAL),
+                   {money_column("O.INGRESO_ESPERADO")}, O.ESTADO
+            FROM OPORTUNIDADES O
+            LEFT JOIN CLIENTES C ON C.ID = O.CLIENTE
+        """)
         return self.cursor.fetchall()
 
     def update_opportunity_stage(self, opportunity_id, new_stage):
-        self.cursor.execute(
+        self._execute_write(
             "UPDATE OPORTUNIDADES SET ESTADO = ? WHERE ID_OPORTUNIDAD = ?",
             (new_stage, opportunity_id)
         )
-        self.connection.commit()
+        self._changed("OPORTUNIDADES", "update", opportunity_id)
+        self._commit()
+
+    #   INGRESOS (sumas en céntimos)
+    # Las sumas se hacen en SQL sobre céntimos enteros, así que son exactas;
+    # total y media salen en céntimos (sql_money.from_cents los pasa a Decimal).
+    # Cada moneda se suma por separado. Por etapa y por cliente sólo se leen
+    # los índices (columna, MONEDA, INGRESO_ESPERADO).
+    def get_ingresos_por_etapa(self):
+        """Filas (ESTADO, MONEDA, oportunidades, total_céntimos, media_céntimos)."""
+        self.cursor.execute("""
+            SELECT ESTADO, MONEDA, COUNT(*), SUM(INGRESO_ESPERADO),
+                   CAST(ROUND(AVG(INGRESO_ESPERADO)) AS INTEGER)
+            FROM OPORTUNIDADES
+            GROUP BY ESTADO, MONEDA
+        """)
+        return self.cursor.fetchall()
+
+    def get_ingresos_por_cliente(self):
+        """
+        Filas (ID_CLIENTE, NOMBRE, MONEDA, oportunidades, total_céntimos,
+        media_céntimos), de mayor a menor total.
+        """
+        self.cursor.execute("""
+            SELECT C.ID_CLIENTE, COALESCE(C.NOMBRE, 'Desconocido'), S.MONEDA, S.N, S.TOTAL, S.MEDIA
+            FROM (
+                SELECT CLIENTE, MONEDA, COUNT(*) AS N, SUM(INGRESO_ESPERADO) AS TOTAL,
+                       CAST(ROUND(AVG(INGRESO_ESPERADO)) AS INTEGER) AS MEDIA
+                FROM OPORTUNIDADES
+                GROUP BY CLIENTE, MONEDA
+            ) S
+            LEFT JOIN CLIENTES C ON C.ID = S.CLIENTE
+            ORDER BY S.TOTAL DESC
+        """)
+        return self.cursor.fetchall()
+
+    def get_ingresos_por_mes(self, start=None, end=None):
+        """
+        Filas ("yyyy-MM", MONEDA, oportunidades, total_céntimos, media_céntimos)
+        por fecha de la oportunidad, opcionalmente entre start y end (incluidas).
+        Las fechas antiguas que no se pudieron convertir van juntas con mes None.
+        """
+        where, params = "", ()
+        if start is not None and end is not None:
+            where = f"WHERE FECHA BETWEEN {DAY_PARAM} AND {DAY_PARAM}"
+            params = (date_param(start), date_param(end))
+        self.cursor.execute(f"""
+            SELECT CASE WHEN typeof(FECHA) = 'integer' THEN strftime('%Y-%m', FECHA + {EPOCH_JULIAN_DAY}) END AS MES,
+                   MONEDA, COUNT(*),
+                   SUM(INGRESO_ESPERADO), CAST(ROUND(AVG(INGRESO_ESPERADO)) AS INTEGER)
+            FROM OPORTUNIDADES
+            {where}
+            GROUP BY MES, MONEDA
+            ORDER BY MES
+        """, params)
+        return self.cursor.fetchall()
+
+    #   KPIs (tablas de resumen)
+    # Leen las tablas RESUMEN_* que mantienen los triggers de la migración
+    # 011 (ver summaries.py): una fila por grupo, nunca la tabla de origen.
+    def get_kpis(self):
+        """
+        Diccionario con:
+          - "pipeline": (ESTADO, MONEDA, oportunidades, importe_céntimos)
+          - "tareas_abiertas": (ASIGNADO_A o None, tareas)
+          - "inventario": (PROVEEDOR, MONEDA, productos, unidades, valor_céntimos)
+        """
+        return {
+            "pipeline": self.execute_read_query("""
+                SELECT ESTADO, MONEDA, OPORTUNIDADES, IMPORTE
+                FROM RESUMEN_PIPELINE ORDER BY ESTADO, MONEDA
+            """),
+            "tareas_abiertas": self.execute_read_query("""
+                SELECT NULLIF(ASIGNADO_A, ''), TAREAS
+                FROM RESUMEN_TAREAS_ABIERTAS ORDER BY TAREAS DESC, ASIGNADO_A
+            """),
+            "inventario": self.execute_read_query("""
+                SELECT PROVEEDOR, MONEDA, PRODUCTOS, UNIDADES, VALOR
+                FROM RESUMEN_INVENTARIO ORDER BY VALOR DESC, PROVEEDOR
+            """),
+        }
+
+    def check_kpis(self, repair=False):
+        """
+        Recalcula los resúmenes desde las tablas de origen y los compara con
+        los guardados. Devuelve {tabla: (sólo_en_resumen, sólo_en_recálculo)}
+        con las que no cuadran; con repair=True además las reconstruye.
+        Recorre las tablas enteras: es una comprobación de mantenimiento, no
+        algo para las rutas interactivas.
+        """
+        with self.transaction():
+            differences = summary_differences(self.cursor)
+            for table, (only_stored, only_fresh) in differences.items():
+                print(f"Resumen {table} descuadrado: {len(only_stored)} filas de más, "
+                      f"{len(only_fresh)} que faltan o difieren")
+            if repair and differences:
+                rebuild_summaries(self.cursor, differences.keys())
+                print(f"Resúmenes reconstruidos: {', '.join(differences)}")
+        return differences
+
+    #   MANTENIMIENTO
+    def get_maintenance_log(self, limit=50):
+        """Últimas tareas de mantenimiento: (INICIO "yyyy-MM-dd HH:mm:ss", TAREA, DETALLE, MILISEGUNDOS)."""
+        return self.execute_read_query("""
+            SELECT datetime(INICIO, 'unixepoch', 'localtime'), TAREA, DETALLE, MILISEGUNDOS
+            FROM MANTENIMIENTO ORDER BY ID DESC LIMIT ?
+        """, (limit,))
 
     #   TAREAS
     def insert_tarea(self, id_tarea, titulo, descripcion, fecha_creacion, fecha_vencimiento, asignado_a, prioridad, estado):
         try:
-            self.cursor.execute("""
+            self._execute_write(f"""
                 INSERT INTO TAREAS (ID_TAREA, TITULO, DESCRIPCION, FECHA_CREACION, FECHA_VENCIMIENTO, ASIGNADO_A, PRIORIDAD, ESTADO)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, {DAY_PARAM}, {DAY_PARAM}, ?, ?, ?)
             """, (id_tarea, titulo, descripcion, fecha_creacion, fecha_vencimiento, asignado_a, prioridad, estado))
-            self.connection.commit()
+            self._changed("TAREAS", "insert", id_tarea)
+            self._commit()
         except Exception as e:
             print(f"Error al insertar la tarea: {str(e)}")
 
-    def get_all_tareas(self):
-        self.cursor.execute("SELECT * FROM TAREAS")
-        return self.cursor.fetchall()
+    def get_all_tareas(self, typed=False):
+        cursor = self._read_cursor("TAREAS", typed)
+        cursor.execute(f"SELECT {TABLE_COLUMNS['TAREAS']} FROM TAREAS")
+        return cursor.fetchall()
 
     def get_tarea_by_id(self, id_tarea):
-        self.cursor.execute("SELECT * FROM TAREAS WHERE ID_TAREA = ?", (id_tarea,))
+        self.cursor.execute(f"SELECT {TABLE_COLUMNS['TAREAS']} FROM TAREAS WHERE ID_TAREA = ?", (id_tarea,))
         return self.cursor.fetchone()
 
+    def get_tareas_vencen_between(self, start, end):
+        """Tareas cuya fecha de vencimiento está entre start y end (ambas incluidas)."""
+        self.cursor.execute(f"""
+            SELECT {TABLE_COLUMNS['TAREAS']}
+            FROM TAREAS
+            WHERE TAREAS.FECHA_VENCIMIENTO BETWEEN {DAY_PARAM} AND {DAY_PARAM}
+            ORDER BY TAREAS.FECHA_VENCIMIENTO, ID_TAREA
+        """, (date_param(start), date_param(end)))
+        return self.cursor.fetchall()
+
+    def get_tareas_vencidas(self, hoy):
+        """Tareas con vencimiento anterior a hoy (date o "yyyy-MM-dd")."""
+        self.cursor.execute(f"""
+            SELECT {TABLE_COLUMNS['TAREAS']}
+            FROM TAREAS
+            WHERE TAREAS.FECHA_VENCIMIENTO < {DAY_PARAM}
+            ORDER BY TAREAS.FECHA_VENCIMIENTO, ID_TAREA
+        """, (date_param(hoy),))
+        return self.cursor.fetchall()
+
     def update_tarea(self, id_tarea, titulo, descripcion, fecha_creacion, fecha_vencimiento, asignado_a, prioridad, estado):
-        self.cursor.execute("""
+        self._execute_write(f"""
             UPDATE TAREAS
-            SET TITULO = ?, DESCRIPCION = ?, FECHA_CREACION = ?, FECHA_VENCIMIENTO = ?, 
+            SET TITULO = ?, DESCRIPCION = ?, FECHA_CREACION = {DAY_PARAM}, FECHA_VENCIMIENTO = {DAY_PARAM}, 
                 ASIGNADO_A = ?, PRIORIDAD = ?, ESTADO = ?
             WHERE ID_TAREA = ?
         """, (titulo, descripcion, fecha_creacion, fecha_vencimiento, asignado_a, prioridad, estado, id_tarea))
-        self.connection.commit()
+        self._changed("TAREAS", "update", id_tarea)
+        self._commit()
 
     def delete_tarea(self, id_tarea):
-        self.cursor.execute("DELETE FROM TAREAS WHERE ID_TAREA = ?", (id_tarea,))
-        self.connection.commit()
+        self._execute_write("DELETE FROM TAREAS WHERE ID_TAREA = ?", (id_tarea,))
+        self._changed("TAREAS", "delete", id_tarea)
+        self._commit()
         
     def insert_evento(self, id_evento, titulo, fecha, hora, lugar, descripcion, asignado_a):
         try:
-            self.cursor.execute("""
+            self._execute_write(f"""
                 INSERT INTO EVENTOS (ID_EVENTO, TITULO, FECHA, HORA, LUGAR, DESCRIPCION, ASIGNADO_A)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, {DAY_PARAM}, {MINUTE_PARAM}, ?, ?, ?)
             """, (id_evento, titulo, fecha, hora, lugar, descripcion, asignado_a))
-            self.connection.commit()
+            self._changed("EVENTOS", "insert", id_evento)
+            self._commit()
         except Exception as e:
             print(f"Error al insertar el evento: {str(e)}")
 
     #   EVENTOS
-    def get_all_eventos(self):
+    def get_all_eventos(self, typed=False):
         # Retorna todos los eventos
-        self.cursor.execute("SELECT * FROM EVENTOS")
-        return self.cursor.fetchall()
+        cursor = self._read_cursor("EVENTOS", typed)
+        cursor.execute(f"SELECT {TABLE_COLUMNS['EVENTOS']} FROM EVENTOS")
+        return cursor.fetchall()
 
     def get_eventos_por_fecha(self, fecha_str):
-        query = """
-            SELECT ID_EVENTO, TITULO, FECHA, HORA, LUGAR, DESCRIPCION, ASIGNADO_A 
+        query = f"""
+            SELECT {TABLE_COLUMNS['EVENTOS']}
             FROM EVENTOS 
-            WHERE FECHA = ?
+            WHERE EVENTOS.FECHA = {DAY_PARAM}
+            ORDER BY EVENTOS.HORA
         """
         try:
-            self.cursor.execute(query, (fecha_str,))
+            self.cursor.execute(query, (date_param(fecha_str),))
             return self.cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Error al obtener eventos por fecha: {e}")
             return []
 
+    def get_eventos_between(self, start, end):
+        """
+        Eventos entre dos fechas, ambas incluidas (date o "yyyy-MM-dd"),
+        ordenados por fecha y hora. Recorre sólo el tramo de IDX_EVENTOS_FECHA.
+        """
+        self.cursor.execute(f"""
+            SELECT {TABLE_COLUMNS['EVENTOS']}
+            FROM EVENTOS
+            WHERE EVENTOS.FECHA BETWEEN {DAY_PARAM} AND {DAY_PARAM}
+            ORDER BY EVENTOS.FECHA, EVENTOS.HORA
+        """, (date_param(start), date_param(end)))
+        return self.cursor.fetchall()
+
     def get_evento_by_id(self, id_evento):
-        self.cursor.execute("SELECT * FROM EVENTOS WHERE ID_EVENTO = ?", (id_evento,))
+        self.cursor.execute(f"SELECT {TABLE_COLUMNS['EVENTOS']} FROM EVENTOS WHERE ID_EVENTO = ?", (id_evento,))
         return self.cursor.fetchone()
 
     def update_evento(self, id_evento, titulo, fecha, hora, lugar, descripcion, asignado_a):
-        self.cursor.execute("""
+        self._execute_write(f"""
             UPDATE EVENTOS
-            SET TITULO = ?, FECHA = ?, HORA = ?, LUGAR = ?, DESCRIPCION = ?, ASIGNADO_A = ?
+            SET TITULO = ?, FECHA = {DAY_PARAM}, HORA = {MINUTE_PARAM}, LUGAR = ?, DESCRIPCION = ?, ASIGNADO_A = ?
             WHERE ID_EVENTO = ?
         """, (titulo, fecha, hora, lugar, descripcion, asignado_a, id_evento))
-        self.connection.commit()
+        self._changed("EVENTOS", "update", id_evento)
+        self._commit()
 
     def delete_evento(self, id_evento):
-        self.cursor.execute("DELETE FROM EVENTOS WHERE ID_EVENTO = ?", (id_evento,))
-        self.connection.commit()
+        self._execute_write("DELETE FROM EVENTOS WHERE ID_EVENTO = ?", (id_evento,))
+        self._changed("EVENTOS", "delete", id_evento)
+        self._commit()
 
     #   TAREAS
     def insert_faq(self, id_faq, pregunta, respuesta, categoria, ultima_act):
         try:
-            self.cursor.execute("""
+            self._execute_write("""
                 INSERT INTO FAQ (ID_FAQ, PREGUNTA, RESPUESTA, CATEGORIA, ULTIMA_ACTUALIZACION)
                 VALUES (?, ?, ?, ?, ?)
             """, (id_faq, pregunta, respuesta, categoria, ultima_act))
-            self.connection.commit()
+            self._changed("FAQ", "insert", id_faq)
+            self._commit()
         except Exception as e:
             print(f"Error al insertar la FAQ: {str(e)}")
 
-    def get_all_faqs(self):
-        self.cursor.execute("SELECT * FROM FAQ")
+    def get_all_faqs(self, typed=False):
+        cursor = self._read_cursor("FAQ", typed)
+        cursor.execute(f"SELECT {TABLE_COLUMNS['FAQ']} FROM FAQ")
+        return cursor.fetchall()
+
+    def _faq_fts_enabled(self):
+        if self._faq_fts is None:
+            self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'FAQ_FTS'")
+            self._faq_fts = self.cursor.fetchone() is not None
+        return self._faq_fts
+
+    @staticmethod
+    def _fts_match_expression(keyword):
+        """
+        Convierte lo que escribe el usuario en una expresión MATCH segura:
+        cada palabra va entre comillas y como prefijo ("agreg" encuentra
+        "agrego"), y todas deben aparecer.
+        """
+        return " ".join('"' + word.replace('"', '""') + '"*' for word in keyword.split())
+
+    def search_faqs_by_keyword(self, keyword, limit=200):
+        """
+        Busca la palabra clave en PREGUNTA o RESPUESTA. Con FTS5 los resultados
+        salen ordenados por relevancia (bm25, la pregunta pesa más que la
+        respuesta) y no distingue tildes ni mayúsculas.
+        """
+        if not keyword.strip():
+            return []
+
+        if not self._faq_fts_enabled():
+            search_pattern = f"%{keyword}%"
+            self.cursor.execute(f"""
+                SELECT {TABLE_COLUMNS['FAQ']} FROM FAQ
+                WHERE PREGUNTA LIKE ? OR RESPUESTA LIKE ?
+                LIMIT ?
+            """, (search_pattern, search_pattern, limit))
+            return self.cursor.fetchall()
+
+        self.cursor.execute(f"""
+            SELECT {TABLE_COLUMNS['FAQ']}
+            FROM FAQ_FTS
+            JOIN FAQ ON FAQ.ID = FAQ_FTS.rowid
+            WHERE FAQ_FTS MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, (self._fts_match_expression(keyword), limit))
         return self.cursor.fetchall()
 
-    def search_faqs_by_keyword(self, keyword):
-        # Busca pregunta o respuesta que contenga la palabra clave en PREGUNTA o RESPUESTA
-        search_pattern = f"%{keyword}%"
-        self.cursor.execute("""
-            SELECT * FROM FAQ
-            WHERE PREGUNTA LIKE ? OR RESPUESTA LIKE ?
-        """, (search_pattern, search_pattern))
+    def search_faqs_with_snippets(self, keyword, limit=200):
+        """
+        Igual que search_faqs_by_keyword, pero cada fila lleva al final un
+        fragmento del texto con las coincidencias marcadas entre [ ].
+        Estructura: (ID_FAQ, PREGUNTA, RESPUESTA, CATEGORIA, ULTIMA_ACTUALIZACION, FRAGMENTO)
+        """
+        if not keyword.strip():
+            return []
+        if not self._faq_fts_enabled():
+            return [faq + ("",) for faq in self.search_faqs_by_keyword(keyword, limit)]
+
+        self.cursor.execute(f"""
+            SELECT {TABLE_COLUMNS['FAQ']}, snippet(FAQ_FTS, -1, '[', ']', '…', 16)
+            FROM FAQ_FTS
+            JOIN FAQ ON FAQ.ID = FAQ_FTS.rowid
+            WHERE FAQ_FTS MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, (self._fts_match_expression(keyword), limit))
         return self.cursor.fetchall()
 
     def get_faq_by_id(self, id_faq):
-        self.cursor.execute("SELECT * FROM FAQ WHERE ID_FAQ = ?", (id_faq,))
+        self.cursor.execute(f"SELECT {TABLE_COLUMNS['FAQ']} FROM FAQ WHERE ID_FAQ = ?", (id_faq,))
         return self.cursor.fetchone()
 
     def update_faq(self, id_faq, pregunta, respuesta, categoria, ultima_act):
-        self.cursor.execute("""
+        self._execute_write("""
             UPDATE FAQ
             SET PREGUNTA = ?, RESPUESTA = ?, CATEGORIA = ?, ULTIMA_ACTUALIZACION = ?
             WHERE ID_FAQ = ?
         """, (pregunta, respuesta, categoria, ultima_act, id_faq))
-        self.connection.commit()
+        self._changed("FAQ", "update", id_faq)
+        self._commit()
 
     def delete_faq(self, id_faq):
-        self.cursor.execute("DELETE FROM FAQ WHERE ID_FAQ = ?", (id_faq,))
-        self.connection.commit()
+        self._execute_write("DELETE FROM FAQ WHERE ID_FAQ = ?", (id_faq,))
+        self._changed("FAQ", "delete", id_faq)
+        self._commit()
 
     # Oportunidades
     def get_oportunidades_por_fecha(self, fecha_str):
@@ -664,4 +1320,414 @@ class DatabaseManager:
     def get_tarea(self, id_tarea):
         query = "SELECT id_tarea, nombre, fecha_vencimiento, hora_vencimiento, lugar, descripcion, asignado_a FROM tareas WHERE id_tarea = ?"
         self.cursor.execute(query, (id_tarea,))
-        return self.cursor.fetchone()
\ No newline at end of file
+        return self.cursor.fetchone()
+
+    #   UPSERTS
+    # Alta o modificación en una sola sentencia (INSERT ... ON CONFLICT DO
+    # UPDATE sobre el código de cada tabla), sin leer antes la fila: un
+    # guardado es una sentencia y un commit. Las mismas sentencias sirven
+    # para los bulk_upsert_*. Una fila nueva toma la moneda por defecto; en
+    # una existente la moneda no se toca.
+    # Con update_existing=False una fila que ya existe no se modifica (ON
+    # CONFLICT DO NOTHING): es el "alta" de los formularios, donde el código
+    # lo escribe el usuario y no debe pisar otro registro.
+    _UPSERT_CLIENTE = """
+        INSERT INTO CLIENTES (ID_CLIENTE, NOMBRE, DIRECCION, TELEFONO, PERSONA_CONTACTO, EMAIL)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(ID_CLIENTE) DO UPDATE SET
+            NOMBRE = excluded.NOMBRE,
+            DIRECCION = excluded.DIRECCION,
+            TELEFONO = excluded.TELEFONO,
+            PERSONA_CONTACTO = excluded.PERSONA_CONTACTO,
+            EMAIL = excluded.EMAIL
+    """
+
+    _UPSERT_OPORTUNIDAD = f"""
+        INSERT INTO OPORTUNIDADES (ID_OPORTUNIDAD, NOMBRE_OPORTUNIDAD, CLIENTE, FECHA, PRESUPUESTO, INGRESO_ESPERADO, ESTADO,
+                                   CLIENTE_ORIGINAL, PRESUPUESTO_ORIGINAL)
+        VALUES (?, ?, {CLIENTE_ID}, {DAY_PARAM}, {PRESUPUESTO_ID}, {CENTS_PARAM}, ?,
+                {original_code("CLIENTES", 3)}, {original_code("PRESUPUESTOS", 5)})
+        ON CONFLICT(ID_OPORTUNIDAD) DO UPDATE SET
+            NOMBRE_OPORTUNIDAD = excluded.NOMBRE_OPORTUNIDAD,
+            CLIENTE = excluded.CLIENTE,
+            FECHA = excluded.FECHA,
+            PRESUPUESTO = excluded.PRESUPUESTO,
+            INGRESO_ESPERADO = excluded.INGRESO_ESPERADO,
+            ESTADO = excluded.ESTADO,
+            CLIENTE_ORIGINAL = excluded.CLIENTE_ORIGINAL,
+            PRESUPUESTO_ORIGINAL = excluded.PRESUPUESTO_ORIGINAL
+    """
+
+    _UPSERT_PRESUPUESTO = f"""
+        INSERT INTO PRESUPUESTOS (ID_PRESUPUESTO, NOMBRE, CLIENTE, FECHA_CREACION, FECHA_EXPIRACION, SUBTOTAL, TOTAL,
+                                  CLIENTE_ORIGINAL)
+        VALUES (?, ?, {CLIENTE_ID}, {DAY_PARAM}, {DAY_PARAM}, {CENTS_PARAM}, {CENTS_PARAM},
+                {original_code("CLIENTES", 3)})
+        ON CONFLICT(ID_PRESUPUESTO) DO UPDATE SET
+            NOMBRE = excluded.NOMBRE,
+            CLIENTE = excluded.CLIENTE,
+            FECHA_CREACION = excluded.FECHA_CREACION,
+            FECHA_EXPIRACION = excluded.FECHA_EXPIRACION,
+            SUBTOTAL = CASE WHEN {PRESUPUESTO_SIN_LINEAS} THEN excluded.SUBTOTAL ELSE SUBTOTAL END,
+            TOTAL = CASE WHEN {PRESUPUESTO_SIN_LINEAS} THEN excluded.TOTAL ELSE TOTAL END,
+            CLIENTE_ORIGINAL = excluded.CLIENTE_ORIGINAL
+    """
+
+    _UPSERT_PRODUCTO = f"""
+        INSERT INTO PRODUCTOS (id, proveedor, nombre, descripcion, iva, precio, stock)
+        VALUES (?, ?, ?, ?, ?, {CENTS_PARAM}, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            proveedor = excluded.proveedor,
+            nombre = excluded.nombre,
+            descripcion = excluded.descripcion,
+            iva = excluded.iva,
+            precio = excluded.precio,
+            stock = excluded.stock
+    """
+
+    _UPSERT_TAREA = f"""
+        INSERT INTO TAREAS (ID_TAREA, TITULO, DESCRIPCION, FECHA_CREACION, FECHA_VENCIMIENTO, ASIGNADO_A, PRIORIDAD, ESTADO)
+        VALUES (?, ?, ?, {DAY_PARAM}, {DAY_PARAM}, ?, ?, ?)
+        ON CONFLICT(ID_TAREA) DO UPDATE SET
+            TITULO = excluded.TITULO,
+            DESCRIPCION = excluded.DESCRIPCION,
+            FECHA_CREACION = excluded.FECHA_CREACION,
+            FECHA_VENCIMIENTO = excluded.FECHA_VENCIMIENTO,
+            ASIGNADO_A = excluded.ASIGNADO_A,
+            PRIORIDAD = excluded.PRIORIDAD,
+            ESTADO = excluded.ESTADO
+    """
+
+    _UPSERT_EVENTO = f"""
+        INSERT INTO EVENTOS (ID_EVENTO, TITULO, FECHA, HORA, LUGAR, DESCRIPCION, ASIGNADO_A)
+        VALUES (?, ?, {DAY_PARAM}, {MINUTE_PARAM}, ?, ?, ?)
+        ON CONFLICT(ID_EVENTO) DO UPDATE SET
+            TITULO = excluded.TITULO,
+            FECHA = excluded.FECHA,
+            HORA = excluded.HORA,
+            LUGAR = excluded.LUGAR,
+            DESCRIPCION = excluded.DESCRIPCION,
+            ASIGNADO_A = excluded.ASIGNADO_A
+    """
+
+    _UPSERT_FAQ = """
+        INSERT INTO FAQ (ID_FAQ, PREGUNTA, RESPUESTA, CATEGORIA, ULTIMA_ACTUALIZACION)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(ID_FAQ) DO UPDATE SET
+            PREGUNTA = excluded.PREGUNTA,
+            RESPUESTA = excluded.RESPUESTA,
+            CATEGORIA = excluded.CATEGORIA,
+            ULTIMA_ACTUALIZACION = excluded.ULTIMA_ACTUALIZACION
+    """
+
+    def _upsert(self, table, query, params, key, update_existing=True):
+        """Devuelve True si se escribió la fila (False: ya existía y update_existing=False)."""
+        if not update_existing:
+            query = query[:query.index("ON CONFLICT")] + "ON CONFLICT DO NOTHING"
+        self._execute_write(query, params)
+        if self.cursor.rowcount == 0:
+            # No se ha escrito nada, pero sqlite3 abrió una transacción implícita
+            # (con su bloqueo de escritura): se cierra igualmente
+            self._commit()
+            return False
+        self._changed(table, "upsert", key)
+        self._commit()
+        return True
+
+    def upsert_cliente(self, id_cliente, nombre, direccion, telefono, persona_contacto, email, update_existing=True):
+        return self._upsert("CLIENTES", self._UPSERT_CLIENTE,
+                            (id_cliente, nombre, direccion, telefono, persona_contacto, email),
+                            id_cliente, update_existing)
+
+    def upsert_oportunidad(self, id_oportunidad, nombre_oportunidad, cliente, fecha, presupuesto, ingreso_esperado, estado,
+                           update_existing=True):
+        return self._upsert("OPORTUNIDADES", self._UPSERT_OPORTUNIDAD,
+                            (id_oportunidad, nombre_oportunidad, cliente, fecha, presupuesto, ingreso_esperado, estado),
+                            id_oportunidad, update_existing)
+
+    def upsert_presupuesto(self, id_presupuesto, nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total,
+                           update_existing=True):
+        return self._upsert("PRESUPUESTOS", self._UPSERT_PRESUPUESTO,
+                            (id_presupuesto, nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total),
+                            id_presupuesto, update_existing)
+
+    def upsert_product(self, product_id, proveedor, nombre, descripcion, iva, precio, stock):
+        """Con product_id None da de alta un producto nuevo. Devuelve su id."""
+        self._execute_write(self._UPSERT_PRODUCTO, (product_id, proveedor, nombre, descripcion, iva, precio, stock))
+        if product_id is None:
+            product_id = self.cursor.lastrowid
+        self._changed("PRODUCTOS", "upsert", product_id)
+        self._commit()
+        return product_id
+
+    def upsert_tarea(self, id_tarea, titulo, descripcion, fecha_creacion, fecha_vencimiento, asignado_a, prioridad, estado):
+        return self._upsert("TAREAS", self._UPSERT_TAREA,
+                            (id_tarea, titulo, descripcion, fecha_creacion, fecha_vencimiento, asignado_a, prioridad, estado),
+                            id_tarea)
+
+    def upsert_evento(self, id_evento, titulo, fecha, hora, lugar, descripcion, asignado_a):
+        return self._upsert("EVENTOS", self._UPSERT_EVENTO,
+                            (id_evento, titulo, fecha, hora, lugar, descripcion, asignado_a), id_evento)
+
+    def upsert_faq(self, id_faq, pregunta, respuesta, categoria, ultima_act):
+        return self._upsert("FAQ", self._UPSERT_FAQ, (id_faq, pregunta, respuesta, categoria, ultima_act), id_faq)
+
+    #   CARGAS MASIVAS
+    def _bulk_execute(self, table, query, rows, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Ejecuta query con executemany sobre rows (cualquier iterable) en
+        bloques de chunk_size filas, todo dentro de una única transacción.
+        Devuelve una lista con {"rows", "seconds"} por cada bloque.
+        """
+        timings = []
+        rows = iter(rows)
+        with self.transaction():
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                start = time.perf_counter()
+                self.cursor.executemany(query, chunk)
+                timings.append({"rows": len(chunk), "seconds": time.perf_counter() - start})
+            self._changed(table, "bulk")
+        return timings
+
+    def bulk_insert_clientes(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows: (id_cliente, nombre, direccion, telefono, persona_contacto, email)"""
+        return self._bulk_execute("CLIENTES", """
+            INSERT INTO CLIENTES (ID_CLIENTE, NOMBRE, DIRECCION, TELEFONO, PERSONA_CONTACTO, EMAIL)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows, chunk_size)
+
+    def bulk_update_clientes(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows: (nombre, direccion, telefono, persona_contacto, email, id_cliente)"""
+        return self._bulk_execute("CLIENTES", """
+            UPDATE CLIENTES SET
+            NOMBRE = ?, DIRECCION = ?, TELEFONO = ?, PERSONA_CONTACTO = ?, EMAIL = ?
+            WHERE ID_CLIENTE = ?
+        """, rows, chunk_size)
+
+    def bulk_upsert_clientes(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows como en bulk_insert_clientes; los que ya existen se actualizan."""
+        return self._bulk_execute("CLIENTES", self._UPSERT_CLIENTE, rows, chunk_size)
+
+    def bulk_insert_oportunidades(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows: (id_oportunidad, nombre_oportunidad, cliente, fecha, presupuesto, ingreso_esperado, estado)"""
+        return self._bulk_execute("OPORTUNIDADES", f"""
+            INSERT INTO OPORTUNIDADES (ID_OPORTUNIDAD, NOMBRE_OPORTUNIDAD, CLIENTE, FECHA, PRESUPUESTO, INGRESO_ESPERADO, ESTADO,
+                                       CLIENTE_ORIGINAL, PRESUPUESTO_ORIGINAL)
+            VALUES (?, ?, {CLIENTE_ID}, {DAY_PARAM}, {PRESUPUESTO_ID}, {CENTS_PARAM}, ?,
+                    {original_code("CLIENTES", 3)}, {original_code("PRESUPUESTOS", 5)})
+        """, rows, chunk_size)
+
+    def bulk_update_opportunity_stages(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows: (nuevo_estado, id_oportunidad)"""
+        return self._bulk_execute(
+            "OPORTUNIDADES",
+            "UPDATE OPORTUNIDADES SET ESTADO = ? WHERE ID_OPORTUNIDAD = ?",
+            rows, chunk_size
+        )
+
+    def bulk_upsert_oportunidades(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows como en bulk_insert_oportunidades; las que ya existen se actualizan."""
+        return self._bulk_execute("OPORTUNIDADES", self._UPSERT_OPORTUNIDAD, rows, chunk_size)
+
+    def bulk_insert_presupuestos(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows: (id_presupuesto, nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total)"""
+        return self._bulk_execute("PRESUPUESTOS", f"""
+            INSERT INTO PRESUPUESTOS (ID_PRESUPUESTO, NOMBRE, CLIENTE, FECHA_CREACION, FECHA_EXPIRACION, SUBTOTAL, TOTAL,
+                                      CLIENTE_ORIGINAL)
+            VALUES (?, ?, {CLIENTE_ID}, {DAY_PARAM}, {DAY_PARAM}, {CENTS_PARAM}, {CENTS_PARAM},
+                    {original_code("CLIENTES", 3)})
+        """, rows, chunk_size)
+
+    def bulk_upsert_presupuestos(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows como en bulk_insert_presupuestos; los que ya existen se actualizan."""
+        return self._bulk_execute("PRESUPUESTOS", self._UPSERT_PRESUPUESTO, rows, chunk_size)
+
+    def bulk_upsert_products(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """
+        rows: (id, proveedor, nombre, descripcion, iva, precio, stock)
+        Si id es None se inserta un producto nuevo; si ya existe se actualiza.
+        """
+        return self._bulk_execute("PRODUCTOS", self._UPSERT_PRODUCTO, rows, chunk_size)
+
+    def bulk_insert_tareas(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows: (id_tarea, titulo, descripcion, fecha_creacion, fecha_vencimiento, asignado_a, prioridad, estado)"""
+        return self._bulk_execute("TAREAS", f"""
+            INSERT INTO TAREAS (ID_TAREA, TITULO, DESCRIPCION, FECHA_CREACION, FECHA_VENCIMIENTO, ASIGNADO_A, PRIORIDAD, ESTADO)
+            VALUES (?, ?, ?, {DAY_PARAM}, {DAY_PARAM}, ?, ?, ?)
+        """, rows, chunk_size)
+
+    def bulk_upsert_tareas(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows como en bulk_insert_tareas; las que ya existen se actualizan."""
+        return self._bulk_execute("TAREAS", self._UPSERT_TAREA, rows, chunk_size)
+
+    def bulk_insert_eventos(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows: (id_evento, titulo, fecha, hora, lugar, descripcion, asignado_a)"""
+        return self._bulk_execute("EVENTOS", f"""
+            INSERT INTO EVENTOS (ID_EVENTO, TITULO, FECHA, HORA, LUGAR, DESCRIPCION, ASIGNADO_A)
+            VALUES (?, ?, {DAY_PARAM}, {MINUTE_PARAM}, ?, ?, ?)
+        """, rows, chunk_size)
+
+    def bulk_upsert_eventos(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows como en bulk_insert_eventos; los que ya existen se actualizan."""
+        return self._bulk_execute("EVENTOS", self._UPSERT_EVENTO, rows, chunk_size)
+
+    def bulk_insert_faqs(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows: (id_faq, pregunta, respuesta, categoria, ultima_actualizacion)"""
+        return self._bulk_execute("FAQ", """
+            INSERT INTO FAQ (ID_FAQ, PREGUNTA, RESPUESTA, CATEGORIA, ULTIMA_ACTUALIZACION)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows, chunk_size)
+
+    def bulk_upsert_faqs(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        """rows como en bulk_insert_faqs; las que ya existen se actualizan."""
+        return self._bulk_execute("FAQ", self._UPSERT_FAQ, rows, chunk_size)
+
+    #   LECTURAS EN STREAMING
+    # Generadores para exportaciones e informes sobre tablas grandes: leen en
+    # bloques de batch_size filas con fetchmany, así que la memoria no crece
+    # con el tamaño de la tabla. Cada uno usa su propio cursor, de modo que se
+    # pueden lanzar otras consultas mientras se recorre.
+    def _iter_query(self, table, query, params=(), batch_size=ITER_BATCH_SIZE, typed=False):
+        cursor = self.typed_cursor(table) if typed else self._new_cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def _iter_table(self, table, batch_size, typed):
+        return self._iter_query(table, f"SELECT {TABLE_COLUMNS[table]} FROM {table}", (), batch_size, typed)
+
+    def iter_clients(self, batch_size=ITER_BATCH_SIZE, typed=False):
+        return self._iter_table("CLIENTES", batch_size, typed)
+
+    def iter_oportunidades(self, batch_size=ITER_BATCH_SIZE, typed=False):
+        return self._iter_table("OPORTUNIDADES", batch_size, typed)
+
+    def iter_presupuestos(self, batch_size=ITER_BATCH_SIZE, typed=False):
+        return self._iter_table("PRESUPUESTOS", batch_size, typed)
+
+    def iter_products(self, batch_size=ITER_BATCH_SIZE, typed=False):
+        return self._iter_table("PRODUCTOS", batch_size, typed)
+
+    def iter_tareas(self, batch_size=ITER_BATCH_SIZE, typed=False):
+        return self._iter_table("TAREAS", batch_size, typed)
+
+    def iter_eventos(self, batch_size=ITER_BATCH_SIZE, typed=False):
+        return self._iter_table("EVENTOS", batch_size, typed)
+
+    def iter_faqs(self, batch_size=ITER_BATCH_SIZE, typed=False):
+        return self._iter_table("FAQ", batch_size, typed)
+
+    def iter_oportunidades_detalladas(self, batch_size=ITER_BATCH_SIZE):
+        """Como get_oportunidades_detalladas, en streaming."""
+        return self._iter_query("OPORTUNIDADES", self._OPORTUNIDADES_DETALLE, (), batch_size)
+
+    def iter_presupuestos_detallados(self, batch_size=ITER_BATCH_SIZE):
+        """Como get_presupuestos_detallados, en streaming."""
+        return self._iter_query("PRESUPUESTOS", self._PRESUPUESTOS_DETALLE, (), batch_size)
+
+    #   PAGINACIÓN
+    def _get_page(self, table, after_key, limit, order_by, typed=False):
+        """
+        Devuelve (filas, siguiente_clave). after_key es None para la primera
+        página y, después, la siguiente_clave de la página anterior. Cuando
+        no quedan más filas siguiente_clave es None.
+        Con ORDER BY por la clave primaria after_key es la propia clave; con
+        otra columna es la tupla (valor_columna, clave).
+        Con typed=True las filas son objetos de row_types.
+        """
+        pk, orders = PAGINATION[table]
+        order_by = order_by or pk
+        if order_by not in orders:
+            raise ValueError(f"No se puede paginar {table} por {order_by}")
+
+        # Columnas calificadas con la tabla: la lista del SELECT usa alias con
+        # el mismo nombre (p. ej. FECHA convertida a texto) y ORDER BY los
+        # resolvería antes que la columna entera indexada.
+        key = f"{table}.{pk}"
+        if order_by == pk:
+            order = key
+            if after_key is None:
+                where, params = "", ()
+            else:
+                where, params = f"WHERE {key} > ?", (after_key,)
+        else:
+            column = f"{table}.{order_by}"
+            value = DAY_PARAM if order_by in DATE_ORDER_COLUMNS else "?"
+            order = f"{column}, {key}"
+            if after_key is None:
+                where, params = "", ()
+            elif after_key[0] is None:
+                # Los NULL van primero: seguimos dentro de ellos o pasamos al resto
+                where = f"WHERE ({column} IS NULL AND {key} > ?) OR {column} IS NOT NULL"
+                params = (after_key[1],)
+            else:
+                where = f"WHERE ({column}, {key}) > ({value}, ?)"
+                params = (date_param(after_key[0]), after_key[1])
+
+        cursor = self._read_cursor(table, typed)
+        cursor.execute(
+            f"SELECT {TABLE_COLUMNS[table]} FROM {table} {where} ORDER BY {order} LIMIT ?",
+            params + (limit,)
+        )
+        rows = cursor.fetchall()
+        if len(rows) < limit:
+            return rows, None
+
+        columns = [column[0] for column in cursor.description]
+        last = rows[-1]
+        if order_by == pk:
+            next_key = last[columns.index(pk)]
+        else:
+            next_key = (last[columns.index(order_by)], last[columns.index(pk)])
+        return rows, next_key
+
+    def get_clients_page(self, after_key=None, limit=DEFAULT_PAGE_SIZE, order_by=None, typed=False):
+        return self._get_page("CLIENTES", after_key, limit, order_by, typed)
+
+    def get_oportunidades_page(self, after_key=None, limit=DEFAULT_PAGE_SIZE, order_by=None, typed=False):
+        return self._get_page("OPORTUNIDADES", after_key, limit, order_by, typed)
+
+    def get_presupuestos_page(self, after_key=None, limit=DEFAULT_PAGE_SIZE, order_by=None, typed=False):
+        return self._get_page("PRESUPUESTOS", after_key, limit, order_by, typed)
+
+    def get_products_page(self, after_key=None, limit=DEFAULT_PAGE_SIZE, order_by=None, typed=False):
+        return self._get_page("PRODUCTOS", after_key, limit, order_by, typed)
+
+    def get_tareas_page(self, after_key=None, limit=DEFAULT_PAGE_SIZE, order_by=None, typed=False):
+        return self._get_page("TAREAS", after_key, limit, order_by, typed)
+
+    def get_faqs_page(self, after_key=None, limit=DEFAULT_PAGE_SIZE, order_by=None, typed=False):
+        return self._get_page("FAQ", after_key, limit, order_by, typed)
+
+    def count_rows(self, table):
+        """
+        Número total de filas de la tabla. El resultado se guarda y se reutiliza
+        mientras nadie escriba en la base de datos: total_changes cuenta las
+        escrituras de esta conexión y PRAGMA data_version las de otras.
+        Tras cualquier escritura se vuelve a contar con COUNT(*), que recorre
+        el índice más pequeño de la tabla. No se usa sqlite_stat1: sólo se
+        actualiza con ANALYZE (ver maintenance.py) y daría totales atrasados.
+        """
+        if table not in PAGINATION:
+            raise ValueError(f"Tabla desconocida: {table}")
+
+        version = (
+            self.connection.total_changes,
+            self._statement("PRAGMA data_version").fetchone()[0],
+        )
+        cached = self._row_counts.get(table)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        total = self._statement(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        self._row_counts[table] = (version, total)
+        return total
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from threading import Lock
+
+# Marca para distinguir "no está en caché" de "está en caché y vale None"
+_MISSING = object()
+
+
+class EntityCache:
+    """
+    Caché LRU acotada para lecturas por clave primaria (get_*_by_id).
+    Guarda también los None, así que quien inserte una fila con una clave
+    debe invalidarla igual que en un update o un delete.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, loader):
+        """Devuelve el valor de key; si no está, lo lee con loader(key) y lo guarda."""
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = loader(key)
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,42 @@
+import csv
+
+from database_manager import ITER_BATCH_SIZE
+from row_types import ROW_TYPES
+
+# ======================================
+#  Exportación a CSV
+# ======================================
+# Vuelca una tabla a CSV leyendo en streaming (iter_*) desde la conexión de
+# informes, dentro de una misma foto de la base de datos: la memoria no
+# depende del tamaño de la tabla y los guardados de la interfaz no esperan.
+
+EXPORT_METHODS = {
+    "CLIENTES": "iter_clients",
+    "OPORTUNIDADES": "iter_oportunidades",
+    "PRESUPUESTOS": "iter_presupuestos",
+    "PRODUCTOS": "iter_products",
+    "TAREAS": "iter_tareas",
+    "EVENTOS": "iter_eventos",
+    "FAQ": "iter_faqs",
+}
+
+CSV_DELIMITER = ";"  # el que espera Excel con configuración regional española
+
+
+def export_csv(db_manager, table, path, batch_size=ITER_BATCH_SIZE):
+    """Escribe table en path (con cabecera) y devuelve el número de filas."""
+    method = EXPORT_METHODS.get(table)
+    if method is None:
+        raise ValueError(f"No se puede exportar la tabla {table}")
+
+    header = [name.upper() for name in ROW_TYPES[table].__slots__]
+    count = 0
+    with db_manager.reporting().snapshot() as reader:
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f, delimiter=CSV_DELIMITER)
+            writer.writerow(header)
+            for row in getattr(reader, method)(batch_size=batch_size):
+                writer.writerow(row)
+                count += 1
+    print(f"Exportadas {count} filas de {table} a {path}")
+    return count
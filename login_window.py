@@ -13,6 +13,7 @@ from PyQt5.QtGui import (
 
 from rotatable_label import RotatableLabel  # Asegúrate de que esta ruta sea correcta
 from database_manager import DatabaseManager
+from tenant_registry import TenantRegistry
 from main_window import MainWindow  # Asegúrate de que esta ruta sea correcta
 
 class LoginWindow(QWidget):
@@ -20,8 +21,7 @@ class LoginWindow(QWidget):
         super().__init__()
         try:
             print("Inicializando LoginWindow...")
-            self.db_manager = DatabaseManager("empresa.db")
-            self.db_manager.connect()
+            self.db_manager = DatabaseManager.get_instance("empresa.db")
 
             self.setWindowTitle("Iniciar Sesión - DataNexus")
             self.setWindowIcon(QIcon("images/logoApp.png"))
@@ -366,14 +366,12 @@ class LoginWindow(QWidget):
                 self.show_message("Todos los campos son obligatorios.", QMessageBox.Warning)
                 return
 
-            # Crea la instancia de DatabaseManager usando el nombre de la empresa
-            safe_company_name = "".join(c for c in nombre_empresa if c.isalnum() or c in (' ','.','_')).rstrip()
-            db_filename = f"{safe_company_name}.db"
-            company_db_manager = DatabaseManager(db_filename)
-            company_db_manager.connect()
+            # Obtiene la base de datos de la empresa a través del catálogo; si la
+            # empresa no está registrada no se abre (ni se crea) ningún fichero
+            company_db_manager = TenantRegistry.get_instance().open(nombre_empresa)
 
             # Verifica las credenciales en la base de datos específica
-            if company_db_manager.check_login(mail, password, nombre_empresa):
+            if company_db_manager and company_db_manager.check_login(mail, password, nombre_empresa):
                 print("Inicio de sesión exitoso.")
                 self.show_message("¡Inicio de sesión exitoso!", QMessageBox.Information)
                 self.main_window = MainWindow(nombre_empresa, company_db_manager)
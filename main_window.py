@@ -18,6 +18,10 @@ from views.tareas_view import TareasView
 from views.calendario_view import CalendarioView
 from views.dudas_view import DudasView
 from database_manager import DatabaseManager
+from services.query_service import AsyncQueryService
+from services.backup_service import BackupService
+from services.maintenance_service import MaintenanceService
+from tenant_registry import TenantRegistry
 
 from rotatable_label import RotatableLabel
 
@@ -27,6 +31,15 @@ class MainWindow(QWidget):
         super().__init__()
         self.db_manager = db_manager
         self.empresa_nombre = empresa_nombre
+        # Mientras la ventana esté abierta el catálogo no cierra esta empresa
+        TenantRegistry.get_instance().hold(empresa_nombre)
+        # Hilo de lecturas en segundo plano para las vistas con tablas grandes
+        self.query_service = AsyncQueryService(db_manager, self)
+        # Copia de seguridad diaria de la empresa, en segundo plano
+        self.backup_service = BackupService(self)
+        self.backup_service.backup_if_due(db_manager.db_name)
+        self.maintenance_service = MaintenanceService(self)
+        self.maintenance_service.watch(db_manager.db_name)
 
         self.setWindowTitle(f"{empresa_nombre} - DataNexus CRM")
         self.showFullScreen()
@@ -176,7 +189,7 @@ class MainWindow(QWidget):
         self.miPerfil_view = MiPerfilView(self.db_manager, self.empresa_nombre)
         self.main_area.addWidget(self.miPerfil_view)
         
-        self.client_view = ClientesView(self.db_manager, self.empresa_nombre)
+        self.client_view = ClientesView(self.db_manager, self.empresa_nombre, self.query_service)
         self.main_area.addWidget(self.client_view)
 
         self.oportunidades_view = OportunidadesView(self.db_manager, self.empresa_nombre)
@@ -307,6 +320,13 @@ class MainWindow(QWidget):
         elif index == -9:
             self.close()
 
+    def closeEvent(self, event):
+        self.query_service.stop()
+        self.backup_service.stop()
+        self.maintenance_service.stop()
+        TenantRegistry.get_instance().release(self.empresa_nombre)
+        super().closeEvent(event)
+
     def open_login_window(self):
         from welcome_window import WelcomeWindow
         self.close()
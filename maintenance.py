@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import time
+
+from query_stats import connect_instrumented, shared_stats
+
+# ======================================
+#  Mantenimiento de la base de datos
+# ======================================
+# Tareas que SQLite no hace solo y que conviene lanzar de vez en cuando:
+#   - PRAGMA optimize y ANALYZE: estadísticas al día para el planificador.
+#     analysis_limit acota lo que lee ANALYZE en cada índice, así que tarda
+#     lo mismo con mil filas que con millones.
+#   - incremental_vacuum: devuelve al sistema las páginas libres que dejan
+#     los borrados, de pocas en pocas y cediendo el procesador entre pasos.
+#     Requiere auto_vacuum=INCREMENTAL: las bases de datos nuevas se crean
+#     así; en una antigua hace falta un VACUUM completo, que bloquea la base
+#     de datos entera. Ése no entra en run_maintenance: lo hace, una sola vez
+#     y sólo si el fichero es pequeño (VACUUM_CONVERT_MAX_BYTES),
+#     enable_incremental_vacuum, que MaintenanceService lanza en un rato en
+#     que el usuario no está.
+#   - wal_checkpoint(PASSIVE): pasa el WAL al fichero principal sin esperar
+#     a los lectores ni bloquear a nadie.
+# Usa su propia conexión (como backups.py), así que puede correr en un hilo
+# mientras la interfaz sigue trabajando. Cada tarea queda anotada, con lo que
+# hizo y lo que tardó, en la tabla MANTENIMIENTO (migración 012).
+
+VACUUM_PAGES_PER_STEP = 256
+MAINTENANCE_STEP_SLEEP = 0.01
+ANALYSIS_LIMIT = 1000
+ANALYZE_INTERVAL_SECONDS = 24 * 3600
+# Con 16 MiB el VACUUM de la conversión (que reescribe el fichero dos o tres
+# veces) dura como mucho uno o dos segundos incluso en un disco lento (~30
+# MB/s), muy por debajo del busy_timeout de 5 s de los perfiles: si el
+# usuario vuelve y guarda mientras tanto, su escritura espera y no falla.
+VACUUM_CONVERT_MAX_BYTES = 16 * 2**20
+MAINTENANCE_LOG_KEEP = 1000
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Última tarea de cada tanda: si está anotada, la tanda se completó
+FINAL_TASK = "wal_checkpoint"
+
+
+class MaintenanceCancelled(Exception):
+    pass
+
+
+def last_maintenance(db_name, task=None):
+    """Segundos desde la última ejecución (de task, o de cualquier tarea), o None."""
+    connection = sqlite3.connect(f"file:{os.path.abspath(db_name)}?mode=ro", uri=True)
+    try:
+        where, params = ("WHERE TAREA = ?", (task,)) if task else ("", ())
+        last = connection.execute(f"SELECT MAX(INICIO) FROM MANTENIMIENTO {where}", params).fetchone()[0]
+    except sqlite3.OperationalError:
+        last = None
+    finally:
+        connection.close()
+    return None if last is None else time.time() - last
+
+
+def needs_incremental_vacuum(db_name):
+    """
+    Si db_name todavía no usa auto_vacuum=INCREMENTAL y es lo bastante
+    pequeño para convertirlo con enable_incremental_vacuum.
+    """
+    if os.path.getsize(db_name) > VACUUM_CONVERT_MAX_BYTES:
+        return False
+    connection = sqlite3.connect(f"file:{os.path.abspath(db_name)}?mode=ro", uri=True)
+    try:
+        return connection.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL
+    finally:
+        connection.close()
+
+
+def enable_incremental_vacuum(db_name, stats=None):
+    """
+    Pasa db_name a auto_vacuum=INCREMENTAL con un VACUUM completo. Bloquea
+    la base de datos entera mientras dura y no se puede interrumpir, así que
+    sólo se lanza en un rato libre (ver MaintenanceService) y sobre ficheros
+    de hasta VACUUM_CONVERT_MAX_BYTES (16 MiB), cuyo VACUUM termina bastante
+    antes de que a una escritura de la interfaz se le agote el busy_timeout
+    (5 s). Devuelve (tarea, detalle, segundos).
+    """
+    if stats is None:
+        stats = shared_stats()
+    connection = connect_instrumented(db_name, stats, timeout=5)
+    try:
+        started = time.time()
+        start = time.perf_counter()
+        size = os.path.getsize(db_name)
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        connection.execute("VACUUM")
+        seconds = time.perf_counter() - start
+        detail = f"VACUUM completo de {size / 2**20:.1f} MiB"
+        print(f"Mantenimiento de {db_name}: auto_vacuum ({detail}) en {seconds * 1000:.0f} ms")
+        _record(connection, [("auto_vacuum", detail, seconds, started)])
+    finally:
+        connection.close()
+    return "auto_vacuum", detail, seconds
+
+
+def run_maintenance(db_name, pages=VACUUM_PAGES_PER_STEP, sleep=MAINTENANCE_STEP_SLEEP,
+                    progress=None, cancelled=None, stats=None):
+    """
+    Ejecuta las tareas de mantenimiento sobre db_name y devuelve la lista de
+    (tarea, detalle, segundos) de las que se han hecho.
+    progress(tarea, detalle, segundos) se llama al terminar cada una y
+    cancelled() puede devolver True para parar entre pasos
+    (MaintenanceCancelled); lo ya hecho queda anotado igualmente.
+    Sus sentencias se miden en stats (por defecto, el QueryStats común del
+    proceso si CRM_QUERY_STATS está definida).
+    """
+    if stats is None:
+        stats = shared_stats()
+    connection = connect_instrumented(db_name, stats, timeout=5)
+    log = []
+
+    def run(task, function):
+        if cancelled is not None and cancelled():
+            raise MaintenanceCancelled(f"Mantenimiento de {db_name} cancelado")
+        started = time.time()
+        start = time.perf_counter()
+        detail = function()
+        seconds = time.perf_counter() - start
+        log.append((task, detail, seconds, started))
+        print(f"Mantenimiento de {db_name}: {task} ({detail}) en {seconds * 1000:.0f} ms")
+        if progress is not None:
+            progress(task, detail, seconds)
+
+    try:
+        run("optimize", lambda: _optimize(connection))
+        analyze_age = last_maintenance(db_name, "analyze")
+        if analyze_age is None or analyze_age >= ANALYZE_INTERVAL_SECONDS:
+            run("analyze", lambda: _analyze(connection))
+        run("incremental_vacuum", lambda: _incremental_vacuum(connection, pages, sleep, cancelled))
+        run(FINAL_TASK, lambda: _checkpoint(connection))
+    finally:
+        _record(connection, log)
+        connection.close()
+    return [(task, detail, seconds) for task, detail, seconds, _ in log]
+
+
+def _optimize(connection):
+    connection.execute("PRAGMA optimize").fetchall()
+    return "ok"
+
+
+def _analyze(connection):
+    connection.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    connection.execute("ANALYZE")
+    connection.commit()
+    return f"analysis_limit={ANALYSIS_LIMIT}"
+
+
+def _incremental_vacuum(connection, pages, sleep, cancelled):
+    """Libera las páginas libres en pasos de pages; cada paso es su propia transacción."""
+    if connection.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        return "omitido: auto_vacuum no es INCREMENTAL"
+    before = free = connection.execute("PRAGMA freelist_count").fetchone()[0]
+    steps = 0
+    while free > 0:
+        if cancelled is not None and cancelled():
+            break
+        # executescript avanza la sentencia hasta el final; execute() la
+        # abandona tras el primer paso y sólo liberaría una página
+        connection.executescript(f"PRAGMA incremental_vacuum({pages});")
+        steps += 1
+        remaining = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        if remaining >= free:
+            break
+        free = remaining
+        if sleep:
+            time.sleep(sleep)
+    return f"{before - free} páginas liberadas en {steps} pasos, {free} libres"
+
+
+def _checkpoint(connection):
+    if connection.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+        return "omitido: sin WAL"
+    busy, wal_pages, copied = connection.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    return f"{copied}/{wal_pages} páginas del WAL" + (" (ocupado)" if busy else "")
+
+
+def _record(connection, log):
+    if not log:
+        return
+    try:
+        with connection:
+            connection.executemany(
+                "INSERT INTO MANTENIMIENTO (INICIO, TAREA, DETALLE, MILISEGUNDOS) VALUES (?, ?, ?, ?)",
+                [(int(started), task, detail, round(seconds * 1000)) for task, detail, seconds, started in log]
+            )
+            connection.execute(
+                "DELETE FROM MANTENIMIENTO WHERE ID <= (SELECT MAX(ID) FROM MANTENIMIENTO) - ?",
+                (MAINTENANCE_LOG_KEEP,)
+            )
+    except sqlite3.Error as e:
+        print(f"No se pudo anotar el mantenimiento: {e}")
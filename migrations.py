@@ -0,0 +1,749 @@
+import os
+import sqlite3
+
+from sql_dates import EPOCH_JULIAN_DAY
+from sql_money import DEFAULT_CURRENCY, line_base, line_total
+from summaries import create_summary_tables, create_summary_triggers, rebuild_summaries
+
+# ======================================
+#  Migraciones del esquema
+# ======================================
+# Cada base de datos guarda en PRAGMA user_version el número de la última
+# migración aplicada. Al conectar sólo se lee ese valor: si coincide con
+# SCHEMA_VERSION no se hace nada más; si es menor se aplican las migraciones
+# pendientes, en orden y dentro de una única transacción.
+
+
+def _migration_001_esquema_base(cursor):
+    """Crea las tablas originales del CRM (si no existían ya)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS IDENTIFICACION (
+            NOMBRE_EMPRESA TEXT NOT NULL,
+            MAIL TEXT NOT NULL,
+            PASSWORD TEXT NOT NULL
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS CLIENTES (
+            ID_CLIENTE TEXT PRIMARY KEY,
+            NOMBRE TEXT NOT NULL,
+            DIRECCION TEXT NOT NULL,
+            TELEFONO TEXT NOT NULL,
+            PERSONA_CONTACTO TEXT NOT NULL,
+            EMAIL TEXT NOT NULL
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS OPORTUNIDADES (
+            ID_OPORTUNIDAD TEXT PRIMARY KEY,
+            NOMBRE_OPORTUNIDAD TEXT NOT NULL,
+            CLIENTE TEXT NOT NULL,
+            FECHA DATE NOT NULL,
+            PRESUPUESTO TEXT NOT NULL,
+            INGRESO_ESPERADO REAL NOT NULL,
+            ESTADO TEXT NOT NULL,
+            FOREIGN KEY (CLIENTE) REFERENCES CLIENTES(ID_CLIENTE)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS PRESUPUESTOS (
+            ID_PRESUPUESTO TEXT PRIMARY KEY,
+            NOMBRE TEXT NOT NULL,
+            CLIENTE TEXT NOT NULL,
+            FECHA_CREACION DATE NOT NULL,
+            FECHA_EXPIRACION DATE NOT NULL,
+            SUBTOTAL REAL NOT NULL,
+            TOTAL REAL NOT NULL,
+            FOREIGN KEY (CLIENTE) REFERENCES CLIENTES(ID_CLIENTE)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS PRODUCTOS (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            proveedor TEXT NOT NULL,
+            nombre TEXT NOT NULL,
+            descripcion TEXT NOT NULL,
+            iva INTEGER NOT NULL,
+            precio REAL NOT NULL,
+            stock INTEGER NOT NULL
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS PERFIL (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            NOMBRE_EMPRESA TEXT NOT NULL,
+            NOMBRE_USUARIO TEXT,
+            MAIL TEXT,
+            PASSWORD TEXT,
+            FOTO_PATH TEXT,
+            DESCRIPCION TEXT,
+            FOREIGN KEY (NOMBRE_EMPRESA) REFERENCES IDENTIFICACION(NOMBRE_EMPRESA)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS TAREAS (
+            ID_TAREA TEXT PRIMARY KEY,
+            TITULO TEXT NOT NULL,
+            DESCRIPCION TEXT,
+            FECHA_CREACION DATE NOT NULL,
+            FECHA_VENCIMIENTO DATE,
+            ASIGNADO_A TEXT,
+            PRIORIDAD TEXT,
+            ESTADO TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS EVENTOS (
+            ID_EVENTO TEXT PRIMARY KEY,
+            TITULO TEXT NOT NULL,
+            FECHA DATE NOT NULL,
+            HORA TEXT NOT NULL,
+            LUGAR TEXT,
+            DESCRIPCION TEXT,
+            ASIGNADO_A TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS FAQ (
+            ID_FAQ TEXT PRIMARY KEY,
+            PREGUNTA TEXT NOT NULL,
+            RESPUESTA TEXT NOT NULL,
+            CATEGORIA TEXT,
+            ULTIMA_ACTUALIZACION DATE
+        )
+    """)
+
+
+# ======================================
+#  Índices secundarios
+# ======================================
+# Listas declarativas de índices: (nombre, tabla, columnas). Cada lista la
+# crea su migración y no se vuelve a tocar: un índice que cambia de columnas
+# es un índice nuevo, con su propio nombre, que crea (y retira el anterior)
+# una migración nueva al final de MIGRATIONS.
+INDEXES = [
+    ("IDX_OPORTUNIDADES_CLIENTE", "OPORTUNIDADES", ("CLIENTE",)),
+    ("IDX_OPORTUNIDADES_ESTADO", "OPORTUNIDADES", ("ESTADO",)),
+    ("IDX_PRESUPUESTOS_CLIENTE", "PRESUPUESTOS", ("CLIENTE",)),
+    ("IDX_PRESUPUESTOS_FECHA_EXPIRACION", "PRESUPUESTOS", ("FECHA_EXPIRACION",)),
+    ("IDX_EVENTOS_FECHA", "EVENTOS", ("FECHA", "HORA")),
+    ("IDX_TAREAS_FECHA_VENCIMIENTO", "TAREAS", ("FECHA_VENCIMIENTO",)),
+    ("IDX_TAREAS_ESTADO", "TAREAS", ("ESTADO",)),
+]
+
+# Paginación por clave (keyset): columna de orden + clave primaria (migración 004)
+PAGINATION_INDEXES = [
+    ("IDX_PRESUPUESTOS_FECHA_EXPIRACION_ID", "PRESUPUESTOS", ("FECHA_EXPIRACION", "ID_PRESUPUESTO")),
+    ("IDX_TAREAS_FECHA_VENCIMIENTO_ID", "TAREAS", ("FECHA_VENCIMIENTO", "ID_TAREA")),
+    ("IDX_CLIENTES_NOMBRE", "CLIENTES", ("NOMBRE", "ID_CLIENTE")),
+    ("IDX_OPORTUNIDADES_FECHA", "OPORTUNIDADES", ("FECHA", "ID_OPORTUNIDAD")),
+    ("IDX_PRODUCTOS_NOMBRE", "PRODUCTOS", ("nombre", "id")),
+    ("IDX_FAQ_CATEGORIA", "FAQ", ("CATEGORIA", "ID_FAQ")),
+]
+
+# Sumas de importes por etapa y por cliente sin leer la tabla (migración 008)
+MONEY_INDEXES = [
+    ("IDX_OPORTUNIDADES_CLIENTE_IMPORTE", "OPORTUNIDADES", ("CLIENTE", "MONEDA", "INGRESO_ESPERADO")),
+    ("IDX_OPORTUNIDADES_ESTADO_IMPORTE", "OPORTUNIDADES", ("ESTADO", "MONEDA", "INGRESO_ESPERADO")),
+]
+
+# Líneas de un presupuesto en orden (migración 010)
+PRESUPUESTO_LINEAS_INDEXES = [
+    ("IDX_PRESUPUESTO_LINEAS_PRESUPUESTO", "PRESUPUESTO_LINEAS", ("PRESUPUESTO", "ID")),
+]
+
+
+def _create_indexes(cursor, indexes):
+    for name, table, columns in indexes:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+
+def _drop_indexes(cursor, names):
+    """Retira índices que otros nuevos (con esas columnas como prefijo) hacen innecesarios."""
+    for name in names:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _migration_002_indices(cursor):
+    """Índices sobre las claves ajenas y las columnas de fecha/estado."""
+    _create_indexes(cursor, INDEXES)
+
+
+def fts5_available(cursor):
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.FTS5_CHECK USING fts5(x)")
+        cursor.execute("DROP TABLE temp.FTS5_CHECK")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _create_faq_fts_triggers(cursor):
+    """Triggers que mantienen FAQ_FTS al día con los cambios de FAQ."""
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS FAQ_FTS_AI AFTER INSERT ON FAQ BEGIN
+            INSERT INTO FAQ_FTS (rowid, PREGUNTA, RESPUESTA)
+            VALUES (new.rowid, new.PREGUNTA, new.RESPUESTA);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS FAQ_FTS_AD AFTER DELETE ON FAQ BEGIN
+            INSERT INTO FAQ_FTS (FAQ_FTS, rowid, PREGUNTA, RESPUESTA)
+            VALUES ('delete', old.rowid, old.PREGUNTA, old.RESPUESTA);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS FAQ_FTS_AU AFTER UPDATE ON FAQ BEGIN
+            INSERT INTO FAQ_FTS (FAQ_FTS, rowid, PREGUNTA, RESPUESTA)
+            VALUES ('delete', old.rowid, old.PREGUNTA, old.RESPUESTA);
+            INSERT INTO FAQ_FTS (rowid, PREGUNTA, RESPUESTA)
+            VALUES (new.rowid, new.PREGUNTA, new.RESPUESTA);
+        END
+    """)
+
+
+def _migration_003_faq_fts(cursor):
+    """
+    Índice de texto completo sobre FAQ (PREGUNTA, RESPUESTA). Es una tabla
+    FTS5 de contenido externo: no duplica el texto, lo lee de FAQ por rowid,
+    y se mantiene sincronizada con triggers. remove_diacritics hace que
+    "como" encuentre "cómo". Si el SQLite instalado no trae FTS5 la búsqueda
+    sigue funcionando con LIKE.
+    """
+    if not fts5_available(cursor):
+        print("SQLite sin soporte FTS5: la búsqueda de FAQ usará LIKE.")
+        return
+
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS FAQ_FTS USING fts5(
+            PREGUNTA,
+            RESPUESTA,
+            content='FAQ',
+            content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    _create_faq_fts_triggers(cursor)
+    # Ranking por defecto (ORDER BY rank): la pregunta pesa más que la respuesta
+    cursor.execute("INSERT INTO FAQ_FTS (FAQ_FTS, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+    # Indexa las FAQ que ya existían
+    cursor.execute("INSERT INTO FAQ_FTS (FAQ_FTS) VALUES ('rebuild')")
+
+
+def _migration_004_indices_paginacion(cursor):
+    """
+    Índices (columna de orden, clave primaria) para la paginación por clave.
+    Los de fechas de PRESUPUESTOS y TAREAS con la clave sustituyen a los de
+    la 002, que eran su prefijo.
+    """
+    _create_indexes(cursor, PAGINATION_INDEXES)
+    _drop_indexes(cursor, ("IDX_PRESUPUESTOS_FECHA_EXPIRACION", "IDX_TAREAS_FECHA_VENCIMIENTO"))
+
+
+# Base de datos del registro: empresas, credenciales y catálogo TENANTS
+CATALOG_DB = "empresa.db"
+
+
+def is_catalog(db_name):
+    """Si db_name es el fichero del registro (se mira el nombre, no el contenido)."""
+    return os.path.basename(db_name) == CATALOG_DB
+
+
+def tenant_filename(nombre_empresa):
+    """
+    Fichero de base de datos de una empresa: su nombre sin caracteres raros
+    más ".db" (la misma regla que usaban el login y el registro).
+    """
+    safe_name = "".join(c for c in nombre_empresa if c.isalnum() or c in (" ", ".", "_")).rstrip()
+    return f"{safe_name}.db"
+
+
+def _create_tenants_table(cursor):
+    """
+    Crea, si no existe, el catálogo de empresas (empresa -> fichero de su
+    base de datos) y le añade las empresas de IDENTIFICACION que aún no tenga.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS TENANTS (
+            NOMBRE_EMPRESA TEXT PRIMARY KEY,
+            FICHERO TEXT NOT NULL
+        )
+    """)
+    cursor.execute("SELECT DISTINCT NOMBRE_EMPRESA FROM IDENTIFICACION")
+    cursor.executemany(
+        "INSERT OR IGNORE INTO TENANTS (NOMBRE_EMPRESA, FICHERO) VALUES (?, ?)",
+        [(nombre, tenant_filename(nombre)) for (nombre,) in cursor.fetchall()]
+    )
+
+
+def _migration_005_tenants(cursor, registry=False):
+    """
+    Catálogo de empresas, relleno con las empresas ya registradas. Sólo
+    existe en el registro (registry=True); las bases de datos de cada
+    empresa no lo tienen.
+    """
+    if registry:
+        _create_tenants_table(cursor)
+
+
+# Tablas con clave de texto pasadas a clave entera (migración 006). Para cada
+# una: columnas de la tabla nueva y expresión con la que se rellenan a partir
+# de la antigua. ID conserva el rowid que ya tenía cada fila (FAQ_FTS se
+# indexa por él). CLIENTE y PRESUPUESTO pasan a guardar el ID entero de la
+# fila a la que apuntan. Si el código no existía quedan a NULL, y el texto
+# original se guarda en CLIENTE_ORIGINAL / PRESUPUESTO_ORIGINAL para no
+# perderlo (las lecturas lo devuelven en su lugar, ver TABLE_COLUMNS).
+# CLIENTES, PRESUPUESTOS y OPORTUNIDADES llevan AUTOINCREMENT (como
+# PRODUCTOS): sin él SQLite reutiliza el ID más alto tras un borrado, y lo
+# que apuntaba a la fila borrada pasaría a apuntar a la nueva.
+def _orphan_code(column, table, code_column):
+    """El código de column si no corresponde a ninguna fila de table (si no, NULL)."""
+    return f"""CASE WHEN {column} IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM {table} X WHERE X.{code_column} = {column}) THEN {column} END"""
+
+
+_INTEGER_KEY_TABLES = [
+    ("CLIENTES", """
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        ID_CLIENTE TEXT NOT NULL UNIQUE,
+        NOMBRE TEXT NOT NULL,
+        DIRECCION TEXT NOT NULL,
+        TELEFONO TEXT NOT NULL,
+        PERSONA_CONTACTO TEXT NOT NULL,
+        EMAIL TEXT NOT NULL
+    """, """
+        rowid, ID_CLIENTE, NOMBRE, DIRECCION, TELEFONO, PERSONA_CONTACTO, EMAIL
+    """),
+    ("PRESUPUESTOS", """
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        ID_PRESUPUESTO TEXT NOT NULL UNIQUE,
+        NOMBRE TEXT NOT NULL,
+        CLIENTE INTEGER REFERENCES CLIENTES(ID),
+        FECHA_CREACION DATE NOT NULL,
+        FECHA_EXPIRACION DATE NOT NULL,
+        SUBTOTAL REAL NOT NULL,
+        TOTAL REAL NOT NULL,
+        CLIENTE_ORIGINAL TEXT
+    """, f"""
+        rowid, ID_PRESUPUESTO, NOMBRE,
+        (SELECT C.ID FROM CLIENTES C WHERE C.ID_CLIENTE = PRESUPUESTOS.CLIENTE),
+        FECHA_CREACION, FECHA_EXPIRACION, SUBTOTAL, TOTAL,
+        {_orphan_code("PRESUPUESTOS.CLIENTE", "CLIENTES", "ID_CLIENTE")}
+    """),
+    ("OPORTUNIDADES", """
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        ID_OPORTUNIDAD TEXT NOT NULL UNIQUE,
+        NOMBRE_OPORTUNIDAD TEXT NOT NULL,
+        CLIENTE INTEGER REFERENCES CLIENTES(ID),
+        FECHA DATE NOT NULL,
+        PRESUPUESTO INTEGER REFERENCES PRESUPUESTOS(ID),
+        INGRESO_ESPERADO REAL NOT NULL,
+        ESTADO TEXT NOT NULL,
+        CLIENTE_ORIGINAL TEXT,
+        PRESUPUESTO_ORIGINAL TEXT
+    """, f"""
+        rowid, ID_OPORTUNIDAD, NOMBRE_OPORTUNIDAD,
+        (SELECT C.ID FROM CLIENTES C WHERE C.ID_CLIENTE = OPORTUNIDADES.CLIENTE),
+        FECHA,
+        (SELECT P.ID FROM PRESUPUESTOS P WHERE P.ID_PRESUPUESTO = OPORTUNIDADES.PRESUPUESTO),
+        INGRESO_ESPERADO, ESTADO,
+        {_orphan_code("OPORTUNIDADES.CLIENTE", "CLIENTES", "ID_CLIENTE")},
+        {_orphan_code("OPORTUNIDADES.PRESUPUESTO", "PRESUPUESTOS", "ID_PRESUPUESTO")}
+    """),
+    ("TAREAS", """
+        ID INTEGER PRIMARY KEY,
+        ID_TAREA TEXT NOT NULL UNIQUE,
+        TITULO TEXT NOT NULL,
+        DESCRIPCION TEXT,
+        FECHA_CREACION DATE NOT NULL,
+        FECHA_VENCIMIENTO DATE,
+        ASIGNADO_A TEXT,
+        PRIORIDAD TEXT,
+        ESTADO TEXT
+    """, """
+        rowid, ID_TAREA, TITULO, DESCRIPCION, FECHA_CREACION, FECHA_VENCIMIENTO,
+        ASIGNADO_A, PRIORIDAD, ESTADO
+    """),
+    ("EVENTOS", """
+        ID INTEGER PRIMARY KEY,
+        ID_EVENTO TEXT NOT NULL UNIQUE,
+        TITULO TEXT NOT NULL,
+        FECHA DATE NOT NULL,
+        HORA TEXT NOT NULL,
+        LUGAR TEXT,
+        DESCRIPCION TEXT,
+        ASIGNADO_A TEXT
+    """, """
+        rowid, ID_EVENTO, TITULO, FECHA, HORA, LUGAR, DESCRIPCION, ASIGNADO_A
+    """),
+    ("FAQ", """
+        ID INTEGER PRIMARY KEY,
+        ID_FAQ TEXT NOT NULL UNIQUE,
+        PREGUNTA TEXT NOT NULL,
+        RESPUESTA TEXT NOT NULL,
+        CATEGORIA TEXT,
+        ULTIMA_ACTUALIZACION DATE
+    """, """
+        rowid, ID_FAQ, PREGUNTA, RESPUESTA, CATEGORIA, ULTIMA_ACTUALIZACION
+    """),
+]
+
+
+def _rebuild_tables(cursor, tables):
+    """
+    Reconstruye cada tabla (crear nueva, copiar, borrar, renombrar) a partir
+    de tuplas (tabla, columnas nuevas, expresión SELECT sobre la antigua).
+    Los índices de la tabla antigua se vuelven a crear tal cual sobre la
+    nueva, y su contador AUTOINCREMENT se conserva (para no reutilizar IDs
+    de filas borradas). Los triggers se retiran mientras tanto y se vuelven
+    a crear al final: los que nombran una tabla ya borrada impiden el RENAME.
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger'")
+    triggers = [sql for (sql,) in cursor.fetchall()]
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP TRIGGER {name}")
+
+    for table, columns, values in tables:
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,)
+        )
+        indexes = [sql for (sql,) in cursor.fetchall()]
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+        sequence = cursor.fetchone()
+        cursor.execute(f"CREATE TABLE {table}_NUEVA ({columns})")
+        cursor.execute(f"INSERT INTO {table}_NUEVA SELECT {values} FROM {table}")
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_NUEVA RENAME TO {table}")
+        for sql in indexes:
+            cursor.execute(sql)
+        if sequence is not None:
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, sequence[0]))
+
+    for sql in triggers:
+        cursor.execute(sql)
+
+
+# Claves ajenas sin índice propio, que recorren los triggers de borrado de la
+# migración 006 (CLIENTE ya lo tienen OPORTUNIDADES y PRESUPUESTOS)
+REFERENCE_INDEXES = [
+    ("IDX_OPORTUNIDADES_PRESUPUESTO", "OPORTUNIDADES", ("PRESUPUESTO",)),
+]
+
+
+def _migration_006_claves_enteras(cursor):
+    """
+    Clave primaria INTEGER (alias del rowid) en las tablas que usaban códigos
+    de texto; el código sigue como columna UNIQUE. Las claves ajenas CLIENTE y
+    PRESUPUESTO pasan a ser enteras, así que los JOIN van directos por rowid
+    y sus índices guardan enteros en lugar de textos.
+    Cada tabla se reconstruye (crear nueva, copiar, borrar, renombrar) en el
+    orden de _INTEGER_KEY_TABLES: primero las tablas a las que se apunta.
+    Al borrar un cliente o un presupuesto, lo que apuntaba a él se queda sin
+    ID y conserva su código en *_ORIGINAL, como antes de esta migración.
+    """
+    _rebuild_tables(cursor, _INTEGER_KEY_TABLES)
+
+    _create_indexes(cursor, REFERENCE_INDEXES)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS CLIENTES_AD_REFERENCIAS AFTER DELETE ON CLIENTES BEGIN
+            UPDATE OPORTUNIDADES SET CLIENTE = NULL, CLIENTE_ORIGINAL = old.ID_CLIENTE WHERE CLIENTE = old.ID;
+            UPDATE PRESUPUESTOS SET CLIENTE = NULL, CLIENTE_ORIGINAL = old.ID_CLIENTE WHERE CLIENTE = old.ID;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS PRESUPUESTOS_AD_REFERENCIAS AFTER DELETE ON PRESUPUESTOS BEGIN
+            UPDATE OPORTUNIDADES SET PRESUPUESTO = NULL, PRESUPUESTO_ORIGINAL = old.ID_PRESUPUESTO
+            WHERE PRESUPUESTO = old.ID;
+        END
+    """)
+
+
+# Columnas de fecha que pasan a días desde 1970-01-01 (migración 007)
+_DATE_COLUMNS = [
+    ("OPORTUNIDADES", "FECHA"),
+    ("PRESUPUESTOS", "FECHA_CREACION"),
+    ("PRESUPUESTOS", "FECHA_EXPIRACION"),
+    ("TAREAS", "FECHA_CREACION"),
+    ("TAREAS", "FECHA_VENCIMIENTO"),
+]
+
+
+def _migration_007_fechas_enteras(cursor):
+    """
+    Fechas como días desde 1970-01-01 y horas como minutos desde medianoche
+    (ver sql_dates). Las columnas DATE tienen afinidad NUMERIC, así que basta
+    con actualizarlas; EVENTOS se reconstruye porque HORA era TEXT. Los
+    textos que no son una fecha válida se dejan como estaban.
+    """
+    for table, column in _DATE_COLUMNS:
+        cursor.execute(f"""
+            UPDATE {table}
+            SET {column} = COALESCE(CAST(julianday({column}) - {EPOCH_JULIAN_DAY} AS INTEGER), {column})
+            WHERE typeof({column}) = 'text'
+        """)
+
+    _rebuild_tables(cursor, [("EVENTOS", """
+        ID INTEGER PRIMARY KEY,
+        ID_EVENTO TEXT NOT NULL UNIQUE,
+        TITULO TEXT NOT NULL,
+        FECHA INTEGER NOT NULL,
+        HORA INTEGER NOT NULL,
+        LUGAR TEXT,
+        DESCRIPCION TEXT,
+        ASIGNADO_A TEXT
+    """, f"""
+        ID, ID_EVENTO, TITULO,
+        COALESCE(CAST(julianday(FECHA) - {EPOCH_JULIAN_DAY} AS INTEGER), FECHA),
+        COALESCE(CAST(ROUND((julianday('2000-01-01 ' || HORA) - julianday('2000-01-01')) * 1440) AS INTEGER), HORA),
+        LUGAR, DESCRIPCION, ASIGNADO_A
+    """)])
+
+
+# Tablas con importes pasados a céntimos enteros (migración 008), con el
+# mismo formato que _INTEGER_KEY_TABLES.
+_MONEY_TABLES = [
+    ("PRESUPUESTOS", f"""
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        ID_PRESUPUESTO TEXT NOT NULL UNIQUE,
+        NOMBRE TEXT NOT NULL,
+        CLIENTE INTEGER REFERENCES CLIENTES(ID),
+        FECHA_CREACION DATE NOT NULL,
+        FECHA_EXPIRACION DATE NOT NULL,
+        SUBTOTAL INTEGER NOT NULL,
+        TOTAL INTEGER NOT NULL,
+        MONEDA TEXT NOT NULL DEFAULT '{DEFAULT_CURRENCY}',
+        CLIENTE_ORIGINAL TEXT
+    """, f"""
+        ID, ID_PRESUPUESTO, NOMBRE, CLIENTE, FECHA_CREACION, FECHA_EXPIRACION,
+        CAST(ROUND(SUBTOTAL * 100) AS INTEGER), CAST(ROUND(TOTAL * 100) AS INTEGER),
+        '{DEFAULT_CURRENCY}', CLIENTE_ORIGINAL
+    """),
+    ("OPORTUNIDADES", f"""
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        ID_OPORTUNIDAD TEXT NOT NULL UNIQUE,
+        NOMBRE_OPORTUNIDAD TEXT NOT NULL,
+        CLIENTE INTEGER REFERENCES CLIENTES(ID),
+        FECHA DATE NOT NULL,
+        PRESUPUESTO INTEGER REFERENCES PRESUPUESTOS(ID),
+        INGRESO_ESPERADO INTEGER NOT NULL,
+        ESTADO TEXT NOT NULL,
+        MONEDA TEXT NOT NULL DEFAULT '{DEFAULT_CURRENCY}',
+        CLIENTE_ORIGINAL TEXT,
+        PRESUPUESTO_ORIGINAL TEXT
+    """, f"""
+        ID, ID_OPORTUNIDAD, NOMBRE_OPORTUNIDAD, CLIENTE, FECHA, PRESUPUESTO,
+        CAST(ROUND(INGRESO_ESPERADO * 100) AS INTEGER), ESTADO, '{DEFAULT_CURRENCY}',
+        CLIENTE_ORIGINAL, PRESUPUESTO_ORIGINAL
+    """),
+    ("PRODUCTOS", f"""
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        proveedor TEXT NOT NULL,
+        nombre TEXT NOT NULL,
+        descripcion TEXT NOT NULL,
+        iva INTEGER NOT NULL,
+        precio INTEGER NOT NULL,
+        stock INTEGER NOT NULL,
+        moneda TEXT NOT NULL DEFAULT '{DEFAULT_CURRENCY}'
+    """, f"""
+        id, proveedor, nombre, descripcion, iva,
+        CAST(ROUND(precio * 100) AS INTEGER), stock, '{DEFAULT_CURRENCY}'
+    """),
+]
+
+
+def _migration_008_importes_en_centimos(cursor):
+    """
+    Importes como céntimos enteros más una columna de moneda (ver sql_money).
+    Todo lo que había se da por euros. Los índices de OPORTUNIDADES por etapa
+    y por cliente pasan a incluir moneda e importe (MONEY_INDEXES) para sumar
+    sin leer la tabla.
+    """
+    _rebuild_tables(cursor, _MONEY_TABLES)
+    _create_indexes(cursor, MONEY_INDEXES)
+    _drop_indexes(cursor, ("IDX_OPORTUNIDADES_CLIENTE", "IDX_OPORTUNIDADES_ESTADO"))
+
+
+def _migration_009_perfil_unico(cursor):
+    """
+    Un único PERFIL por empresa (índice UNIQUE sobre NOMBRE_EMPRESA), para
+    poder guardarlo con INSERT ... ON CONFLICT. Si había varios se conserva
+    el último que se guardó (el de mayor ID).
+    """
+    cursor.execute("""
+        DELETE FROM PERFIL
+        WHERE ID NOT IN (SELECT MAX(ID) FROM PERFIL GROUP BY NOMBRE_EMPRESA)
+    """)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS IDX_PERFIL_EMPRESA ON PERFIL (NOMBRE_EMPRESA)")
+
+
+def _linea_delta(row, sign):
+    """
+    UPDATE que suma (sign "+") o resta (sign "-") la línea row ("new" u "old")
+    a los totales de su presupuesto. Al sumar la primera línea de un
+    presupuesto se descartan los importes escritos a mano: desde ese momento
+    SUBTOTAL y TOTAL son la suma de sus líneas.
+    """
+    if sign == "+":
+        first = f"""NOT EXISTS (SELECT 1 FROM PRESUPUESTO_LINEAS L
+                        WHERE L.PRESUPUESTO = {row}.PRESUPUESTO AND L.ID <> {row}.ID)"""
+        subtotal = f"CASE WHEN {first} THEN 0 ELSE SUBTOTAL END"
+        total = f"CASE WHEN {first} THEN 0 ELSE TOTAL END"
+    else:
+        subtotal, total = "SUBTOTAL", "TOTAL"
+    return f"""
+        UPDATE PRESUPUESTOS
+        SET SUBTOTAL = {subtotal} {sign} {line_base(row)},
+            TOTAL = {total} {sign} {line_total(row)}
+        WHERE ID = {row}.PRESUPUESTO;
+    """
+
+
+def _create_presupuesto_lineas_triggers(cursor):
+    """
+    Triggers que llevan a SUBTOTAL y TOTAL de PRESUPUESTOS el cambio de cada
+    línea (se resta la antigua y se suma la nueva), sin volver a recorrer las
+    líneas: el coste no depende de cuántas tenga el presupuesto.
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS PRESUPUESTO_LINEAS_AI AFTER INSERT ON PRESUPUESTO_LINEAS BEGIN
+            {_linea_delta("new", "+")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS PRESUPUESTO_LINEAS_AD AFTER DELETE ON PRESUPUESTO_LINEAS BEGIN
+            {_linea_delta("old", "-")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS PRESUPUESTO_LINEAS_AU
+        AFTER UPDATE OF PRESUPUESTO, CANTIDAD, PRECIO, IVA ON PRESUPUESTO_LINEAS BEGIN
+            {_linea_delta("old", "-")}
+            {_linea_delta("new", "+")}
+        END
+    """)
+    # Las líneas de un presupuesto borrado se borran con él
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS PRESUPUESTOS_AD_LINEAS AFTER DELETE ON PRESUPUESTOS BEGIN
+            DELETE FROM PRESUPUESTO_LINEAS WHERE PRESUPUESTO = old.ID;
+        END
+    """)
+
+
+def _migration_010_lineas_presupuesto(cursor):
+    """
+    Líneas de presupuesto: producto, cantidad, precio unitario (céntimos) e
+    IVA (%). Precio, IVA y descripción se copian del producto al añadir la
+    línea, para que el presupuesto no cambie si luego cambia el producto.
+    Los presupuestos que ya existían no tienen líneas y conservan sus
+    importes escritos a mano.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS PRESUPUESTO_LINEAS (
+            ID INTEGER PRIMARY KEY,
+            PRESUPUESTO INTEGER NOT NULL REFERENCES PRESUPUESTOS(ID),
+            PRODUCTO INTEGER REFERENCES PRODUCTOS(id),
+            DESCRIPCION TEXT NOT NULL,
+            CANTIDAD INTEGER NOT NULL CHECK (CANTIDAD > 0),
+            PRECIO INTEGER NOT NULL,
+            IVA INTEGER NOT NULL
+        )
+    """)
+    _create_indexes(cursor, PRESUPUESTO_LINEAS_INDEXES)
+    _create_presupuesto_lineas_triggers(cursor)
+
+
+def _migration_011_resumenes(cursor):
+    """
+    Tablas de resumen para los KPIs (ver summaries.py): valor del pipeline
+    por etapa, tareas abiertas por persona y valor del inventario por
+    proveedor. Se rellenan una vez con lo que ya hay y desde ahí las
+    mantienen los triggers.
+    """
+    create_summary_tables(cursor)
+    rebuild_summaries(cursor)
+    create_summary_triggers(cursor)
+
+
+def _migration_012_registro_mantenimiento(cursor):
+    """
+    Registro de las tareas de mantenimiento (ver maintenance.py): cuándo
+    empezó cada una (segundos Unix), qué hizo y cuánto tardó.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS MANTENIMIENTO (
+            ID INTEGER PRIMARY KEY,
+            INICIO INTEGER NOT NULL,
+            TAREA TEXT NOT NULL,
+            DETALLE TEXT,
+            MILISEGUNDOS INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS IDX_MANTENIMIENTO_TAREA ON MANTENIMIENTO (TAREA, INICIO)")
+
+
+# Lista ordenada de migraciones: la posición N (empezando en 1) deja la base
+# de datos en user_version = N. Nunca se modifica una migración ya publicada;
+# los cambios de esquema se añaden siempre al final.
+MIGRATIONS = [
+    _migration_001_esquema_base,
+    _migration_002_indices,
+    _migration_003_faq_fts,
+    _migration_004_indices_paginacion,
+    _migration_005_tenants,
+    _migration_006_claves_enteras,
+    _migration_007_fechas_enteras,
+    _migration_008_importes_en_centimos,
+    _migration_009_perfil_unico,
+    _migration_010_lineas_presupuesto,
+    _migration_011_resumenes,
+    _migration_012_registro_mantenimiento,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(connection):
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(connection, registry=False):
+    """
+    Lleva la base de datos a SCHEMA_VERSION. Si ya está al día sólo cuesta
+    leer PRAGMA user_version. registry indica si es la base de datos del
+    registro (ver is_catalog). Devuelve la versión final del esquema.
+    """
+    version = get_schema_version(connection)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    print(f"Actualizando el esquema de la versión {version} a la {SCHEMA_VERSION}...")
+    cursor = connection.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            # Sólo la 005 (TENANTS) distingue el registro de las empresas
+            if migration is _migration_005_tenants:
+                migration(cursor, registry=registry)
+            else:
+                migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {number}")
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    print("Esquema actualizado correctamente.")
+    return SCHEMA_VERSION
@@ -0,0 +1,287 @@
+import atexit
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+# ======================================
+#  Instrumentación de consultas
+# ======================================
+# Opcional: DatabaseManager.enable_instrumentation() cambia sus cursores por
+# InstrumentedCursor, que mide cada sentencia (execute + lectura de filas) y
+# la anota en un QueryStats (el código que usa sqlite3 directamente, como
+# maintenance.py, abre su conexión con connect_instrumented):
+#   - histograma de latencias por sentencia (SQL con los espacios normalizados),
+#   - contador y tiempo total por método que la lanza (la vista o servicio que
+#     llama a DatabaseManager, p. ej. "ClientesView.load_clients"),
+#   - registro de consultas lentas con su EXPLAIN QUERY PLAN.
+# Con la variable de entorno CRM_QUERY_STATS=<fichero.json> todas las
+# conexiones del proceso se instrumentan y el resultado se escribe en ese
+# fichero al salir.
+
+STATS_ENV = "CRM_QUERY_STATS"
+SLOW_QUERY_MS = 50
+
+# Límites superiores (ms) de cada cubeta del histograma; la última es "más de"
+HISTOGRAM_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+# Ficheros cuyas llamadas no cuentan como "quién lanza la consulta"
+_INTERNAL_FILES = ("database_manager.py", "query_stats.py", "entity_cache.py", "contextlib.py")
+
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def normalize_sql(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def find_caller(depth=2):
+    """'Clase.método' (o 'módulo.función') del primer marco fuera de la capa de datos."""
+    frame = sys._getframe(depth)
+    while frame is not None:
+        filename = os.path.basename(frame.f_code.co_filename)
+        if filename not in _INTERNAL_FILES:
+            owner = frame.f_locals.get("self")
+            if owner is not None:
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            return f"{os.path.splitext(filename)[0]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "desconocido"
+
+
+class QueryStats:
+    """Acumula las mediciones de uno o varios DatabaseManager (es thread-safe)."""
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, max_slow=200):
+        self.slow_ms = slow_ms
+        self.statements = {}  # sql -> {"count", "total_ms", "max_ms", "errors", "histogram"}
+        self.callers = {}     # caller -> {"count", "total_ms"}
+        self.slow_queries = deque(maxlen=max_slow)
+        self._lock = threading.Lock()
+
+    def record(self, sql, elapsed_ms, caller, error=False, plan=None):
+        key = normalize_sql(sql)
+        bucket = next(
+            (i for i, limit in enumerate(HISTOGRAM_BUCKETS_MS) if elapsed_ms <= limit),
+            len(HISTOGRAM_BUCKETS_MS)
+        )
+        with self._lock:
+            stat = self.statements.get(key)
+            if stat is None:
+                stat = self.statements[key] = {
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0,
+                    "histogram": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1),
+                }
+            stat["count"] += 1
+            stat["total_ms"] += elapsed_ms
+            stat["max_ms"] = max(stat["max_ms"], elapsed_ms)
+            stat["errors"] += error
+            stat["histogram"][bucket] += 1
+
+            by_caller = self.callers.setdefault(caller, {"count": 0, "total_ms": 0.0})
+            by_caller["count"] += 1
+            by_caller["total_ms"] += elapsed_ms
+
+            if plan is not None:
+                self.slow_queries.append({
+                    "sql": key, "ms": round(elapsed_ms, 3), "caller": caller, "plan": plan,
+                })
+
+    def is_slow(self, elapsed_ms):
+        return self.slow_ms is not None and elapsed_ms >= self.slow_ms
+
+    def to_dict(self):
+        with self._lock:
+            statements = {
+                sql: dict(stat, mean_ms=stat["total_ms"] / stat["count"], histogram=list(stat["histogram"]))
+                for sql, stat in self.statements.items()
+            }
+            return {
+                "slow_ms": self.slow_ms,
+                "histogram_buckets_ms": list(HISTOGRAM_BUCKETS_MS) + ["inf"],
+                "statements": dict(sorted(statements.items(), key=lambda item: -item[1]["total_ms"])),
+                "callers": dict(sorted(self.callers.items(), key=lambda item: -item[1]["total_ms"])),
+                "slow_queries": list(self.slow_queries),
+            }
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.callers.clear()
+            self.slow_queries.clear()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor que mide cada sentencia. El tiempo de un SELECT incluye la lectura
+    de filas: la medición se cierra al hacer fetchall/fetchone, al agotar
+    fetchmany o al lanzar la siguiente sentencia.
+    """
+    stats = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._current = None  # [sql, parámetros, ms acumulados, caller]
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        caller = find_caller()
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except Exception:
+            self.stats.record(sql, (time.perf_counter() - start) * 1000, caller, error=True)
+            raise
+        self._current = [sql, parameters, (time.perf_counter() - start) * 1000, caller]
+        if self.description is None:
+            # Sin filas que leer (INSERT, UPDATE, DDL...): la medición termina aquí
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        caller = find_caller()
+        start = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        except Exception:
+            self.stats.record(sql, (time.perf_counter() - start) * 1000, caller, error=True)
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        plan = None
+        if self.stats.is_slow(elapsed_ms):
+            # El plan depende de cada fila de parámetros; sólo se anota el tiempo
+            plan = []
+            print(f"Consulta lenta ({elapsed_ms:.1f} ms, executemany) desde {caller}: {normalize_sql(sql)}")
+        self.stats.record(sql, elapsed_ms, caller, plan=plan)
+        return self
+
+    def executescript(self, sql_script):
+        self._finish()
+        caller = find_caller()
+        start = time.perf_counter()
+        try:
+            super().executescript(sql_script)
+        except Exception:
+            self.stats.record(sql_script, (time.perf_counter() - start) * 1000, caller, error=True)
+            raise
+        # Varias sentencias: no hay un único plan que anotar
+        self.stats.record(sql_script, (time.perf_counter() - start) * 1000, caller)
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._add(start)
+        self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._add(start)
+        if len(rows) < (self.arraysize if size is None else size):
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._add(start)
+        self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def _add(self, start):
+        if self._current is not None:
+            self._current[2] += (time.perf_counter() - start) * 1000
+
+    def _finish(self):
+        if self._current is None:
+            return
+        sql, parameters, elapsed_ms, caller = self._current
+        self._current = None
+        plan = None
+        if self.stats.is_slow(elapsed_ms):
+            plan = self._explain(sql, parameters)
+            print(f"Consulta lenta ({elapsed_ms:.1f} ms) desde {caller}: {normalize_sql(sql)}")
+            for step in plan:
+                print(f"    {step}")
+        self.stats.record(sql, elapsed_ms, caller, plan=plan)
+
+    def _explain(self, sql, parameters):
+        if not normalize_sql(sql).upper().startswith(_EXPLAINABLE):
+            return []
+        try:
+            # Con un cursor normal el EXPLAIN no se mide (ni se anota como sentencia)
+            plan = sqlite3.Cursor(self.connection).execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+            return [row[3] for row in plan]
+        except sqlite3.Error as e:
+            return [f"(sin plan: {e})"]
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    Conexión cuyos cursores y atajos (execute, executemany, executescript)
+    son InstrumentedCursor, para el código que usa sqlite3 directamente en
+    lugar de un DatabaseManager (p. ej. maintenance.py):
+
+        connection = sqlite3.connect(path, factory=InstrumentedConnection)
+        connection.stats = stats
+    """
+    stats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        cursor = super().cursor(factory)
+        if isinstance(cursor, InstrumentedCursor):
+            cursor.stats = self.stats
+        return cursor
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def connect_instrumented(database, stats, **kwargs):
+    """sqlite3.connect que, con stats, mide todas las sentencias de la conexión."""
+    if stats is None:
+        return sqlite3.connect(database, **kwargs)
+    connection = sqlite3.connect(database, factory=InstrumentedConnection, **kwargs)
+    connection.stats = stats
+    return connection
+
+
+_shared_stats = None
+_shared_lock = threading.Lock()
+
+
+def shared_stats():
+    """
+    QueryStats común a todo el proceso cuando está definida CRM_QUERY_STATS
+    (None si no lo está). Se exporta a ese fichero al salir.
+    """
+    global _shared_stats
+    path = os.environ.get(STATS_ENV)
+    if not path:
+        return None
+    with _shared_lock:
+        if _shared_stats is None:
+            _shared_stats = QueryStats()
+            atexit.register(_shared_stats.export_json, path)
+    return _shared_stats
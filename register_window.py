@@ -14,6 +14,7 @@ from PyQt5.QtGui import (
 
 from rotatable_label import RotatableLabel
 from database_manager import DatabaseManager
+from tenant_registry import TenantRegistry
 from main_window import MainWindow
 
 class RegisterWindow(QWidget):
@@ -21,8 +22,7 @@ class RegisterWindow(QWidget):
         super().__init__()
         try:
             print("Inicializando RegisterWindow...")
-            self.db_manager = DatabaseManager("empresa.db")
-            self.db_manager.connect()
+            self.db_manager = DatabaseManager.get_instance("empresa.db")
 
             self.setWindowTitle("Registrar Empresa - DataNexus")
             self.setWindowIcon(QIcon("images/logoApp.png"))
@@ -511,13 +511,11 @@ class RegisterWindow(QWidget):
             self.show_message(f"Empresa {nombre_empresa} registrada exitosamente!", QMessageBox.Information)
             
             # CREAR LA BASE DE DATOS ESPECÍFICA DE LA EMPRESA
-            # Sanitizamos el nombre de la empresa para formar un nombre de archivo válido:
-            safe_company_name = "".join(c for c in nombre_empresa if c.isalnum() or c in (' ','.','_')).rstrip()
-            db_filename = f"{safe_company_name}.db"  # Por ejemplo, "Avantia.db"
-
-            # Creamos y conectamos el DatabaseManager para esta empresa
-            new_db_manager = DatabaseManager(db_filename)
-            new_db_manager.connect()
+            # Se da de alta en el catálogo (empresa -> fichero, p. ej. "Avantia.db")
+            # y se abre a través de él, lo que crea el fichero
+            tenants = TenantRegistry.get_instance()
+            tenants.register(nombre_empresa)
+            new_db_manager = tenants.open(nombre_empresa)
             
             new_db_manager.insert_empresa(nombre_empresa, mail, password)
             
@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+
+# ======================================
+#  Filas tipadas
+# ======================================
+# Alternativa opcional a las tuplas que devuelven las lecturas: una clase con
+# __slots__ por tabla, con los campos en el orden de TABLE_COLUMNS. No
+# guardan __dict__, así que ocupan lo mismo que una tupla del mismo tamaño
+# (bastante menos que sqlite3.Row) y además se accede por nombre:
+#
+#     for cliente in db_manager.get_all_clients(typed=True):
+#         print(cliente.nombre, cliente.email)
+#
+# Para no romper el código que ya indexa por posición también admiten
+# cliente[1], cliente[:6] y desempaquetado.
+
+
+class _Row:
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """Función para usar como cursor.row_factory."""
+        return cls(*row)
+
+    def __iter__(self):
+        for name in self.__slots__:
+            yield getattr(self, name)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        return getattr(self, self.__slots__[index])
+
+
+@dataclass(slots=True)
+class Cliente(_Row):
+    id_cliente: str
+    nombre: str
+    direccion: str
+    telefono: str
+    persona_contacto: str
+    email: str
+
+
+@dataclass(slots=True)
+class Oportunidad(_Row):
+    id_oportunidad: str
+    nombre_oportunidad: str
+    cliente: str
+    fecha: str
+    presupuesto: str
+    ingreso_esperado: float
+    estado: str
+
+
+@dataclass(slots=True)
+class Presupuesto(_Row):
+    id_presupuesto: str
+    nombre: str
+    cliente: str
+    fecha_creacion: str
+    fecha_expiracion: str
+    subtotal: float
+    total: float
+
+
+@dataclass(slots=True)
+class PresupuestoLinea(_Row):
+    id: int
+    presupuesto: str
+    producto: int
+    descripcion: str
+    cantidad: int
+    precio: float
+    iva: int
+    importe: float
+    total: float
+
+
+@dataclass(slots=True)
+class Producto(_Row):
+    id: int
+    proveedor: str
+    nombre: str
+    descripcion: str
+    iva: int
+    precio: float
+    stock: int
+
+
+@dataclass(slots=True)
+class Tarea(_Row):
+    id_tarea: str
+    titulo: str
+    descripcion: str
+    fecha_creacion: str
+    fecha_vencimiento: str
+    asignado_a: str
+    prioridad: str
+    estado: str
+
+
+@dataclass(slots=True)
+class Evento(_Row):
+    id_evento: str
+    titulo: str
+    fecha: str
+    hora: str
+    lugar: str
+    descripcion: str
+    asignado_a: str
+
+
+@dataclass(slots=True)
+class Faq(_Row):
+    id_faq: str
+    pregunta: str
+    respuesta: str
+    categoria: str
+    ultima_actualizacion: str
+
+
+ROW_TYPES = {
+    "CLIENTES": Cliente,
+    "OPORTUNIDADES": Oportunidad,
+    "PRESUPUESTOS": Presupuesto,
+    "PRESUPUESTO_LINEAS": PresupuestoLinea,
+    "PRODUCTOS": Producto,
+    "TAREAS": Tarea,
+    "EVENTOS": Evento,
+    "FAQ": Faq,
+}
@@ -0,0 +1,97 @@
+# services/backup_service.py
+
+import queue
+import threading
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+from backups import (
+    BACKUP_DIR, BACKUP_KEEP, BACKUP_PAGES_PER_STEP, BackupCancelled,
+    backup_database, last_snapshot_age
+)
+
+# Una copia al día basta para backup_if_due
+BACKUP_INTERVAL_SECONDS = 24 * 3600
+
+
+class _BackupWorker(QThread):
+    """
+    Hilo que hace, de una en una, las copias que le llegan por la cola.
+    backup_database abre sus propias conexiones, así que no comparte nada
+    con el DatabaseManager de la interfaz.
+    """
+    progress = pyqtSignal(str, int, int)  # db_name, páginas copiadas, total
+    backup_done = pyqtSignal(str, str)    # db_name, ruta de la copia
+    backup_failed = pyqtSignal(str, str)  # db_name, error
+
+    def __init__(self, dest_dir, pages, keep):
+        super().__init__()
+        self.dest_dir = dest_dir
+        self.pages = pages
+        self.keep = keep
+        self.jobs = queue.Queue()
+        self.stopping = threading.Event()
+
+    def run(self):
+        while True:
+            db_name = self.jobs.get()
+            if db_name is None or self.stopping.is_set():
+                break
+            try:
+                path = backup_database(
+                    db_name, self.dest_dir, pages=self.pages, keep=self.keep,
+                    progress=lambda copied, total: self.progress.emit(db_name, copied, total),
+                    cancelled=self.stopping.is_set
+                )
+                self.backup_done.emit(db_name, path)
+            except BackupCancelled:
+                break
+            except Exception as e:
+                self.backup_failed.emit(db_name, str(e))
+
+
+class BackupService(QObject):
+    """
+    Copias de seguridad en segundo plano (ver backups.py).
+
+        service = BackupService(self)
+        service.backup_done.connect(self.on_backup_done)
+        service.backup_if_due(db_manager.db_name)
+
+    Las señales llegan en el hilo de la interfaz. stop() cancela la copia en
+    curso (su fichero temporal se borra) y espera a que termine el hilo.
+    """
+    progress = pyqtSignal(str, int, int)
+    backup_done = pyqtSignal(str, str)
+    backup_failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None, dest_dir=BACKUP_DIR, pages=BACKUP_PAGES_PER_STEP, keep=BACKUP_KEEP):
+        super().__init__(parent)
+        self.dest_dir = dest_dir
+        self._worker = _BackupWorker(dest_dir, pages, keep)
+        self._worker.progress.connect(self.progress)
+        self._worker.backup_done.connect(self.backup_done)
+        self._worker.backup_failed.connect(self._on_failed)
+        self._worker.start()
+
+    def backup(self, db_name):
+        """Encola una copia de db_name."""
+        self._worker.jobs.put(db_name)
+
+    def backup_if_due(self, db_name, interval=BACKUP_INTERVAL_SECONDS):
+        """Encola una copia si la última tiene más de interval segundos. Devuelve si se encoló."""
+        age = last_snapshot_age(db_name, self.dest_dir)
+        if age is not None and age < interval:
+            return False
+        self.backup(db_name)
+        return True
+
+    def _on_failed(self, db_name, error):
+        print(f"Error en la copia de seguridad de {db_name}: {error}")
+        self.backup_failed.emit(db_name, error)
+
+    def stop(self):
+        """Cancela la copia en curso y las pendientes y termina el hilo."""
+        self._worker.stopping.set()
+        self._worker.jobs.put(None)
+        self._worker.wait()
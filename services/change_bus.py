@@ -0,0 +1,72 @@
+# services/change_bus.py
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class ChangeBus(QObject):
+    """
+    Reenvía como señal de Qt los avisos de cambios de un DatabaseManager.
+
+        bus = ChangeBus.instance(db_manager)
+        bus.table_changed.connect(self.on_table_changed)
+
+    Cada emisión lleva un ChangeEvent(table, operation, key) y sólo llega
+    después del commit. Las vistas se conectan a la señal en lugar de
+    volver a leer tablas enteras tras cada operación.
+    """
+    table_changed = pyqtSignal(object)  # ChangeEvent
+
+    _buses = {}  # id(db_manager) -> ChangeBus
+
+    @classmethod
+    def instance(cls, db_manager):
+        """Devuelve el bus asociado a db_manager, creándolo la primera vez."""
+        bus = cls._buses.get(id(db_manager))
+        if bus is None or bus.db_manager is not db_manager:
+            bus = cls(db_manager)
+            cls._buses[id(db_manager)] = bus
+        return bus
+
+    def __init__(self, db_manager):
+        super().__init__()
+        self.db_manager = db_manager
+        db_manager.subscribe(self._emit)
+
+    def _emit(self, change):
+        self.table_changed.emit(change)
+
+    def close(self):
+        """Deja de escuchar al DatabaseManager."""
+        self.db_manager.unsubscribe(self._emit)
+        if self._buses.get(id(self.db_manager)) is self:
+            del self._buses[id(self.db_manager)]
+
+
+def find_row(table_widget, key, column=0):
+    """Devuelve la fila de table_widget cuya columna `column` muestra key (o -1)."""
+    key = str(key)
+    for row in range(table_widget.rowCount()):
+        item = table_widget.item(row, column)
+        if item is not None and item.text() == key:
+            return row
+    return -1
+
+
+def apply_row_change(table_widget, change, fetch_row, fill_row):
+    """
+    Aplica a table_widget sólo la fila de un ChangeEvent con clave, como hace
+    el Pipeline: un borrado quita la fila, un alta la añade al final y una
+    modificación la reescribe en su sitio. fetch_row(key) lee el registro
+    (None si ya no existe) y fill_row(row, registro) pinta la fila.
+    Los cambios masivos (key None) los recarga la propia vista.
+    """
+    row = find_row(table_widget, change.key)
+    record = None if change.operation == "delete" else fetch_row(change.key)
+    if record is None:
+        if row >= 0:
+            table_widget.removeRow(row)
+        return
+    if row < 0:
+        row = table_widget.rowCount()
+        table_widget.insertRow(row)
+    fill_row(row, record)
@@ -0,0 +1,175 @@
+# services/maintenance_service.py
+
+import queue
+import threading
+
+from PyQt5.QtCore import QEvent, QObject, QThread, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+from maintenance import (
+    FINAL_TASK, MaintenanceCancelled, enable_incremental_vacuum, last_maintenance, needs_incremental_vacuum,
+    run_maintenance,
+)
+
+# Sin teclado ni ratón durante este tiempo se considera que el usuario no está
+IDLE_SECONDS = 120
+# En un rato libre se lanza si la última tanda tiene más de esto...
+IDLE_INTERVAL_SECONDS = 3600
+# ...y, aunque el usuario no pare, cuando tiene más de esto (se comprueba
+# cada SCHEDULE_CHECK_SECONDS)
+MAINTENANCE_INTERVAL_SECONDS = 6 * 3600
+SCHEDULE_CHECK_SECONDS = 15 * 60
+
+USER_EVENTS = (
+    QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.MouseMove, QEvent.Wheel,
+)
+
+
+class _MaintenanceWorker(QThread):
+    """
+    Hilo que ejecuta, de una en una, las tareas que le llegan por la cola:
+    tandas de mantenimiento o la conversión a vacuum incremental. Las dos
+    abren su propia conexión.
+    """
+    step_done = pyqtSignal(str, str, str, float)  # db_name, tarea, detalle, segundos
+    maintenance_done = pyqtSignal(str, int)       # db_name, tareas hechas
+    maintenance_failed = pyqtSignal(str, str)     # db_name, error
+
+    def __init__(self):
+        super().__init__()
+        self.jobs = queue.Queue()
+        self.stopping = threading.Event()
+        # Se activa cuando vuelve el usuario: la tanda en curso para entre pasos
+        self.interrupted = threading.Event()
+        self.running = False
+        self.interruptible = False
+
+    def cancelled(self):
+        return self.stopping.is_set() or self.interrupted.is_set()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None or self.stopping.is_set():
+                break
+            db_name, self.interruptible, convert = job
+            self.interrupted.clear()
+            self.running = True
+            try:
+                if convert:
+                    # El VACUUM no se puede parar a medias: si el usuario ya
+                    # ha vuelto se deja para el próximo rato libre
+                    if self.cancelled():
+                        raise MaintenanceCancelled(f"Conversión de {db_name} cancelada")
+                    self.step_done.emit(db_name, *enable_incremental_vacuum(db_name))
+                    self.maintenance_done.emit(db_name, 1)
+                    continue
+                done = run_maintenance(
+                    db_name,
+                    progress=lambda task, detail, seconds: self.step_done.emit(db_name, task, detail, seconds),
+                    cancelled=self.cancelled
+                )
+                self.maintenance_done.emit(db_name, len(done))
+            except MaintenanceCancelled:
+                print(f"Mantenimiento de {db_name} interrumpido; se retomará en el próximo rato libre")
+            except Exception as e:
+                self.maintenance_failed.emit(db_name, str(e))
+            finally:
+                self.running = False
+
+
+class MaintenanceService(QObject):
+    """
+    Mantenimiento de la base de datos en segundo plano (ver maintenance.py).
+
+        service = MaintenanceService(self)
+        service.watch(db_manager.db_name)
+
+    Se lanza cuando el usuario lleva IDLE_SECONDS sin tocar teclado ni ratón
+    (y se interrumpe entre pasos si vuelve) y, aunque no pare, cada
+    MAINTENANCE_INTERVAL_SECONDS; sus pasos son cortos, así que no frena la
+    interfaz. La conversión de una base de datos antigua a vacuum
+    incremental (un VACUUM completo, ver maintenance.py) sólo se hace en un
+    rato libre. stop() cancela la tanda en curso y espera a que termine el hilo.
+    """
+    step_done = pyqtSignal(str, str, str, float)
+    maintenance_done = pyqtSignal(str, int)
+    maintenance_failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None, idle_seconds=IDLE_SECONDS, interval=MAINTENANCE_INTERVAL_SECONDS):
+        super().__init__(parent)
+        self.interval = interval
+        self.db_names = []
+        self._worker = _MaintenanceWorker()
+        self._worker.step_done.connect(self.step_done)
+        self._worker.maintenance_done.connect(self.maintenance_done)
+        self._worker.maintenance_failed.connect(self._on_failed)
+        self._worker.start()
+
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(idle_seconds * 1000)
+        self._idle_timer.timeout.connect(self._on_idle)
+
+        self._schedule_timer = QTimer(self)
+        self._schedule_timer.setInterval(SCHEDULE_CHECK_SECONDS * 1000)
+        self._schedule_timer.timeout.connect(self._on_schedule)
+
+    def watch(self, db_name):
+        """Empieza a mantener db_name."""
+        if db_name in self.db_names:
+            return
+        self.db_names.append(db_name)
+        if len(self.db_names) == 1:
+            QApplication.instance().installEventFilter(self)
+            self._idle_timer.start()
+            self._schedule_timer.start()
+
+    def run_now(self, db_name, interruptible=False):
+        """
+        Encola una tanda de mantenimiento de db_name. Con interruptible=True
+        se para entre pasos en cuanto el usuario toca teclado o ratón.
+        """
+        self._worker.jobs.put((db_name, interruptible, False))
+
+    def run_if_due(self, db_name, interval=None, interruptible=False):
+        """
+        Encola una tanda si la última completa tiene más de interval segundos
+        (una interrumpida no cuenta). Devuelve si se encoló.
+        """
+        age = last_maintenance(db_name, FINAL_TASK)
+        if age is not None and age < (self.interval if interval is None else interval):
+            return False
+        self.run_now(db_name, interruptible)
+        return True
+
+    def eventFilter(self, obj, event):
+        if event.type() in USER_EVENTS:
+            self._idle_timer.start()
+            if self._worker.running and self._worker.interruptible:
+                self._worker.interrupted.set()
+        return False
+
+    def _on_idle(self):
+        for db_name in self.db_names:
+            if needs_incremental_vacuum(db_name):
+                self._worker.jobs.put((db_name, True, True))
+            self.run_if_due(db_name, interval=IDLE_INTERVAL_SECONDS, interruptible=True)
+
+    def _on_schedule(self):
+        for db_name in self.db_names:
+            self.run_if_due(db_name)
+
+    def _on_failed(self, db_name, error):
+        print(f"Error en el mantenimiento de {db_name}: {error}")
+        self.maintenance_failed.emit(db_name, error)
+
+    def stop(self):
+        """Cancela la tanda en curso y las pendientes y termina el hilo."""
+        self._idle_timer.stop()
+        self._schedule_timer.stop()
+        if self.db_names:
+            QApplication.instance().removeEventFilter(self)
+        self._worker.stopping.set()
+        self._worker.jobs.put(None)
+        self._worker.wait()
@@ -0,0 +1,110 @@
+# services/query_service.py
+
+import itertools
+import queue
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+from database_manager import DatabaseManager
+
+
+class _QueryWorker(QThread):
+    """
+    Hilo que abre su propia conexión (SQLite no permite compartir conexiones
+    entre hilos) y ejecuta, de una en una, las lecturas que le llegan por la cola.
+    La conexión es de sólo lectura, y cada lectura va en su propio snapshot(),
+    que vacía antes las cachés por ID: esta conexión no se entera de las
+    escrituras de la principal, así que no puede reutilizar filas leídas antes.
+    """
+    job_done = pyqtSignal(int, object, object)  # job_id, resultado, error
+
+    def __init__(self, db_name, profile):
+        super().__init__()
+        self.db_name = db_name
+        self.profile = profile
+        self.jobs = queue.Queue()
+        self.cancelled = set()
+
+    def run(self):
+        db_manager = DatabaseManager(self.db_name, self.profile, read_only=True)
+        db_manager.connect()
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                job_id, method_name, args = job
+                if job_id in self.cancelled:
+                    self.cancelled.discard(job_id)
+                    continue
+                try:
+                    with db_manager.snapshot():
+                        result = getattr(db_manager, method_name)(*args)
+                    self.job_done.emit(job_id, result, None)
+                except Exception as e:
+                    self.job_done.emit(job_id, None, e)
+        finally:
+            db_manager.close()
+
+
+class AsyncQueryService(QObject):
+    """
+    Ejecuta lecturas de DatabaseManager fuera del hilo de la interfaz.
+
+        service.submit("clientes", "get_all_clients", on_result=self.fill_table)
+
+    El resultado llega a on_result (u on_error) en el hilo de la interfaz.
+    Cada petición lleva una clave: si se pide otra con la misma clave antes de
+    que termine la anterior, la antigua se descarta y su resultado no se entrega.
+    Sólo admite lecturas (una escritura falla: la conexión del hilo es de
+    sólo lectura); las escrituras siguen pasando por el DatabaseManager
+    compartido de la vista.
+    """
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self._ids = itertools.count(1)
+        self._pending = {}  # job_id -> (clave, on_result, on_error)
+        self._latest = {}   # clave -> último job_id pedido
+        self._worker = _QueryWorker(db_manager.db_name, db_manager.profile)
+        self._worker.job_done.connect(self._on_job_done)
+        self._worker.start()
+
+    def submit(self, key, method_name, *args, on_result=None, on_error=None):
+        """Encola db_manager.<method_name>(*args). Devuelve el id del trabajo."""
+        self.cancel(key)
+        job_id = next(self._ids)
+        self._pending[job_id] = (key, on_result, on_error)
+        self._latest[key] = job_id
+        self._worker.jobs.put((job_id, method_name, args))
+        return job_id
+
+    def cancel(self, key):
+        """Descarta la petición pendiente con esa clave, si la hay."""
+        job_id = self._latest.pop(key, None)
+        if job_id is not None and self._pending.pop(job_id, None) is not None:
+            self._worker.cancelled.add(job_id)
+
+    def _on_job_done(self, job_id, result, error):
+        entry = self._pending.pop(job_id, None)
+        if entry is None:
+            # Petición cancelada o sustituida por otra más reciente
+            return
+        key, on_result, on_error = entry
+        if self._latest.get(key) == job_id:
+            del self._latest[key]
+
+        if error is not None:
+            if on_error:
+                on_error(error)
+            else:
+                print(f"Error en la consulta en segundo plano ({key}): {error}")
+        elif on_result:
+            on_result(result)
+
+    def stop(self):
+        """Termina el hilo de consultas y cierra su conexión."""
+        self._pending.clear()
+        self._latest.clear()
+        self._worker.jobs.put(None)
+        self._worker.wait()
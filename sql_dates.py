@@ -0,0 +1,39 @@
+# ======================================
+#  Fechas y horas como enteros
+# ======================================
+# Desde la migración 007 las fechas se guardan como días desde el 1970-01-01
+# (INTEGER) y la hora de los eventos como minutos desde medianoche. Así las
+# búsquedas por rango (mes del calendario, tareas vencidas, presupuestos que
+# caducan) son comparaciones de enteros sobre los índices.
+# Las vistas siguen trabajando con textos "yyyy-MM-dd" y "HH:mm": la
+# conversión se hace en el propio SQL con estos fragmentos.
+
+EPOCH_JULIAN_DAY = 2440587.5
+
+# Parámetro "yyyy-MM-dd" (o date/datetime) -> días desde 1970-01-01
+DAY_PARAM = f"CAST(julianday(?) - {EPOCH_JULIAN_DAY} AS INTEGER)"
+
+# Parámetro "HH:mm" -> minutos desde medianoche
+MINUTE_PARAM = "CAST(ROUND((julianday('2000-01-01 ' || ?) - julianday('2000-01-01')) * 1440) AS INTEGER)"
+
+
+def day_column(column, alias=None):
+    """
+    Expresión SELECT que devuelve la columna de días como "yyyy-MM-dd". Los
+    textos antiguos que la migración 007 no pudo convertir salen tal cual
+    (convertidos darían 1970-01-01).
+    """
+    return (f"CASE WHEN typeof({column}) = 'integer' THEN date({column} + {EPOCH_JULIAN_DAY}) "
+            f"ELSE {column} END AS {alias or column.split('.')[-1]}")
+
+
+def minute_column(column, alias=None):
+    """Expresión SELECT que devuelve la columna de minutos como "HH:mm" (o el texto sin convertir)."""
+    return (f"CASE WHEN typeof({column}) = 'integer' THEN strftime('%H:%M', {column} * 60, 'unixepoch') "
+            f"ELSE {column} END AS {alias or column.split('.')[-1]}")
+
+
+def date_param(value):
+    """Acepta date, datetime o texto ISO y lo deja como texto para DAY_PARAM."""
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+# ======================================
+#  Importes como céntimos enteros
+# ======================================
+# Desde la migración 008 los importes (INGRESO_ESPERADO, SUBTOTAL, TOTAL y el
+# precio de los productos) se guardan como céntimos (INTEGER) junto a una
+# columna MONEDA con el código ISO 4217. Las sumas se hacen en SQL sobre
+# enteros, así que son exactas aunque se sumen millones de filas.
+# Las vistas siguen leyendo y escribiendo euros con decimales: la conversión
+# se hace en el propio SQL con estos fragmentos, igual que en sql_dates.
+
+DEFAULT_CURRENCY = "EUR"
+
+# Parámetro en unidades (float, int o texto "12.34") -> céntimos
+CENTS_PARAM = "CAST(ROUND(? * 100) AS INTEGER)"
+
+
+def money_column(column, alias=None):
+    """Expresión SELECT que devuelve la columna de céntimos en unidades (float)."""
+    return f"{column} / 100.0 AS {alias or column.split('.')[-1]}"
+
+
+def line_base(alias):
+    """Base imponible en céntimos de una fila de PRESUPUESTO_LINEAS (alias de la tabla)."""
+    return f"({alias}.CANTIDAD * {alias}.PRECIO)"
+
+
+def line_total(alias):
+    """
+    Total con IVA en céntimos de una fila de PRESUPUESTO_LINEAS. La cuota de
+    IVA se redondea en cada línea, así que sumar y restar líneas una a una da
+    siempre lo mismo que volver a sumarlas todas.
+    """
+    base = line_base(alias)
+    return f"({base} + CAST(ROUND({base} * {alias}.IVA / 100.0) AS INTEGER))"
+
+
+def from_cents(cents):
+    """Céntimos -> Decimal exacto con dos decimales (None se queda en None)."""
+    return None if cents is None else Decimal(cents).scaleb(-2)
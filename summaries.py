@@ -0,0 +1,166 @@
+from collections import namedtuple
+
+# ======================================
+#  Tablas de resumen (KPIs)
+# ======================================
+# Agregados que se leen sin recorrer la tabla de origen: cada tabla RESUMEN_*
+# tiene una fila por grupo con su número de filas y sus sumas, y la mantienen
+# triggers que en cada INSERT/UPDATE/DELETE restan la fila antigua y suman la
+# nueva (igual que los totales de las líneas de presupuesto, migración 010).
+# Un grupo que se queda sin filas desaparece del resumen.
+# rebuild_summaries() las recalcula desde cero y summary_differences()
+# compara lo guardado con ese recálculo.
+# Ojo: una migración que reconstruya una tabla de origen (DROP + RENAME, como
+# _rebuild_tables) se lleva sus triggers; tiene que volver a llamar a
+# create_summary_triggers y a rebuild_summaries.
+
+# keys y measures: (columna del resumen, expresión sobre la fila {row}). La
+# primera medida es siempre el número de filas del grupo.
+# where: condición para que una fila cuente (None = todas).
+# columns: columnas de origen de las que depende (AFTER UPDATE OF).
+Summary = namedtuple("Summary", ["table", "source", "keys", "measures", "where", "columns"])
+
+# Estados de TAREAS que ya no cuentan como abiertas
+CLOSED_TASK_STATES = ("Completada",)
+
+SUMMARIES = [
+    # Valor del pipeline por etapa (céntimos)
+    Summary(
+        "RESUMEN_PIPELINE", "OPORTUNIDADES",
+        keys=(("ESTADO", "{row}.ESTADO"), ("MONEDA", "{row}.MONEDA")),
+        measures=(("OPORTUNIDADES", "1"), ("IMPORTE", "{row}.INGRESO_ESPERADO")),
+        where=None,
+        columns=("ESTADO", "MONEDA", "INGRESO_ESPERADO"),
+    ),
+    # Tareas abiertas por persona ('' = sin asignar)
+    Summary(
+        "RESUMEN_TAREAS_ABIERTAS", "TAREAS",
+        keys=(("ASIGNADO_A", "COALESCE({row}.ASIGNADO_A, '')"),),
+        measures=(("TAREAS", "1"),),
+        where="COALESCE({row}.ESTADO, '') NOT IN (%s)" % ", ".join(f"'{s}'" for s in CLOSED_TASK_STATES),
+        columns=("ASIGNADO_A", "ESTADO"),
+    ),
+    # Valor del inventario por proveedor: precio (céntimos) * stock
+    Summary(
+        "RESUMEN_INVENTARIO", "PRODUCTOS",
+        keys=(("PROVEEDOR", "{row}.proveedor"), ("MONEDA", "{row}.moneda")),
+        measures=(("PRODUCTOS", "1"), ("UNIDADES", "{row}.stock"), ("VALOR", "{row}.precio * {row}.stock")),
+        where=None,
+        columns=("proveedor", "moneda", "precio", "stock"),
+    ),
+]
+
+
+def _expressions(pairs, row):
+    return [expression.format(row=row) for _, expression in pairs]
+
+
+def _names(pairs):
+    return [name for name, _ in pairs]
+
+
+def _where(summary, row):
+    return summary.where.format(row=row) if summary.where else "1"
+
+
+def create_summary_tables(cursor):
+    for summary in SUMMARIES:
+        columns = [f"{name} TEXT NOT NULL" for name in _names(summary.keys)]
+        columns += [f"{name} INTEGER NOT NULL" for name in _names(summary.measures)]
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {summary.table} (
+                {", ".join(columns)},
+                PRIMARY KEY ({", ".join(_names(summary.keys))})
+            ) WITHOUT ROWID
+        """)
+
+
+def _add(summary, row):
+    """Suma la fila row ("new") a su grupo, creándolo si no existe."""
+    keys, measures = _names(summary.keys), _names(summary.measures)
+    values = _expressions(summary.keys, row) + _expressions(summary.measures, row)
+    updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in measures)
+    # El WHERE es obligatorio: sin él SQLite no distingue el ON CONFLICT de un JOIN
+    return f"""
+        INSERT INTO {summary.table} ({", ".join(keys + measures)})
+        SELECT {", ".join(values)} WHERE {_where(summary, row)}
+        ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {updates};
+    """
+
+
+def _subtract(summary, row):
+    """Resta la fila row ("old") de su grupo y borra el grupo si se queda vacío."""
+    match = " AND ".join(
+        f"{name} = {value}" for name, value in zip(_names(summary.keys), _expressions(summary.keys, row))
+    )
+    updates = ", ".join(
+        f"{name} = {name} - {value}"
+        for name, value in zip(_names(summary.measures), _expressions(summary.measures, row))
+    )
+    count = summary.measures[0][0]
+    return f"""
+        UPDATE {summary.table} SET {updates} WHERE {match} AND {_where(summary, row)};
+        DELETE FROM {summary.table} WHERE {match} AND {count} = 0;
+    """
+
+
+def create_summary_triggers(cursor):
+    for summary in SUMMARIES:
+        name, source = summary.table, summary.source
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name}_AI AFTER INSERT ON {source} BEGIN
+                {_add(summary, "new")}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name}_AD AFTER DELETE ON {source} BEGIN
+                {_subtract(summary, "old")}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name}_AU
+            AFTER UPDATE OF {", ".join(summary.columns)} ON {source} BEGIN
+                {_subtract(summary, "old")}
+                {_add(summary, "new")}
+            END
+        """)
+
+
+def aggregate_query(summary):
+    """SELECT que calcula el resumen desde cero recorriendo la tabla de origen."""
+    keys = _expressions(summary.keys, "R")
+    measures = [f"SUM({expression})" for expression in _expressions(summary.measures, "R")]
+    return f"""
+        SELECT {", ".join(keys + measures)}
+        FROM {summary.source} R
+        WHERE {_where(summary, "R")}
+        GROUP BY {", ".join(keys)}
+    """
+
+
+def rebuild_summaries(cursor, tables=None):
+    """Vacía y recalcula los resúmenes indicados (todos si tables es None)."""
+    for summary in SUMMARIES:
+        if tables is not None and summary.table not in tables:
+            continue
+        cursor.execute(f"DELETE FROM {summary.table}")
+        cursor.execute(f"INSERT INTO {summary.table} {aggregate_query(summary)}")
+
+
+def summary_differences(cursor):
+    """
+    Compara cada resumen con su recálculo completo. Devuelve
+    {tabla: (filas sólo en el resumen, filas sólo en el recálculo)} con las
+    tablas que no coinciden (vacío si todo cuadra).
+    """
+    differences = {}
+    for summary in SUMMARIES:
+        stored = f"SELECT * FROM {summary.table}"
+        fresh = aggregate_query(summary)
+        cursor.execute(f"{stored} EXCEPT {fresh}")
+        only_stored = cursor.fetchall()
+        cursor.execute(f"{fresh} EXCEPT {stored}")
+        only_fresh = cursor.fetchall()
+        if only_stored or only_fresh:
+            differences[summary.table] = (only_stored, only_fresh)
+    return differences
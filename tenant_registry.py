@@ -0,0 +1,103 @@
+from collections import OrderedDict
+
+from database_manager import DatabaseManager
+from migrations import CATALOG_DB, tenant_filename
+
+# ======================================
+#  Catálogo de empresas (tenants)
+# ======================================
+# empresa.db guarda en TENANTS qué fichero de base de datos corresponde a cada
+# empresa (sólo existe en ese fichero, ver migración 005). El login sólo abre
+# ficheros que estén en el catálogo, así que un nombre mal escrito se rechaza
+# sin tocar el disco (antes creaba una base de datos vacía). Las últimas
+# MAX_OPEN_TENANTS empresas abiertas se mantienen conectadas para que volver
+# a una de ellas no tenga que reabrir el fichero; al pasar de ahí se cierra la
+# usada hace más tiempo. Su DatabaseManager es el compartido de get_instance,
+# así que quien lo usa (la ventana principal) lo retiene con hold() hasta
+# release(): una empresa retenida no se cierra aunque sea la más antigua.
+
+MAX_OPEN_TENANTS = 8
+
+
+class TenantRegistry:
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Catálogo compartido, sobre el DatabaseManager de empresa.db."""
+        if cls._instance is None:
+            cls._instance = cls(DatabaseManager.get_instance(CATALOG_DB))
+        return cls._instance
+
+    def __init__(self, catalog, max_open=MAX_OPEN_TENANTS):
+        self.catalog = catalog
+        self.max_open = max_open
+        self._open = OrderedDict()  # nombre_empresa -> DatabaseManager, del menos al más reciente
+        self._holders = {}  # nombre_empresa -> cuántos lo retienen (hold sin release)
+
+    def register(self, nombre_empresa):
+        """Da de alta la empresa en el catálogo y devuelve el nombre de su fichero."""
+        fichero = tenant_filename(nombre_empresa)
+        self.catalog.insert_tenant(nombre_empresa, fichero)
+        return fichero
+
+    def resolve(self, nombre_empresa):
+        """Fichero de la empresa, o None si no está registrada."""
+        return self.catalog.get_tenant_file(nombre_empresa)
+
+    def open(self, nombre_empresa):
+        """
+        Devuelve el DatabaseManager de la empresa (o None si no está en el
+        catálogo). Una empresa ya abierta se devuelve sin consultar el catálogo.
+        """
+        manager = self._open.get(nombre_empresa)
+        if manager is not None and manager.connection is not None:
+            self._open.move_to_end(nombre_empresa)
+            return manager
+
+        fichero = self.resolve(nombre_empresa)
+        if fichero is None:
+            return None
+
+        manager = DatabaseManager.get_instance(fichero)
+        self._open[nombre_empresa] = manager
+        self._open.move_to_end(nombre_empresa)
+        self._evict()
+        return manager
+
+    def hold(self, nombre_empresa):
+        """Marca la empresa como en uso: no se cierra hasta el release() que le corresponde."""
+        self._holders[nombre_empresa] = self._holders.get(nombre_empresa, 0) + 1
+
+    def release(self, nombre_empresa):
+        """Deshace un hold(); si sobran empresas abiertas se cierran las que nadie retiene."""
+        count = self._holders.get(nombre_empresa, 0) - 1
+        if count > 0:
+            self._holders[nombre_empresa] = count
+        else:
+            self._holders.pop(nombre_empresa, None)
+        self._evict()
+
+    def _evict(self):
+        """
+        Cierra las empresas sin retener, de la menos a la más reciente, hasta
+        dejar max_open. La más reciente no se cierra nunca: es la que open()
+        acaba de devolver.
+        """
+        idle = [nombre for nombre in list(self._open)[:-1] if nombre not in self._holders]
+        for nombre in idle[:max(0, len(self._open) - self.max_open)]:
+            manager = self._open.pop(nombre)
+            if manager is not self.catalog:
+                manager.close()
+
+    def open_tenants(self):
+        """Empresas con conexión abierta, de la menos a la más reciente."""
+        return list(self._open)
+
+    def close_all(self):
+        """Cierra todas las empresas abiertas; sólo al salir de la aplicación."""
+        for manager in self._open.values():
+            if manager is not self.catalog:
+                manager.close()
+        self._open.clear()
+        self._holders.clear()
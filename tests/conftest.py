@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    """DatabaseManager sobre una base de datos nueva (ya migrada) en un directorio temporal."""
+    manager = DatabaseManager(str(tmp_path / "crm.db"))
+    manager.connect()
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def cliente(db):
+    db.insert_cliente("C1", "Cliente 1", "Calle 1", "600000000", "Contacto", "c1@correo.com")
+    return "C1"
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+import backups
+from backups import BackupError, backup_database, check_integrity, list_snapshots, rotate_snapshots
+
+
+def count_clientes(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM CLIENTES").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def fill(db, count, prefix="C"):
+    with db.transaction():
+        for i in range(count):
+            db.insert_cliente(f"{prefix}{i}", f"Cliente {i} " + "x" * 200, "Calle", "600000000", "Contacto", "c@correo.com")
+
+
+def test_la_copia_es_una_foto_fija_aunque_se_escriba_durante_la_copia(db, tmp_path):
+    fill(db, 300)
+    writes = []
+
+    def write_between_steps(copied, total):
+        # Escribe por otra conexión entre paso y paso de la copia
+        db.insert_cliente(f"N{len(writes)}", "Nuevo", "Calle", "600000000", "Contacto", "n@correo.com")
+        writes.append(copied)
+
+    path = backup_database(db.db_name, str(tmp_path / "backups"), pages=1, sleep=0,
+                           progress=write_between_steps)
+
+    assert len(writes) > 1
+    assert check_integrity(path) == []
+    assert count_clientes(path) == 300
+    assert count_clientes(db.db_name) == 300 + len(writes)
+
+
+def test_la_copia_pasa_integrity_check_con_otro_hilo_escribiendo(db, tmp_path):
+    fill(db, 300)
+    stop = threading.Event()
+    written = []
+
+    def writer():
+        connection = sqlite3.connect(db.db_name, timeout=5)
+        try:
+            while not stop.is_set():
+                connection.execute(
+                    "INSERT INTO CLIENTES (ID_CLIENTE, NOMBRE, DIRECCION, TELEFONO, PERSONA_CONTACTO, EMAIL) "
+                    "VALUES (?, 'Hilo', 'Calle', '600000000', 'Contacto', 'h@correo.com')",
+                    (f"H{len(written)}",),
+                )
+                connection.commit()
+                written.append(1)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        path = backup_database(db.db_name, str(tmp_path / "backups"), pages=1, sleep=0.001)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert written
+    assert check_integrity(path) == []
+    assert 300 <= count_clientes(path) <= 300 + len(written)
+
+
+def test_una_copia_corrupta_se_borra_y_lanza_error(db, tmp_path, monkeypatch):
+    fill(db, 10)
+    dest = str(tmp_path / "backups")
+    monkeypatch.setattr(backups, "check_integrity", lambda path: ["*** in database main ***"])
+
+    with pytest.raises(BackupError):
+        backup_database(db.db_name, dest, sleep=0)
+
+    assert os.listdir(backups.snapshot_dir(db.db_name, dest)) == []
+
+
+def test_la_rotacion_conserva_las_copias_mas_recientes(db, tmp_path):
+    dest = str(tmp_path / "backups")
+    paths = [backup_database(db.db_name, dest, sleep=0, keep=2) for _ in range(4)]
+
+    assert list_snapshots(db.db_name, dest) == paths[-2:]
+    assert rotate_snapshots(db.db_name, dest, keep=1) == paths[-2:-1]
+    assert list_snapshots(db.db_name, dest) == paths[-1:]
+
+
+def test_keep_menor_que_uno_se_rechaza_sin_copiar(db, tmp_path):
+    dest = str(tmp_path / "backups")
+    path = backup_database(db.db_name, dest, sleep=0)
+
+    with pytest.raises(ValueError):
+        rotate_snapshots(db.db_name, dest, keep=0)
+    with pytest.raises(ValueError):
+        backup_database(db.db_name, dest, sleep=0, keep=0)
+
+    assert list_snapshots(db.db_name, dest) == [path]
@@ -0,0 +1,43 @@
+import sqlite3
+
+import pytest
+
+
+def clientes(start, count):
+    return [(f"C{i:03d}", f"Cliente {i}", "Calle", "600000000", "Contacto", "c@correo.com")
+            for i in range(start, start + count)]
+
+
+def test_la_carga_se_hace_por_bloques(db):
+    # Un generador: no hace falta tener todas las filas en memoria
+    timings = db.bulk_insert_clientes((row for row in clientes(0, 23)), chunk_size=5)
+
+    assert [t["rows"] for t in timings] == [5, 5, 5, 5, 3]
+    assert all(t["seconds"] >= 0 for t in timings)
+    assert len(db.get_all_clients()) == 23
+    assert not db.connection.in_transaction
+
+
+def test_un_error_en_un_bloque_posterior_deshace_todos(db, cliente):
+    # La fila 8 repite un cliente que ya existe: falla el segundo bloque
+    rows = clientes(0, 8) + [(cliente, "Repetido", "Calle", "600000000", "Contacto", "c@correo.com")]
+    with pytest.raises(sqlite3.IntegrityError):
+        db.bulk_insert_clientes(rows, chunk_size=5)
+
+    assert [row[0] for row in db.get_all_clients()] == [cliente]
+    assert not db.connection.in_transaction
+
+
+def test_upsert_masivo_actualiza_y_da_de_alta(db, cliente):
+    timings = db.bulk_upsert_clientes(
+        [(cliente, "Actualizado", "Calle 1", "600000000", "Contacto", "c1@correo.com")] + clientes(0, 4),
+        chunk_size=2,
+    )
+
+    assert [t["rows"] for t in timings] == [2, 2, 1]
+    assert db.get_client_by_id(cliente)[1] == "Actualizado"
+    assert len(db.get_all_clients()) == 5
+
+
+def test_carga_vacia(db):
+    assert db.bulk_insert_clientes([], chunk_size=5) == []
@@ -0,0 +1,97 @@
+import pytest
+
+from database_manager import ChangeEvent
+
+
+@pytest.fixture
+def events(db):
+    received = []
+    db.subscribe(received.append)
+    yield received
+    db.unsubscribe(received.append)
+
+
+def insert(db, id_cliente):
+    db.insert_cliente(id_cliente, f"Cliente {id_cliente}", "Calle", "600000000", "Contacto", "c@correo.com")
+
+
+def test_los_avisos_llegan_tras_el_commit_exterior(db, events):
+    insert(db, "C1")
+    assert events == [ChangeEvent("CLIENTES", "insert", "C1")]
+    events.clear()
+
+    with db.transaction():
+        insert(db, "C2")
+        with db.transaction():
+            insert(db, "C3")
+        assert events == []
+    assert events == [ChangeEvent("CLIENTES", "insert", "C2"), ChangeEvent("CLIENTES", "insert", "C3")]
+
+
+def test_un_rollback_no_publica_nada(db, events):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            insert(db, "C1")
+            raise RuntimeError("se deshace")
+    assert events == []
+    assert db.get_client_by_id("C1") is None
+
+
+def test_un_savepoint_deshecho_no_publica_su_parte(db, events):
+    with db.transaction():
+        insert(db, "C1")
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                insert(db, "C2")
+                raise RuntimeError("se deshace")
+    assert events == [ChangeEvent("CLIENTES", "insert", "C1")]
+
+
+def test_una_carga_masiva_publica_un_solo_aviso(db, events):
+    db.bulk_insert_clientes(
+        [(f"C{i}", f"Cliente {i}", "Calle", "600000000", "Contacto", "c@correo.com") for i in range(10)],
+        chunk_size=3,
+    )
+    assert events == [ChangeEvent("CLIENTES", "bulk", None)]
+
+
+class FakeItem:
+    def __init__(self, text):
+        self._text = text
+
+    def text(self):
+        return self._text
+
+
+class FakeTable:
+    """Lo que usa apply_row_change de un QTableWidget: filas con la clave en la columna 0."""
+
+    def __init__(self, rows):
+        self.rows = [list(row) for row in rows]
+
+    def rowCount(self):
+        return len(self.rows)
+
+    def item(self, row, column):
+        return FakeItem(self.rows[row][column])
+
+    def insertRow(self, row):
+        self.rows.insert(row, [""])
+
+    def removeRow(self, row):
+        del self.rows[row]
+
+
+def test_apply_row_change_inserta_modifica_y_borra():
+    change_bus = pytest.importorskip("services.change_bus")
+    table = FakeTable([("C1", "Uno"), ("C2", "Dos")])
+    records = {"C1": ("C1", "Uno"), "C2": ("C2", "Dos bis"), "C3": ("C3", "Tres")}
+
+    def fill_row(row, record):
+        table.rows[row] = list(record)
+
+    change_bus.apply_row_change(table, ChangeEvent("CLIENTES", "insert", "C3"), records.get, fill_row)
+    change_bus.apply_row_change(table, ChangeEvent("CLIENTES", "update", "C2"), records.get, fill_row)
+    change_bus.apply_row_change(table, ChangeEvent("CLIENTES", "delete", "C1"), records.get, fill_row)
+
+    assert table.rows == [["C2", "Dos bis"], ["C3", "Tres"]]
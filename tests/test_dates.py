@@ -0,0 +1,13 @@
+def test_fecha_antigua_no_valida_se_muestra_tal_cual(db, cliente):
+    db.insert_presupuesto("P1", "Presupuesto 1", cliente, "2025-01-15", "2025-02-15", 100.0, 121.0)
+    db.insert_oportunidad("O1", "Oportunidad 1", cliente, "2025-01-20", "P1", 1000.0, "NUEVO")
+    # Como deja la migración 007 los textos que no son una fecha
+    db.connection.execute("UPDATE PRESUPUESTOS SET FECHA_EXPIRACION = 'fin de mes'")
+    db.connection.execute("UPDATE OPORTUNIDADES SET FECHA = '31/02/2024'")
+    db.connection.commit()
+    db.clear_caches()
+
+    presupuesto = db.get_presupuesto_by_id("P1")
+    assert presupuesto[3:5] == ("2025-01-15", "fin de mes")
+    assert db.get_oportunidad_detalle("O1")[3] == "31/02/2024"
+    assert [row[0] for row in db.get_ingresos_por_mes()] == [None]
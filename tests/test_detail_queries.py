@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.fixture
+def oportunidad(db, cliente):
+    db.insert_presupuesto("P1", "Presupuesto 1", cliente, "2025-01-01", "2025-02-01", 100, 121)
+    db.insert_oportunidad("O1", "Oportunidad 1", cliente, "2025-01-15", "P1", 1000, "NUEVO")
+    return "O1"
+
+
+def statements(db, function, *args):
+    executed = []
+    db.connection.set_trace_callback(executed.append)
+    try:
+        result = function(*args)
+    finally:
+        db.connection.set_trace_callback(None)
+    return result, executed
+
+
+def test_detalle_de_oportunidad_en_un_solo_select(db, oportunidad):
+    row, executed = statements(db, db.get_oportunidad_detalle, oportunidad)
+    assert row[0] == oportunidad
+    assert row[7:] == ("Cliente 1", "Presupuesto 1")
+    assert len(executed) == 1
+    assert executed[0].lstrip().upper().startswith("SELECT")
+
+
+def test_detalle_de_presupuesto_en_un_solo_select(db, oportunidad):
+    row, executed = statements(db, db.get_presupuesto_detalle, "P1")
+    assert row[0] == "P1" and row[7] == "Cliente 1"
+    assert len(executed) == 1
+
+
+def test_un_id_borrado_no_se_reutiliza(db, cliente):
+    db.insert_cliente("C2", "Bob", "Calle 2", "600000000", "Contacto", "c2@correo.com")
+    db.insert_oportunidad("O1", "Oportunidad 1", "C2", "2025-01-15", None, 1000, "NUEVO")
+    db.delete_cliente("C2")
+    db.insert_cliente("C3", "Carol", "Calle 3", "600000000", "Contacto", "c3@correo.com")
+
+    assert db.get_oportunidad_by_id("O1")[2] == "C2"
+    assert db.get_oportunidad_detalle("O1")[7] == "Desconocido"
+
+
+def test_un_codigo_sin_cliente_se_guarda_tal_cual(db, cliente):
+    db.insert_oportunidad("O1", "Oportunidad 1", "Seleccionar Cliente", "2025-01-15", None, 1000, "NUEVO")
+    assert db.get_oportunidad_by_id("O1")[2] == "Seleccionar Cliente"
+
+    db.update_oportunidad("O1", "Oportunidad 1", cliente, "2025-01-15", None, 1000, "NUEVO")
+    assert db.get_oportunidad_by_id("O1")[2] == cliente
+    assert db.connection.execute("SELECT CLIENTE_ORIGINAL FROM OPORTUNIDADES").fetchone()[0] is None
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+
+def nombre(db, id_cliente):
+    row = db.get_client_by_id(id_cliente)
+    return row[1] if row else None
+
+
+def test_la_segunda_lectura_sale_de_la_cache(db, cliente):
+    db.get_client_by_id(cliente)
+    db.get_client_by_id(cliente)
+    db.get_client_by_id("NO_EXISTE")
+    db.get_client_by_id("NO_EXISTE")
+
+    stats = db.cache_stats()["CLIENTES"]
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 2)
+
+
+def test_las_escrituras_invalidan_la_cache(db, cliente):
+    assert db.get_client_by_id("C2") is None
+    db.insert_cliente("C2", "Cliente 2", "Calle 2", "600000000", "Contacto", "c2@correo.com")
+    assert nombre(db, "C2") == "Cliente 2"
+
+    db.update_cliente(cliente, "Nuevo nombre", "Calle 1", "600000000", "Contacto", "c1@correo.com")
+    assert nombre(db, cliente) == "Nuevo nombre"
+
+    db.delete_cliente("C2")
+    assert db.get_client_by_id("C2") is None
+
+    db.bulk_insert_clientes([("C3", "Cliente 3", "Calle 3", "600000000", "Contacto", "c3@correo.com")])
+    db.bulk_upsert_clientes([(cliente, "Desde bulk", "Calle 1", "600000000", "Contacto", "c1@correo.com")])
+    assert nombre(db, "C3") == "Cliente 3"
+    assert nombre(db, cliente) == "Desde bulk"
+
+
+def test_un_rollback_vacia_la_cache(db, cliente):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.update_cliente(cliente, "Sin confirmar", "Calle 1", "600000000", "Contacto", "c1@correo.com")
+            assert nombre(db, cliente) == "Sin confirmar"
+            raise RuntimeError("se deshace")
+
+    assert nombre(db, cliente) == "Cliente 1"
+
+
+def test_escritura_directa_en_la_conexion_invalida_la_cache(db, cliente):
+    assert nombre(db, cliente) == "Cliente 1"
+    db.connection.execute("UPDATE CLIENTES SET NOMBRE = 'Directo' WHERE ID_CLIENTE = ?", (cliente,))
+    db.connection.commit()
+
+    assert nombre(db, cliente) == "Directo"
+
+
+def test_escritura_desde_otra_conexion_invalida_la_cache(db, cliente):
+    assert nombre(db, cliente) == "Cliente 1"
+    other = sqlite3.connect(db.db_name)
+    other.execute("UPDATE CLIENTES SET NOMBRE = 'Otra instancia' WHERE ID_CLIENTE = ?", (cliente,))
+    other.commit()
+    other.close()
+
+    assert nombre(db, cliente) == "Otra instancia"
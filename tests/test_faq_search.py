@@ -0,0 +1,51 @@
+import pytest
+
+import migrations
+from database_manager import DatabaseManager
+
+
+def fill_faqs(db):
+    db.insert_faq("F1", "¿Cómo inicio sesión?", "Con el correo y la contraseña de la empresa.", "Acceso", "2025-01-01")
+    db.insert_faq("F2", "¿Cómo agrego un cliente?", "Desde la vista Clientes, botón Añadir.", "Clientes", "2025-01-01")
+    db.insert_faq("F3", "¿Puedo exportar informes?", "Sí, la sesión de informes permite enviarlos.", "Informes", "2025-01-01")
+
+
+@pytest.fixture
+def faqs(db):
+    fill_faqs(db)
+    return db
+
+
+def ids(rows):
+    return [row[0] for row in rows]
+
+
+def test_busqueda_sin_tildes_ni_mayusculas(faqs):
+    # La pregunta pesa más que la respuesta: F1 va primero
+    assert ids(faqs.search_faqs_by_keyword("SESION")) == ["F1", "F3"]
+    assert ids(faqs.search_faqs_by_keyword("agreg")) == ["F2"]
+    assert ids(faqs.search_faqs_by_keyword("cliente añadir")) == ["F2"]
+
+
+def test_busqueda_con_fragmentos(faqs):
+    rows = faqs.search_faqs_with_snippets("sesion")
+    assert ids(rows) == ["F1", "F3"]
+    assert "[sesión]" in rows[0][-1]
+
+
+@pytest.mark.parametrize("keyword", ['"', '-x', 'AND', 'OR NOT', '"sesion', '*', 'NEAR(a b)', '  '])
+def test_entradas_raras_no_lanzan(faqs, keyword):
+    assert isinstance(faqs.search_faqs_by_keyword(keyword), list)
+    assert isinstance(faqs.search_faqs_with_snippets(keyword), list)
+
+
+def test_busqueda_con_like_sin_fts5(tmp_path, monkeypatch):
+    monkeypatch.setattr(migrations, "fts5_available", lambda cursor: False)
+    db = DatabaseManager(str(tmp_path / "sin_fts.db"))
+    db.connect()
+    fill_faqs(db)
+
+    assert not db._faq_fts_enabled()
+    assert ids(db.search_faqs_by_keyword("agrego")) == ["F2"]
+    assert [row[-1] for row in db.search_faqs_with_snippets("agrego")] == [""]
+    db.close()
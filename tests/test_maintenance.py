@@ -0,0 +1,65 @@
+import os
+import shutil
+import sqlite3
+
+import maintenance
+from database_manager import DatabaseManager
+from maintenance import AUTO_VACUUM_INCREMENTAL, enable_incremental_vacuum, needs_incremental_vacuum, run_maintenance
+from migrations import migrate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def auto_vacuum(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_conectar_no_convierte_la_base_antigua(tmp_path):
+    path = str(tmp_path / "Tecny.db")
+    shutil.copyfile(os.path.join(ROOT, "Tecny.db"), path)
+
+    db = DatabaseManager(path)
+    db.connect()
+    db.close()
+
+    assert auto_vacuum(path) != AUTO_VACUUM_INCREMENTAL
+    assert needs_incremental_vacuum(path)
+
+
+def test_la_conversion_activa_el_vacuum_incremental_y_se_anota(tmp_path):
+    path = str(tmp_path / "Tecny.db")
+    shutil.copyfile(os.path.join(ROOT, "Tecny.db"), path)
+    db = DatabaseManager(path)
+    db.connect()
+
+    task, _, _ = enable_incremental_vacuum(path)
+
+    assert task == "auto_vacuum"
+    assert auto_vacuum(path) == AUTO_VACUUM_INCREMENTAL
+    assert not needs_incremental_vacuum(path)
+    assert db.get_maintenance_log()[0][1] == "auto_vacuum"
+    db.close()
+
+
+def test_fichero_grande_no_se_convierte(tmp_path, monkeypatch):
+    path = str(tmp_path / "Tecny.db")
+    shutil.copyfile(os.path.join(ROOT, "Tecny.db"), path)
+    monkeypatch.setattr(maintenance, "VACUUM_CONVERT_MAX_BYTES", 0)
+
+    assert not needs_incremental_vacuum(path)
+
+
+def test_el_mantenimiento_no_lanza_un_vacuum_completo(tmp_path):
+    path = str(tmp_path / "antigua.db")
+    connection = sqlite3.connect(path)
+    migrate(connection)
+    connection.close()
+
+    tasks = [task for task, _, _ in run_maintenance(path, sleep=0)]
+
+    assert "auto_vacuum" not in tasks
+    assert auto_vacuum(path) != AUTO_VACUUM_INCREMENTAL
@@ -0,0 +1,184 @@
+import os
+import shutil
+import sqlite3
+
+from database_manager import DatabaseManager
+from migrations import INDEXES, MIGRATIONS, migrate
+from tenant_registry import TenantRegistry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def migrate_to(connection, version):
+    cursor = connection.cursor()
+    cursor.execute("BEGIN")
+    for number, migration in enumerate(MIGRATIONS[:version], start=1):
+        migration(cursor)
+        cursor.execute(f"PRAGMA user_version = {number}")
+    connection.commit()
+
+
+def indexes(connection):
+    return dict(connection.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+    ).fetchall())
+
+
+def test_migracion_002_crea_los_indices_publicados(tmp_path):
+    connection = sqlite3.connect(tmp_path / "v2.db")
+    migrate_to(connection, 2)
+    created = indexes(connection)
+    assert sorted(created) == sorted(name for name, _, _ in INDEXES)
+    for name, table, columns in INDEXES:
+        assert created[name] == f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"
+    connection.close()
+
+
+def test_base_antigua_y_nueva_acaban_con_los_mismos_indices(tmp_path):
+    new = sqlite3.connect(tmp_path / "nueva.db")
+    migrate(new)
+    shutil.copyfile(os.path.join(ROOT, "Tecny.db"), tmp_path / "antigua.db")
+    old = sqlite3.connect(tmp_path / "antigua.db")
+    migrate(old)
+    assert indexes(new) == indexes(old)
+    new.close()
+    old.close()
+
+
+def tables(connection):
+    return {name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_las_bases_de_datos_de_empresa_no_tienen_tenants(tmp_path):
+    shutil.copyfile(os.path.join(ROOT, "Tecny.db"), tmp_path / "Tecny.db")
+    for path in (tmp_path / "nueva.db", tmp_path / "Tecny.db"):
+        connection = sqlite3.connect(path)
+        migrate(connection)
+        assert "TENANTS" not in tables(connection)
+        connection.close()
+
+
+def test_el_registro_conserva_su_catalogo(tmp_path):
+    shutil.copyfile(os.path.join(ROOT, "empresa.db"), tmp_path / "empresa.db")
+    connection = sqlite3.connect(tmp_path / "empresa.db")
+    empresas = connection.execute("SELECT COUNT(DISTINCT NOMBRE_EMPRESA) FROM IDENTIFICACION").fetchone()[0]
+    migrate(connection, registry=True)
+    assert connection.execute("SELECT COUNT(*) FROM TENANTS").fetchone()[0] == empresas
+    connection.close()
+
+
+def test_el_registro_que_solo_se_lista_a_si_mismo_conserva_su_catalogo(tmp_path):
+    connection = sqlite3.connect(tmp_path / "empresa.db")
+    migrate_to(connection, 4)
+    connection.execute("INSERT INTO IDENTIFICACION VALUES ('empresa', 'admin@correo.com', 'secreta')")
+    connection.commit()
+    migrate(connection, registry=True)
+    assert connection.execute("SELECT FICHERO FROM TENANTS").fetchall() == [("empresa.db",)]
+    connection.close()
+
+
+def test_tenant_registry_usa_el_catalogo_de_la_migracion(tmp_path):
+    catalog = DatabaseManager(str(tmp_path / "empresa.db"))
+    catalog.connect()
+    assert "TENANTS" in tables(catalog.connection)
+
+    registry = TenantRegistry(catalog)
+    assert registry.resolve("Acme") is None
+    registry.register("Acme")
+    assert registry.resolve("Acme") == "Acme.db"
+    catalog.close()
+
+
+def test_tenant_registry_cierra_la_empresa_menos_reciente(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registry = TenantRegistry(DatabaseManager.get_instance("empresa.db"), max_open=2)
+    managers = {}
+    for nombre in ("A", "B", "C"):
+        registry.register(nombre)
+        managers[nombre] = registry.open(nombre)
+
+    assert registry.open_tenants() == ["B", "C"]
+    assert managers["A"].connection is None
+    assert managers["C"].get_all_clients() == []
+    # Volver a una empresa cerrada la reabre y cierra la que lleva más sin usarse
+    assert registry.open("A").connection is not None
+    assert registry.open_tenants() == ["C", "A"]
+    registry.close_all()
+    registry.catalog.close()
+
+
+def test_tenant_registry_no_cierra_empresas_retenidas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registry = TenantRegistry(DatabaseManager.get_instance("empresa.db"), max_open=1)
+    for nombre in ("A", "B", "C"):
+        registry.register(nombre)
+    a = registry.open("A")
+    registry.hold("A")
+    b = registry.open("B")
+    registry.hold("B")
+    c = registry.open("C")
+
+    assert a.connection is not None and b.connection is not None and c.connection is not None
+    assert registry.open_tenants() == ["A", "B", "C"]
+
+    registry.release("A")
+    assert a.connection is None
+    assert registry.open_tenants() == ["B", "C"]
+    registry.release("B")
+    assert b.connection is None
+    assert registry.open_tenants() == ["C"]
+    registry.close_all()
+    registry.catalog.close()
+
+
+def test_los_codigos_sin_fila_no_se_pierden(tmp_path):
+    # En empresa.db los presupuestos 1 y 2 apuntan a clientes que no existen
+    shutil.copyfile(os.path.join(ROOT, "empresa.db"), tmp_path / "empresa.db")
+    db = DatabaseManager(str(tmp_path / "empresa.db"))
+    db.connect()
+
+    assert db.get_presupuesto_by_id("1")[2] == "Mario"
+    assert db.get_presupuesto_detalle("2")[2] == "Sonia"
+    assert db.get_presupuesto_by_id("3")[2] == "5"
+    db.close()
+
+
+def test_base_en_v12_se_actualiza_y_se_puede_leer(tmp_path):
+    path = tmp_path / "v12.db"
+    connection = sqlite3.connect(path)
+    migrate_to(connection, 12)
+    connection.execute("INSERT INTO CLIENTES (ID_CLIENTE, NOMBRE, DIRECCION, TELEFONO, PERSONA_CONTACTO, EMAIL) "
+                       "VALUES ('C1', 'Cliente 1', 'Calle', '600000000', 'Contacto', 'c1@correo.com')")
+    connection.execute("INSERT INTO PRESUPUESTOS (ID_PRESUPUESTO, NOMBRE, CLIENTE, FECHA_CREACION, FECHA_EXPIRACION, "
+                       "SUBTOTAL, TOTAL) VALUES ('P1', 'Presupuesto 1', 1, 20089, 20120, 10000, 12100)")
+    connection.execute("INSERT INTO OPORTUNIDADES (ID_OPORTUNIDAD, NOMBRE_OPORTUNIDAD, CLIENTE, FECHA, PRESUPUESTO, "
+                       "INGRESO_ESPERADO, ESTADO) VALUES ('O1', 'Oportunidad 1', 1, 20089, 1, 100000, 'NUEVO')")
+    connection.commit()
+    connection.close()
+
+    db = DatabaseManager(str(path))
+    db.connect()
+    assert db.get_oportunidad_by_id("O1")[2:5] == ("C1", "2025-01-01", "P1")
+    assert db.get_presupuesto_by_id("P1")[2] == "C1"
+    assert db.get_kpis()
+    for table in ("CLIENTES", "PRESUPUESTOS", "OPORTUNIDADES"):
+        sql = db.connection.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table,)).fetchone()[0]
+        assert "AUTOINCREMENT" in sql
+    assert db.connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'PRESUPUESTO_LINEAS_AI'").fetchone()[0]
+    db.close()
+
+
+def test_la_008_no_reutiliza_ids_borrados(tmp_path):
+    connection = sqlite3.connect(tmp_path / "v7.db")
+    migrate_to(connection, 7)
+    for code in ("P1", "P2"):
+        connection.execute("INSERT INTO PRESUPUESTOS (ID_PRESUPUESTO, NOMBRE, CLIENTE, FECHA_CREACION, "
+                           "FECHA_EXPIRACION, SUBTOTAL, TOTAL) VALUES (?, 'Presupuesto', NULL, 20089, 20120, 0, 0)",
+                           (code,))
+    connection.execute("DELETE FROM PRESUPUESTOS WHERE ID_PRESUPUESTO = 'P2'")
+    connection.commit()
+    migrate(connection)
+    connection.execute("INSERT INTO PRESUPUESTOS (ID_PRESUPUESTO, NOMBRE, CLIENTE, FECHA_CREACION, "
+                       "FECHA_EXPIRACION, SUBTOTAL, TOTAL) VALUES ('P3', 'Presupuesto', NULL, 20089, 20120, 0, 0)")
+    assert connection.execute("SELECT ID FROM PRESUPUESTOS WHERE ID_PRESUPUESTO = 'P3'").fetchone()[0] == 3
+    connection.close()
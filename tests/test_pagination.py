@@ -0,0 +1,51 @@
+import pytest
+
+TOTAL = 57
+
+
+@pytest.fixture
+def tareas(db):
+    # Una de cada siete sin vencimiento y fechas repetidas, para que el
+    # desempate por clave y el paso de los NULL al resto entren en juego
+    with db.transaction():
+        for i in range(TOTAL):
+            fecha = None if i % 7 == 0 else f"2025-01-{i % 9 + 1:02d}"
+            db.insert_tarea(f"T{i:03d}", f"Tarea {i}", None, "2025-01-01", fecha, "Ana", "Media", "Pendiente")
+    return db
+
+
+def all_pages(db, order_by, limit=5):
+    rows, key, pages = [], None, 0
+    while True:
+        page, key = db.get_tareas_page(after_key=key, limit=limit, order_by=order_by)
+        rows.extend(page)
+        pages += 1
+        if key is None:
+            return rows, pages
+
+
+def test_paginacion_por_clave(tareas):
+    rows, pages = all_pages(tareas, None)
+    assert [row[0] for row in rows] == [f"T{i:03d}" for i in range(TOTAL)]
+    assert pages == TOTAL // 5 + 1
+
+
+def test_paginacion_por_fecha_con_nulos(tareas):
+    rows, _ = all_pages(tareas, "FECHA_VENCIMIENTO")
+    keys = [row[0] for row in rows]
+    assert len(keys) == TOTAL and len(set(keys)) == TOTAL
+
+    expected = sorted(tareas.get_all_tareas(), key=lambda row: (row[4] is not None, row[4] or "", row[0]))
+    assert keys == [row[0] for row in expected]
+    assert rows[0][4] is None and rows[-1][4] is not None
+
+
+def test_count_rows_sigue_a_las_escrituras(tareas):
+    assert tareas.count_rows("TAREAS") == TOTAL
+    tareas.delete_tarea("T000")
+    assert tareas.count_rows("TAREAS") == TOTAL - 1
+
+
+def test_paginar_por_columna_sin_indice_falla(tareas):
+    with pytest.raises(ValueError):
+        tareas.get_tareas_page(order_by="TITULO")
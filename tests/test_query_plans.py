@@ -0,0 +1,39 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from database_manager import HOT_QUERIES, DatabaseManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEGACY_DATABASES = ["Tecny.db", "Ejemplo8.db", "empresa.db"]
+
+
+def test_consultas_calientes_sin_recorridos_completos(db):
+    for query, params in HOT_QUERIES:
+        assert db.full_scans(query, params) == [], query
+    db.check_query_plans()
+
+
+@pytest.mark.parametrize("name", LEGACY_DATABASES)
+def test_consultas_calientes_tras_migrar_base_antigua(tmp_path, name):
+    path = tmp_path / name
+    shutil.copyfile(os.path.join(ROOT, name), path)
+    manager = DatabaseManager(str(path))
+    manager.connect()
+    try:
+        manager.check_query_plans()
+    finally:
+        manager.close()
+
+
+def test_script_check_query_plans(tmp_path):
+    path = tmp_path / "Tecny.db"
+    shutil.copyfile(os.path.join(ROOT, "Tecny.db"), path)
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "check_query_plans.py"), str(path)],
+        capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,25 @@
+from maintenance import run_maintenance
+from query_stats import QueryStats
+
+
+def test_sentencias_internas_pasan_por_la_instrumentacion(db, cliente):
+    stats = db.enable_instrumentation(slow_ms=None)
+
+    assert db.count_rows("CLIENTES") == 1
+    with db.transaction():
+        with db.transaction():
+            db.update_cliente(cliente, "Renombrado", "Calle 1", "600000000", "Contacto", "c1@correo.com")
+
+    measured = stats.to_dict()["statements"]
+    for sql in ("PRAGMA data_version", "SELECT COUNT(*) FROM CLIENTES", "BEGIN", "SAVEPOINT sp_1", "RELEASE sp_1"):
+        assert measured[sql]["count"] == 1, sql
+
+
+def test_mantenimiento_pasa_por_la_instrumentacion(db):
+    stats = QueryStats(slow_ms=None)
+
+    run_maintenance(db.db_name, sleep=0, stats=stats)
+
+    measured = stats.to_dict()["statements"]
+    assert "PRAGMA optimize" in measured
+    assert any(sql.startswith("INSERT INTO MANTENIMIENTO") for sql in measured)
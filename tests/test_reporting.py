@@ -0,0 +1,29 @@
+import sqlite3
+
+import pytest
+
+from database_manager import DatabaseManager
+
+
+@pytest.fixture
+def reader(db):
+    # Como el hilo de AsyncQueryService: conexión propia de sólo lectura
+    manager = DatabaseManager(db.db_name, db.profile, read_only=True)
+    manager.connect()
+    yield manager
+    manager.close()
+
+
+def test_conexion_de_solo_lectura_no_escribe(reader):
+    with pytest.raises(sqlite3.OperationalError):
+        reader.connection.execute("DELETE FROM CLIENTES")
+
+
+def test_snapshot_no_sirve_filas_cacheadas_obsoletas(db, reader, cliente):
+    with reader.snapshot():
+        assert reader.get_client_by_id(cliente)[1] == "Cliente 1"
+
+    db.update_cliente(cliente, "Renombrado", "Calle 1", "600000000", "Contacto", "c1@correo.com")
+
+    with reader.snapshot():
+        assert reader.get_client_by_id(cliente)[1] == "Renombrado"
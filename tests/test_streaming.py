@@ -0,0 +1,52 @@
+import tracemalloc
+
+import pytest
+
+from database_manager import DatabaseManager
+from exporters import export_csv
+
+BATCH_SIZE = 100
+
+
+def rows(total):
+    for i in range(total):
+        yield (f"{i:08x}", f"Cliente {i}", f"Calle {i % 500}", f"+34 600 {i:06d}",
+               f"Contacto {i}", f"cliente{i}@correo.com")
+
+
+def peak(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(scope="module")
+def peaks(tmp_path_factory):
+    """Pico de memoria de cada lectura con pocas filas y con cuatro veces más."""
+    tmp_path = tmp_path_factory.mktemp("streaming")
+    result = {}
+    for total in (2000, 8000):
+        db = DatabaseManager(str(tmp_path / f"clientes_{total}.db"))
+        db.connect()
+        db.bulk_insert_clientes(rows(total))
+        result[total] = {
+            "iter_clients": peak(lambda: sum(1 for _ in db.iter_clients(batch_size=BATCH_SIZE))),
+            "export_csv": peak(lambda: export_csv(db, "CLIENTES", str(tmp_path / "clientes.csv"),
+                                                  batch_size=BATCH_SIZE)),
+            "get_all_clients": peak(lambda: len(db.get_all_clients())),
+        }
+        db.close()
+    return result
+
+
+@pytest.mark.parametrize("reader", ["iter_clients", "export_csv"])
+def test_la_memoria_en_streaming_no_crece_con_las_filas(peaks, reader):
+    assert peaks[8000][reader] < peaks[2000][reader] * 1.25
+
+
+def test_fetchall_si_crece_con_las_filas(peaks):
+    # Comprueba que la medición detecta una lectura que no es en streaming
+    assert peaks[8000]["get_all_clients"] > peaks[2000]["get_all_clients"] * 3
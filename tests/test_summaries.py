@@ -0,0 +1,30 @@
+from summaries import summary_differences
+
+
+def test_los_resumenes_siguen_a_las_tablas_de_origen(db, cliente):
+    db.insert_oportunidad("O1", "Oportunidad 1", cliente, "2025-01-15", None, 1000, "En proceso")
+    db.insert_oportunidad("O2", "Oportunidad 2", cliente, "2025-01-20", None, 250.5, "En proceso")
+    db.insert_oportunidad("O3", "Oportunidad 3", cliente, "2025-01-25", None, 99.99, "Ganada")
+    db.update_opportunity_stage("O2", "Ganada")
+    db.delete_oportunidad("O3")
+
+    db.insert_tarea("T1", "Tarea 1", "", "2025-01-01", "2025-02-01", "Ana", "Alta", "Pendiente")
+    db.insert_tarea("T2", "Tarea 2", "", "2025-01-01", "2025-02-01", "Ana", "Alta", "Pendiente")
+    db.insert_tarea("T3", "Tarea 3", "", "2025-01-01", "2025-02-01", None, "Baja", "Pendiente")
+    db.update_tarea("T2", "Tarea 2", "", "2025-01-01", "2025-02-01", "Ana", "Alta", "Completada")
+    db.delete_tarea("T1")
+
+    db.add_product("Acme", "Tornillo", "M4", 21, 0.10, 1000)
+    db.add_product("Acme", "Tuerca", "M4", 21, 0.05, 500)
+    db.add_product("Otro", "Martillo", "Acero", 21, 12.50, 4)
+    tornillo, tuerca, martillo = (row[0] for row in db.get_all_products())
+    db.update_product(tuerca, "Acme", "Tuerca", "M4", 21, 0.05, 200)
+    db.delete_product(martillo)
+
+    with db.transaction():
+        assert summary_differences(db.cursor) == {}
+    assert db.get_kpis() == {
+        "pipeline": [("En proceso", "EUR", 1, 100000), ("Ganada", "EUR", 1, 25050)],
+        "tareas_abiertas": [(None, 1)],
+        "inventario": [("Acme", "EUR", 2, 1200, 11000)],
+    }
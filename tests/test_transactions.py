@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+
+def test_insert_duplicado_no_deja_transaccion_abierta(db, cliente):
+    # insert_cliente captura el error e imprime el mensaje
+    db.insert_cliente(cliente, "Otro", "Calle", "600000000", "Contacto", "otro@correo.com")
+    assert not db.connection.in_transaction
+
+    with db.transaction():
+        db.insert_cliente("C2", "Cliente 2", "Calle 2", "600000000", "Contacto", "c2@correo.com")
+    assert db.get_client_by_id("C2") is not None
+
+
+def test_escritura_fallida_se_deshace(db, cliente):
+    with pytest.raises(sqlite3.IntegrityError):
+        db.update_cliente(cliente, None, "Calle", "600000000", "Contacto", "c1@correo.com")
+    assert not db.connection.in_transaction
+    assert db.get_client_by_id(cliente)[1] == "Cliente 1"
+
+
+def test_execute_query_fallida_se_deshace(db):
+    assert not db.execute_query("INSERT INTO CLIENTES (ID_CLIENTE) VALUES (?)", ("X",))
+    assert not db.connection.in_transaction
+
+
+def test_transaccion_deshace_la_implicita_pendiente(db, capsys):
+    db.cursor.execute(
+        "INSERT INTO CLIENTES (ID_CLIENTE, NOMBRE, DIRECCION, TELEFONO, PERSONA_CONTACTO, EMAIL) "
+        "VALUES ('C9', 'Cliente 9', 'Calle', '600000000', 'Contacto', 'c9@correo.com')"
+    )
+    assert db.connection.in_transaction
+
+    with db.transaction():
+        db.insert_cliente("C2", "Cliente 2", "Calle 2", "600000000", "Contacto", "c2@correo.com")
+    assert not db.connection.in_transaction
+    assert db.get_client_by_id("C9") is None
+    assert db.get_client_by_id("C2") is not None
+    assert "se deshace" in capsys.readouterr().out
+
+
+def test_upsert_sin_cambios_no_deja_la_transaccion_abierta(db, cliente):
+    assert not db.upsert_cliente(cliente, "Otro", "Calle 2", "611111111", "Otro", "otro@correo.com",
+                                 update_existing=False)
+    assert not db.connection.in_transaction
+
+    # Otra conexión puede escribir y esta puede abrir una transacción
+    other = sqlite3.connect(db.db_name, timeout=0)
+    other.execute("UPDATE CLIENTES SET NOMBRE = 'Desde otra conexión'")
+    other.commit()
+    other.close()
+    with db.transaction():
+        db.update_cliente(cliente, "Renombrado", "Calle 1", "600000000", "Contacto", "c1@correo.com")
+
+
+@pytest.fixture
+def presupuesto(db, cliente):
+    db.insert_presupuesto("P1", "Presupuesto 1", cliente, "2025-01-15", "2025-02-15", 0.0, 0.0)
+    return "P1"
+
+
+def test_linea_de_producto_inexistente_no_deja_la_transaccion_abierta(db, presupuesto):
+    with pytest.raises(ValueError):
+        db.add_presupuesto_linea(presupuesto, 999, 1)
+    assert not db.connection.in_transaction
+    with db.transaction():
+        pass
+
+
+def test_linea_que_incumple_el_check_se_deshace(db, presupuesto):
+    db.add_product("Proveedor", "Producto", "Descripción", 21, 10.0, 5)
+    product_id = db.get_all_products()[0][0]
+    linea_id = db.add_presupuesto_linea(presupuesto, product_id, 2)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db.update_presupuesto_linea(presupuesto, linea_id, 0, 10.0, 21)
+
+    assert not db.connection.in_transaction
+    assert db.get_presupuesto_lineas_page(presupuesto)[0][0][4] == 2
+    assert db.get_presupuesto_by_id(presupuesto)[5] == 20.0
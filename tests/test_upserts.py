@@ -0,0 +1,36 @@
+def test_upsert_da_de_alta_y_sobrescribe(db):
+    assert db.upsert_cliente("C1", "Cliente 1", "Calle 1", "600000000", "Contacto", "c1@correo.com")
+    assert db.upsert_cliente("C1", "Renombrado", "Calle 2", "611111111", "Otro", "otro@correo.com")
+
+    assert db.get_client_by_id("C1") == ("C1", "Renombrado", "Calle 2", "611111111", "Otro", "otro@correo.com")
+    assert len(db.get_all_clients()) == 1
+
+
+def test_upsert_sin_update_existing_conserva_la_fila(db, cliente):
+    before = db.get_client_by_id(cliente)
+    assert db.upsert_cliente(cliente, "Otro", "Calle 2", "611111111", "Otro", "otro@correo.com",
+                             update_existing=False) is False
+    assert db.get_client_by_id(cliente) == before
+
+
+def test_upsert_de_tareas_y_eventos(db):
+    db.upsert_tarea("T1", "Llamar", None, "2025-01-01", "2025-01-10", "Ana", "Alta", "Pendiente")
+    db.upsert_tarea("T1", "Llamar otra vez", None, "2025-01-01", "2025-01-20", "Ana", "Alta", "Hecha")
+    assert db.get_tarea_by_id("T1")[1] == "Llamar otra vez"
+    assert db.get_tarea_by_id("T1")[4] == "2025-01-20"
+
+    db.upsert_evento("E1", "Reunión", "2025-01-15", "10:00", "Oficina", None, "Ana")
+    db.upsert_evento("E1", "Reunión movida", "2025-01-16", "12:30", "Oficina", None, "Ana")
+    evento = db.get_evento_by_id("E1")
+    assert (evento[1], evento[2], evento[3]) == ("Reunión movida", "2025-01-16", "12:30")
+
+
+def test_upsert_product_sin_id_devuelve_el_nuevo(db):
+    first = db.upsert_product(None, "Proveedor", "Tornillo", "M4", 21, 0.10, 100)
+    second = db.upsert_product(None, "Proveedor", "Tuerca", "M4", 21, 0.05, 50)
+    assert first is not None and second is not None and first != second
+    assert db.get_product(first)[2] == "Tornillo"
+
+    assert db.upsert_product(first, "Proveedor", "Tornillo largo", "M4", 21, 0.12, 80) == first
+    assert db.get_product(first)[2] == "Tornillo largo"
+    assert len(db.get_all_products()) == 2
@@ -8,16 +8,21 @@ from PyQt5.QtCore import Qt, QSize
 
 from asistentes.burbujaAsistente_clientes import AssistantBubbleClientes
 from rotatable_label import RotatableLabel
+from services.change_bus import ChangeBus, apply_row_change, find_row
 
 
 class ClientesView(QWidget):
-    def __init__(self, db_manager, empresa_nombre):
+    def __init__(self, db_manager, empresa_nombre, query_service=None):
         super().__init__()
         self.db_manager = db_manager
         self.empresa_nombre = empresa_nombre
-        self.db_manager.connect()
+        # Si se recibe, las cargas de la tabla se hacen en segundo plano
+        self.query_service = query_service
         self.assistant_bubble = None
+        # Si llegan cambios con la vista oculta se recarga al volver a mostrarla
+        self.dirty = False
         self.init_ui()
+        ChangeBus.instance(self.db_manager).table_changed.connect(self.on_table_changed)
 
     #  INICIALIZACIÓN DE LA INTERFAZ
     def init_ui(self):
@@ -252,65 +257,104 @@ class ClientesView(QWidget):
 
     #  MANEJO DE LA TABLA Y OPERACIONES CRUD
     def load_clients(self):
+        self.dirty = False
+        if self.query_service is not None:
+            self.query_service.submit(
+                "clientes", "get_all_clients",
+                on_result=self.fill_clients_table,
+                on_error=lambda e: self.show_message(f"Error al cargar los clientes: {str(e)}")
+            )
+            return
+
+        try:
+            self.fill_clients_table(self.db_manager.get_all_clients())
+        except Exception as e:
+            self.show_message(f"Error al cargar los clientes: {str(e)}")
+
+    def fill_clients_table(self, clients):
         try:
-            clients = self.db_manager.get_all_clients()
             self.clients_table.setRowCount(len(clients))
             for row, client in enumerate(clients):
-                for col, value in enumerate(client[:6]):
-                    item = QTableWidgetItem(str(value))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.clients_table.setItem(row, col, item)
-
-                # Botón para Editar en la columna Editar
-                edit_button = QPushButton("Editar")
-                edit_button.setStyleSheet("""
-                    QPushButton {
-                        background-color: #3498DB;
-                        color: white;
-                        border-radius: 5px;
-                        padding: 4px 8px;
-                    }
-                    QPushButton:hover {
-                        background-color: #2980B9;
-                    }
-                """)
-                edit_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-                edit_button.clicked.connect(lambda checked, r=row: self.edit_cliente(r))
-                self.clients_table.setCellWidget(row, 6, edit_button)  # Columna 6 es Editar
-
-                # Botón para Borrar en la columna Borrar
-                delete_button = QPushButton("Borrar")
-                delete_button.setStyleSheet("""
-                    QPushButton {
-                        background-color: #E74C3C;
-                        color: white;
-                        border-radius: 5px;
-                        padding: 4px 8px;
-                    }
-                    QPushButton:hover {
-                        background-color: #C0392B;
-                    }
-                """)
-                delete_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-                delete_button.clicked.connect(lambda checked, r=row: self.delete_cliente_confirm(r))
-                self.clients_table.setCellWidget(row, 7, delete_button)  # Columna 7 es Borrar
+                self.fill_client_row(row, client)
         except Exception as e:
             self.show_message(f"Error al cargar los clientes: {str(e)}")
 
+    def fill_client_row(self, row, client):
+        for col, value in enumerate(client[:6]):
+            item = QTableWidgetItem(str(value))
+            item.setTextAlignment(Qt.AlignCenter)
+            self.clients_table.setItem(row, col, item)
+
+        # Los botones buscan su fila al pulsarse: las altas y bajas la desplazan
+        client_id = str(client[0])
+
+        # Botón para Editar en la columna Editar
+        edit_button = QPushButton("Editar")
+        edit_button.setStyleSheet("""
+            QPushButton {
+                background-color: #3498DB;
+                color: white;
+                border-radius: 5px;
+                padding: 4px 8px;
+            }
+            QPushButton:hover {
+                background-color: #2980B9;
+            }
+        """)
+        edit_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        edit_button.clicked.connect(
+            lambda checked, key=client_id: self.edit_cliente(find_row(self.clients_table, key)))
+        self.clients_table.setCellWidget(row, 6, edit_button)  # Columna 6 es Editar
+
+        # Botón para Borrar en la columna Borrar
+        delete_button = QPushButton("Borrar")
+        delete_button.setStyleSheet("""
+            QPushButton {
+                background-color: #E74C3C;
+                color: white;
+                border-radius: 5px;
+                padding: 4px 8px;
+            }
+            QPushButton:hover {
+                background-color: #C0392B;
+            }
+        """)
+        delete_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        delete_button.clicked.connect(
+            lambda checked, key=client_id: self.delete_cliente_confirm(find_row(self.clients_table, key)))
+        self.clients_table.setCellWidget(row, 7, delete_button)  # Columna 7 es Borrar
+
+    def on_table_changed(self, change):
+        """
+        Altas, bajas y modificaciones se aplican sólo a la fila del cliente;
+        las cargas masivas recargan la tabla (al mostrarse, si la vista está oculta).
+        """
+        if change.table != "CLIENTES":
+            return
+        if not self.isVisible():
+            self.dirty = True
+            return
+        if change.key is None:
+            self.load_clients()
+            return
+        apply_row_change(self.clients_table, change, self.db_manager.get_client_by_id, self.fill_client_row)
+
+    def showEvent(self, event):
+        if self.dirty:
+            self.load_clients()
+        super().showEvent(event)
+
     def save_cliente(self):
         client_data = self.get_client_data()
         if not all(client_data.values()):
             self.show_message("Todos los campos son obligatorios.")
             return
         try:
-            # Verificar si el cliente ya existe
-            if self.db_manager.get_client_by_id(client_data['id_cliente']):
+            # Alta en una sola sentencia; no pisa un cliente que ya tenga ese ID
+            if not self.db_manager.upsert_cliente(*client_data.values(), update_existing=False):
                 self.show_message("El cliente con este ID ya existe.")
                 return
-
-            self.db_manager.insert_cliente(*client_data.values())
             self.show_message(f"Cliente {client_data['nombre']} registrado correctamente.")
-            self.load_clients()
             self.clear_form()
         except Exception as e:
             self.show_message(f"Error al guardar el cliente: {str(e)}")
@@ -338,7 +382,6 @@ class ClientesView(QWidget):
         try:
             self.db_manager.update_cliente(*client_data.values())
             self.show_message(f"Cliente {client_data['nombre']} actualizado correctamente.")
-            self.load_clients()
             self.clear_form()
         except Exception as e:
             self.show_message(f"Error al actualizar el cliente: {str(e)}")
@@ -357,7 +400,6 @@ class ClientesView(QWidget):
             if reply == QMessageBox.Yes:
                 self.db_manager.delete_cliente(client_id)
                 self.show_message(f"Cliente '{nombre}' borrado correctamente.")
-                self.load_clients()
                 self.clear_form()
         except Exception as e:
             self.show_message(f"Error al borrar el cliente: {str(e)}")
@@ -383,7 +425,6 @@ class ClientesView(QWidget):
             if reply == QMessageBox.Yes:
                 self.db_manager.delete_cliente(client_id)
                 self.show_message(f"Cliente '{nombre}' borrado correctamente.")
-                self.load_clients()
                 self.clear_form()
         except Exception as e:
             self.show_message(f"Error al borrar el cliente: {str(e)}")
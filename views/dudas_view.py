@@ -8,6 +8,7 @@ from PyQt5.QtGui import QPixmap, QFont, QColor, QIcon
 from PyQt5.QtCore import Qt, QSize, QDate
 
 from asistentes.burbujaAsistente_dudas import AssistantBubbleDudas
+from services.change_bus import ChangeBus, apply_row_change
 
 
 class DudasView(QWidget):
@@ -16,7 +17,10 @@ class DudasView(QWidget):
         self.db_manager = db_manager
         self.empresa_nombre = empresa_nombre
         self.assistant_bubble = None
+        # Hay cambios que llegaron con la vista oculta
+        self.dirty = False
         self.init_ui()
+        ChangeBus.instance(self.db_manager).table_changed.connect(self.on_table_changed)
 
     # Construcción de la Interfaz
     def init_ui(self):
@@ -205,13 +209,44 @@ class DudasView(QWidget):
         self.populate_faq_table(faqs)
 
     def populate_faq_table(self, faqs):
+        self.dirty = False
         self.faq_table.setRowCount(len(faqs))
         for row, faq in enumerate(faqs):
-            # faq = (ID_FAQ, PREGUNTA, RESPUESTA, CATEGORIA, ULTIMA_ACTUALIZACION)
-            for col, value in enumerate(faq):
-                item = QTableWidgetItem(str(value))
-                item.setTextAlignment(Qt.AlignCenter)
-                self.faq_table.setItem(row, col, item)
+            self.fill_faq_row(row, faq)
+
+    def fill_faq_row(self, row, faq):
+        # faq = (ID_FAQ, PREGUNTA, RESPUESTA, CATEGORIA, ULTIMA_ACTUALIZACION[, FRAGMENTO])
+        fragmento = faq[5] if len(faq) > 5 else ""
+        for col, value in enumerate(faq[:5]):
+            item = QTableWidgetItem(str(value))
+            item.setTextAlignment(Qt.AlignCenter)
+            if fragmento:
+                # En las búsquedas, el fragmento con las coincidencias aparece al pasar el ratón
+                item.setToolTip(fragmento)
+            self.faq_table.setItem(row, col, item)
+
+    def on_table_changed(self, change):
+        """
+        Sin búsqueda activa, altas, bajas y modificaciones se aplican sólo a
+        la fila de la FAQ. Con una búsqueda se repite (FTS, limitada): así no
+        aparecen filas que no coinciden y las que sí conservan su fragmento.
+        Oculta o ante cambios masivos se repite la carga o la búsqueda actual
+        (al mostrarse, en el primer caso).
+        """
+        if change.table != "FAQ":
+            return
+        if not self.isVisible():
+            self.dirty = True
+            return
+        if change.key is None or self.search_input.text().strip():
+            self.search_faqs()
+            return
+        apply_row_change(self.faq_table, change, self.db_manager.get_faq_by_id, self.fill_faq_row)
+
+    def showEvent(self, event):
+        if self.dirty:
+            self.search_faqs()
+        super().showEvent(event)
 
     def search_faqs(self):
         keyword = self.search_input.text().strip()
@@ -219,7 +254,7 @@ class DudasView(QWidget):
             # Si no hay palabra clave, cargamos todo
             self.load_faqs()
         else:
-            faqs = self.db_manager.search_faqs_by_keyword(keyword)
+            faqs = self.db_manager.search_faqs_with_snippets(keyword)
             self.populate_faq_table(faqs)
 
     def create_faq(self):
@@ -236,7 +271,6 @@ class DudasView(QWidget):
 
         self.db_manager.insert_faq(id_faq, pregunta, respuesta, categoria, ultima_act)
         self.show_message(f"FAQ creada con ID {id_faq}.")
-        self.load_faqs()
         self.clear_form()
 
     def update_faq(self):
@@ -252,7 +286,6 @@ class DudasView(QWidget):
 
         self.db_manager.update_faq(id_faq, pregunta, respuesta, categoria, ultima_act)
         self.show_message(f"FAQ '{id_faq}' actualizada.")
-        self.load_faqs()
         self.clear_form()
 
     def delete_faq(self):
@@ -269,7 +302,6 @@ class DudasView(QWidget):
         if reply == QMessageBox.Yes:
             self.db_manager.delete_faq(id_faq)
             self.show_message("FAQ eliminada.")
-            self.load_faqs()
             self.clear_form()
 
     def on_table_selection_changed(self):
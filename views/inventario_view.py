@@ -7,6 +7,7 @@ from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor
 from PyQt5.QtCore import Qt, QSize, pyqtSignal
 
 from asistentes.burbujaAsistente_inventario import AssistantBubbleInventario
+from services.change_bus import ChangeBus, apply_row_change
 
 
 class InventarioView(QWidget):
@@ -16,10 +17,12 @@ class InventarioView(QWidget):
         super().__init__()
         self.db_manager = db_manager
         self.empresa_nombre = empresa_nombre
-        self.db_manager.connect()
         self.assistant_bubble = None
+        # Hay cambios que llegaron con la vista oculta
+        self.dirty = False
         self.setContentsMargins(0, 0, 0, 0)
         self.init_ui()
+        ChangeBus.instance(self.db_manager).table_changed.connect(self.on_table_changed)
 
     def init_ui(self):
         # Layout vertical principal
@@ -207,19 +210,42 @@ class InventarioView(QWidget):
         return c.name()
 
     def load_inventory(self):
+        self.dirty = False
         self.table.setRowCount(0)
         products = self.db_manager.get_all_products()
         self.table.setRowCount(len(products))
         for row, product in enumerate(products):
-            for col, value in enumerate(product):
-                item = QTableWidgetItem(str(value))
-                item.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row, col, item)
+            self.fill_product_row(row, product)
+
+    def fill_product_row(self, row, product):
+        for col, value in enumerate(product):
+            item = QTableWidgetItem(str(value))
+            item.setTextAlignment(Qt.AlignCenter)
+            self.table.setItem(row, col, item)
+
+    def on_table_changed(self, change):
+        """
+        Altas, bajas y modificaciones se aplican sólo a la fila del producto;
+        oculta o ante cambios masivos, la tabla se recarga (al mostrarse).
+        """
+        if change.table != "PRODUCTOS":
+            return
+        if not self.isVisible():
+            self.dirty = True
+            return
+        if change.key is None:
+            self.refresh_table()
+            return
+        apply_row_change(self.table, change, self.db_manager.get_product, self.fill_product_row)
+
+    def showEvent(self, event):
+        if self.dirty:
+            self.refresh_table()
+        super().showEvent(event)
 
     def add_product(self):
         dialog = ProductDialog(self.db_manager)
         if dialog.exec_():
-            self.refresh_table()
             self.update_signal.emit()
 
     def edit_product(self):
@@ -234,7 +260,6 @@ class InventarioView(QWidget):
 
         dialog = ProductDialog(self.db_manager, product)
         if dialog.exec_():
-            self.refresh_table()
             self.update_signal.emit()
 
     def delete_product(self):
@@ -257,7 +282,6 @@ class InventarioView(QWidget):
         if confirm == QMessageBox.Yes:
             try:
                 self.db_manager.delete_product(product_id)
-                self.refresh_table()
                 self.update_signal.emit()
             except Exception as e:
                 self.show_message(f"Error al eliminar el producto: {str(e)}")
@@ -515,24 +539,15 @@ class ProductDialog(QDialog):
             self.show_message("Todos los campos son obligatorios.")
             return
 
-        if self.product:
-            # update
-            try:
-                self.db_manager.update_product(
-                    self.product[0], proveedor, nombre, descripcion, iva, precio, stock
-                )
-                self.accept()
-            except Exception as e:
-                self.show_message(f"Error al actualizar el producto: {str(e)}")
-        else:
-            # insert
-            try:
-                self.db_manager.add_product(
-                    proveedor, nombre, descripcion, iva, precio, stock
-                )
-                self.accept()
-            except Exception as e:
-                self.show_message(f"Error al guardar el producto: {str(e)}")
+        # Alta (sin id) o modificación en una sola sentencia
+        try:
+            self.db_manager.upsert_product(
+                self.product[0] if self.product else None,
+                proveedor, nombre, descripcion, iva, precio, stock
+            )
+            self.accept()
+        except Exception as e:
+            self.show_message(f"Error al guardar el producto: {str(e)}")
 
     #  MENSAJES
     def show_message(self, message):
@@ -18,6 +18,8 @@ class MandarInformeView(QWidget):
     def __init__(self, db_manager, empresa_nombre, main_window):
         super().__init__()
         self.db_manager = db_manager
+        # Los informes leen por la conexión de sólo lectura, sin frenar los guardados
+        self.report_db = db_manager.reporting()
         self.empresa_nombre = empresa_nombre
         self.main_window = main_window
         self.assistant_bubble = None
@@ -294,18 +296,22 @@ class MandarInformeView(QWidget):
         tipo = self.comboTipoInforme.currentText()
         self.comboId.clear()
 
+        with self.report_db.snapshot() as reader:
+            self._fill_id_combo(reader, tipo)
+
+    def _fill_id_combo(self, reader, tipo):
         if tipo == "Cliente":
-            all_clients = self.db_manager.get_all_clients()
+            all_clients = reader.iter_clients()
             self.comboId.addItem("Seleccione un ID")
             for client in all_clients:
                 self.comboId.addItem(client[0])  # ID_CLIENTE
         elif tipo == "Oportunidad":
-            all_oportunidades = self.db_manager.get_all_oportunidades()
+            all_oportunidades = reader.iter_oportunidades()
             self.comboId.addItem("Seleccione un ID")
             for opp in all_oportunidades:
                 self.comboId.addItem(opp[0])
         elif tipo == "Presupuesto":
-            all_presupuestos = self.db_manager.get_all_presupuestos()
+            all_presupuestos = reader.iter_presupuestos()
             self.comboId.addItem("Seleccione un ID")
             for pre in all_presupuestos:
                 self.comboId.addItem(pre[0])
@@ -325,8 +331,13 @@ class MandarInformeView(QWidget):
         self.email_body_text.clear()
         self.email_subject_input.clear()
 
+        # Informe y cliente se leen de la misma foto de la base de datos
+        with self.report_db.snapshot() as reader:
+            self._fill_report(reader, tipo, seleccion_id)
+
+    def _fill_report(self, reader, tipo, seleccion_id):
         if tipo == "Cliente":
-            data = self.db_manager.get_client_by_id(seleccion_id)
+            data = reader.get_client_by_id(seleccion_id)
             if data:
                 _, nombre, direccion, telefono, contacto, email = data
                 self.whatsapp_number_input.setText(telefono)
@@ -344,10 +355,10 @@ class MandarInformeView(QWidget):
                 self.email_subject_input.setText(f"Informe para {nombre}")
 
         elif tipo == "Oportunidad":
-            opp_data = self.db_manager.get_oportunidad_by_id(seleccion_id)
+            opp_data = reader.get_oportunidad_by_id(seleccion_id)
             if opp_data:
                 id_opp, nom_opp, cliente_id, fecha, presupuesto, ingreso_esp, estado = opp_data
-                client_data = self.db_manager.get_client_by_id(cliente_id)
+                client_data = reader.get_client_by_id(cliente_id)
                 if client_data:
                     _, nombre_cli, _, telefono_cli, contacto_cli, email_cli = client_data
                     self.whatsapp_number_input.setText(telefono_cli)
@@ -365,10 +376,10 @@ class MandarInformeView(QWidget):
                     self.email_subject_input.setText(f"Informe - Oportunidad {nom_opp}")
 
         elif tipo == "Presupuesto":
-            pres_data = self.db_manager.get_presupuesto_by_id(seleccion_id)
+            pres_data = reader.get_presupuesto_by_id(seleccion_id)
             if pres_data:
                 id_pre, nom_pre, cliente_id, fecha_cre, fecha_exp, subtot, total = pres_data
-                client_data = self.db_manager.get_client_by_id(cliente_id)
+                client_data = reader.get_client_by_id(cliente_id)
                 if client_data:
                     _, nombre_cli, _, telefono_cli, contacto_cli, email_cli = client_data
                     self.whatsapp_number_input.setText(telefono_cli)
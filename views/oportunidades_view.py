@@ -7,15 +7,18 @@ from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor
 from PyQt5.QtCore import Qt, QDate, QSize
 
 from asistentes.burbujaAsistente_oportunidades import AssistantBubbleOportunidades
+from services.change_bus import ChangeBus, apply_row_change, find_row
 
 class OportunidadesView(QWidget):
     def __init__(self, db_manager, empresa_nombre):
         super().__init__()
         self.db_manager = db_manager
         self.empresa_nombre = empresa_nombre
-        self.db_manager.connect()
         self.assistant_bubble = None
+        # Tablas que han cambiado mientras la vista estaba oculta
+        self.stale_tables = set()
         self.init_ui()
+        ChangeBus.instance(self.db_manager).table_changed.connect(self.on_table_changed)
 
     def init_ui(self):
         # Layout principal vertical sin relleno extra
@@ -249,6 +252,41 @@ class OportunidadesView(QWidget):
         except Exception as e:
             self.show_message(f"Error al cargar los presupuestos: {str(e)}")
 
+    def on_table_changed(self, change):
+        """
+        Con la vista visible, cada alta, baja o modificación de una oportunidad
+        se aplica sólo a su fila. Oculta (p. ej. al mover oportunidades en el
+        Pipeline o al editar clientes y presupuestos) sólo se anota qué hay
+        que recargar; los cambios masivos también recargan la tabla.
+        """
+        if change.table not in ("OPORTUNIDADES", "CLIENTES", "PRESUPUESTOS"):
+            return
+        if not self.isVisible():
+            self.stale_tables.add(change.table)
+            return
+        if change.table != "OPORTUNIDADES":
+            return
+        if change.key is None:
+            self.load_oportunidades()
+            return
+        apply_row_change(self.oportunidades_table, change,
+                         self.db_manager.get_oportunidad_by_id, self.fill_oportunidad_row)
+
+    def showEvent(self, event):
+        stale, self.stale_tables = self.stale_tables, set()
+        if "CLIENTES" in stale:
+            # Se conserva el primer elemento ("Seleccionar Cliente")
+            for _ in range(self.cliente_combo.count() - 1):
+                self.cliente_combo.removeItem(1)
+            self.load_clientes_into_combo()
+        if "PRESUPUESTOS" in stale:
+            for _ in range(self.presupuesto_combo.count() - 1):
+                self.presupuesto_combo.removeItem(1)
+            self.load_presupuestos_into_combo()
+        if stale:
+            self.load_oportunidades()
+        super().showEvent(event)
+
     #  CREAR QDATEEDIT CON ESTILO
     def create_date_edit(self):
         date_edit = QDateEdit(self)
@@ -338,49 +376,57 @@ class OportunidadesView(QWidget):
             oportunidades = self.db_manager.get_all_oportunidades()
             self.oportunidades_table.setRowCount(len(oportunidades))
             for row, oportunidad in enumerate(oportunidades):
-                for col, value in enumerate(oportunidad[:7]):
-                    item = QTableWidgetItem(str(value))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.oportunidades_table.setItem(row, col, item)
-
-                # Botón para Editar
-                edit_button = QPushButton("Editar")
-                edit_button.setStyleSheet("""
-                    QPushButton {
-                        background-color: #3498DB;
-                        color: white;
-                        border-radius: 5px;
-                        padding: 4px 8px;
-                    }
-                    QPushButton:hover {
-                        background-color: #2980B9;
-                    }
-                """)
-                edit_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-                edit_button.clicked.connect(lambda checked, r=row: self.edit_oportunidad(r))
-
-                # Botón para Borrar
-                delete_button = QPushButton("Borrar")
-                delete_button.setStyleSheet("""
-                    QPushButton {
-                        background-color: #E74C3C;
-                        color: white;
-                        border-radius: 5px;
-                        padding: 4px 8px;
-                    }
-                    QPushButton:hover {
-                        background-color: #C0392B;
-                    }
-                """)
-                delete_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-                delete_button.clicked.connect(lambda checked, r=row: self.delete_oportunidad_confirm(r))
-
-                # Asignar botones a sus respectivas columnas
-                self.oportunidades_table.setCellWidget(row, 7, edit_button)  # Columna "Editar"
-                self.oportunidades_table.setCellWidget(row, 8, delete_button)  # Columna "Borrar"
+                self.fill_oportunidad_row(row, oportunidad)
         except Exception as e:
             self.show_message(f"Error al cargar las oportunidades: {str(e)}")
 
+    def fill_oportunidad_row(self, row, oportunidad):
+        for col, value in enumerate(oportunidad[:7]):
+            item = QTableWidgetItem(str(value))
+            item.setTextAlignment(Qt.AlignCenter)
+            self.oportunidades_table.setItem(row, col, item)
+
+        # Los botones buscan su fila al pulsarse: las altas y bajas la desplazan
+        oportunidad_id = str(oportunidad[0])
+
+        # Botón para Editar
+        edit_button = QPushButton("Editar")
+        edit_button.setStyleSheet("""
+            QPushButton {
+                background-color: #3498DB;
+                color: white;
+                border-radius: 5px;
+                padding: 4px 8px;
+            }
+            QPushButton:hover {
+                background-color: #2980B9;
+            }
+        """)
+        edit_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        edit_button.clicked.connect(
+            lambda checked, key=oportunidad_id: self.edit_oportunidad(find_row(self.oportunidades_table, key)))
+
+        # Botón para Borrar
+        delete_button = QPushButton("Borrar")
+        delete_button.setStyleSheet("""
+            QPushButton {
+                background-color: #E74C3C;
+                color: white;
+                border-radius: 5px;
+                padding: 4px 8px;
+            }
+            QPushButton:hover {
+                background-color: #C0392B;
+            }
+        """)
+        delete_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        delete_button.clicked.connect(
+            lambda checked, key=oportunidad_id: self.delete_oportunidad_confirm(find_row(self.oportunidades_table, key)))
+
+        # Asignar botones a sus respectivas columnas
+        self.oportunidades_table.setCellWidget(row, 7, edit_button)  # Columna "Editar"
+        self.oportunidades_table.setCellWidget(row, 8, delete_button)  # Columna "Borrar"
+
     def save_oportunidad(self):
         oportunidad_data = self.get_oportunidad_data()
         if not all([
@@ -392,22 +438,20 @@ class OportunidadesView(QWidget):
             return
 
         try:
-            # Verificar si la oportunidad ya existe
-            if self.db_manager.get_oportunidad_by_id(oportunidad_data['id_oportunidad']):
-                self.show_message("La oportunidad con este ID ya existe.")
-                return
-
-            self.db_manager.insert_oportunidad(
+            # Alta en una sola sentencia; no pisa una oportunidad que ya tenga ese ID
+            if not self.db_manager.upsert_oportunidad(
                 oportunidad_data['id_oportunidad'],
                 oportunidad_data['nombre_oportunidad'],
                 oportunidad_data['cliente'],
                 oportunidad_data['fecha'],
                 oportunidad_data['presupuesto'],
                 float(oportunidad_data['ingreso_esperado']),
-                oportunidad_data['estado']
-            )
+                oportunidad_data['estado'],
+                update_existing=False
+            ):
+                self.show_message("La oportunidad con este ID ya existe.")
+                return
             self.show_message(f"Oportunidad '{oportunidad_data['nombre_oportunidad']}' registrada correctamente.")
-            self.load_oportunidades()
             self.clear_form()
         except Exception as e:
             self.show_message(f"Error al guardar la oportunidad: {str(e)}")
@@ -415,7 +459,7 @@ class OportunidadesView(QWidget):
     def edit_oportunidad(self, row):
         try:
             oportunidad_id = self.oportunidades_table.item(row, 0).text()
-            oportunidad = self.db_manager.get_oportunidad_by_id(oportunidad_id)
+            oportunidad = self.db_manager.get_oportunidad_detalle(oportunidad_id)
             if not oportunidad:
                 self.show_message("No se encontró la oportunidad en la base de datos.")
                 return
@@ -444,7 +488,6 @@ class OportunidadesView(QWidget):
                 oportunidad_data['estado']
             )
             self.show_message(f"Oportunidad '{oportunidad_data['nombre_oportunidad']}' actualizada correctamente.")
-            self.load_oportunidades()
             self.clear_form()
         except Exception as e:
             self.show_message(f"Error al actualizar la oportunidad: {str(e)}")
@@ -463,7 +506,6 @@ class OportunidadesView(QWidget):
             if reply == QMessageBox.Yes:
                 self.db_manager.delete_oportunidad(oportunidad_id)
                 self.show_message(f"Oportunidad '{nombre_oportunidad}' borrada correctamente.")
-                self.load_oportunidades()
                 self.clear_form()
         except Exception as e:
             self.show_message(f"Error al borrar la oportunidad: {str(e)}")
@@ -489,7 +531,6 @@ class OportunidadesView(QWidget):
             if reply == QMessageBox.Yes:
                 self.db_manager.delete_oportunidad(id_oportunidad)
                 self.show_message(f"Oportunidad '{nombre_oportunidad}' borrada correctamente.")
-                self.load_oportunidades()
                 self.clear_form()
         except Exception as e:
             self.show_message(f"Error al borrar la oportunidad: {str(e)}")
@@ -521,13 +562,15 @@ class OportunidadesView(QWidget):
     def populate_form(self, oportunidad):
         """
         Rellena el formulario con los datos de la oportunidad seleccionada.
+        oportunidad es una fila de get_oportunidad_detalle, que ya trae los
+        nombres del cliente (posición 7) y del presupuesto (posición 8).
         """
         self.id_oportunidad_input.setText(oportunidad[0])
         self.nombre_oportunidad_input.setText(oportunidad[1])
         
         # Seleccionar el cliente en el combo
         cliente_id = oportunidad[2]
-        cliente_name = self.db_manager.get_client_name_by_id(cliente_id)
+        cliente_name = oportunidad[7]
         cliente_text = f"{cliente_id} - {cliente_name}"
         index = self.cliente_combo.findText(cliente_text)
         if index != -1:
@@ -541,7 +584,7 @@ class OportunidadesView(QWidget):
 
         # Presupuesto
         presupuesto_id = oportunidad[4]
-        presupuesto_name = self.get_presupuesto_name_by_id(presupuesto_id)
+        presupuesto_name = oportunidad[8]
         presupuesto_text = f"{presupuesto_id} - {presupuesto_name}"
         index = self.presupuesto_combo.findText(presupuesto_text)
         if index != -1:
@@ -566,7 +609,7 @@ class OportunidadesView(QWidget):
         """
         try:
             oportunidad_id = self.oportunidades_table.item(row, 0).text()
-            oportunidad = self.db_manager.get_oportunidad_by_id(oportunidad_id)
+            oportunidad = self.db_manager.get_oportunidad_detalle(oportunidad_id)
             if oportunidad:
                 self.populate_form(oportunidad)
                 # Deshabilitar el campo ID oportunidad al actualizar
@@ -576,20 +619,6 @@ class OportunidadesView(QWidget):
         except Exception as e:
             self.show_message(f"Error al seleccionar la oportunidad: {str(e)}")
 
-    def get_presupuesto_name_by_id(self, presupuesto_id):
-        """
-        Método auxiliar para obtener el nombre del presupuesto dado su ID.
-        """
-        try:
-            presupuestos = self.db_manager.get_all_presupuestos()
-            for presupuesto in presupuestos:
-                if presupuesto[0] == presupuesto_id:
-                    return presupuesto[1]
-            return "Desconocido"
-        except Exception as e:
-            self.show_message(f"Error al obtener el nombre del presupuesto: {str(e)}")
-            return "Desconocido"
-
     def clear_form(self):
         """
         Limpia el formulario y restablece el estado de los botones.
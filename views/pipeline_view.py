@@ -7,6 +7,8 @@ from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor
 from PyQt5.QtCore import Qt, pyqtSignal, QSize
 
 from asistentes.burbujaAsistente_pipeline import AssistantBubblePipeline
+from services.change_bus import ChangeBus
+from sql_money import from_cents
 
 
 class PipelineView(QWidget):
@@ -18,7 +20,10 @@ class PipelineView(QWidget):
         self.empresa_nombre = empresa_nombre
         self.main_window = main_window
         self.assistant_bubble = None
+        # Si llegan cambios con la vista oculta se recarga al volver a mostrarla
+        self.dirty = False
         self.init_ui()
+        ChangeBus.instance(self.db_manager).table_changed.connect(self.on_table_changed)
 
     def init_ui(self):
         # Fondo general para la vista
@@ -122,6 +127,7 @@ class PipelineView(QWidget):
         stages_layout.setSpacing(15)
 
         self.stage_tables = {}
+        self.stage_labels = {}
         stages = ["NUEVO", "CALIFICADO", "PROPUESTA", "GANADO"]
         for stage in stages:
             stage_layout = QVBoxLayout()
@@ -138,6 +144,7 @@ class PipelineView(QWidget):
                 }
             """)
             stage_layout.addWidget(stage_label)
+            self.stage_labels[stage] = stage_label
 
             # Tabla de oportunidades
             table = QTableWidget()
@@ -216,6 +223,7 @@ class PipelineView(QWidget):
         (ID_OPORTUNIDAD, CLIENTE, INGRESO_ESPERADO, ESTADO)
         """
         opportunities = self.db_manager.get_all_opportunities()
+        self.dirty = False
 
         # Limpiar todas las tablas
         for stage, table in self.stage_tables.items():
@@ -223,56 +231,110 @@ class PipelineView(QWidget):
 
         # Ubicar cada oportunidad en su etapa correspondiente
         for opp in opportunities:
-            opp_id, opp_cliente, opp_valor, opp_stage = opp
-            opp_stage = opp_stage.upper()
-            if opp_stage not in self.stage_tables:
-                opp_stage = "NUEVO"
-
-            table = self.stage_tables[opp_stage]
-            row = table.rowCount()
-            table.insertRow(row)
-
-            # Columna 0: ID
-            id_item = QTableWidgetItem(str(opp_id))
-            id_item.setTextAlignment(Qt.AlignCenter)
-            table.setItem(row, 0, id_item)
-
-            # Columna 1: Cliente
-            cliente_item = QTableWidgetItem(str(opp_cliente))
-            cliente_item.setTextAlignment(Qt.AlignCenter)
-            table.setItem(row, 1, cliente_item)
-
-            # Columna 2: Valor  
-            # Puedes cambiar la alineación a derecha si lo prefieres: Qt.AlignRight | Qt.AlignVCenter
-            valor_item = QTableWidgetItem(str(opp_valor))
-            valor_item.setTextAlignment(Qt.AlignCenter)
-            table.setItem(row, 2, valor_item)
-
-            # Columna 3: ComboBox para cambiar de etapa
-            change_stage_combo = QComboBox()
-            change_stage_combo.setStyleSheet(self.combo_style())
-            change_stage_combo.setMinimumHeight(35)
-            # Excluir la etapa actual
-            other_stages = [s for s in self.stage_tables.keys() if s != opp_stage]
-            change_stage_combo.addItem("Mover a...")
-            change_stage_combo.addItems(other_stages)
-
-            # Se usa un argumento por defecto para capturar el id actual de la oportunidad
-            change_stage_combo.currentTextChanged.connect(
-                lambda new_stage, opp_id=opp_id: self.handle_stage_change(opp_id, new_stage)
-            )
-            table.setCellWidget(row, 3, change_stage_combo)
+            self.add_opportunity_row(*opp)
+        self.update_stage_totals()
+
+    def update_stage_totals(self):
+        """
+        Número de oportunidades y valor de cada etapa en su etiqueta. Sale de
+        la tabla de resumen (get_kpis), así que no depende de cuántas haya.
+        """
+        totals = {stage: [] for stage in self.stage_labels}
+        for estado, moneda, count, cents in self.db_manager.get_kpis()["pipeline"]:
+            stage = estado.upper() if estado.upper() in totals else "NUEVO"
+            totals[stage].append((moneda, count, cents))
+        for stage, label in self.stage_labels.items():
+            count = sum(c for _, c, _ in totals[stage])
+            values = " + ".join(f"{from_cents(cents)} {moneda}" for moneda, _, cents in totals[stage])
+            label.setText(f"{stage}\n{count} · {values or '0.00'}")
+
+    def add_opportunity_row(self, opp_id, opp_cliente, opp_valor, opp_stage):
+        """Añade una oportunidad al final de la tabla de su etapa."""
+        opp_stage = opp_stage.upper()
+        if opp_stage not in self.stage_tables:
+            opp_stage = "NUEVO"
+
+        table = self.stage_tables[opp_stage]
+        row = table.rowCount()
+        table.insertRow(row)
+
+        # Columna 0: ID
+        id_item = QTableWidgetItem(str(opp_id))
+        id_item.setTextAlignment(Qt.AlignCenter)
+        table.setItem(row, 0, id_item)
+
+        # Columna 1: Cliente
+        cliente_item = QTableWidgetItem(str(opp_cliente))
+        cliente_item.setTextAlignment(Qt.AlignCenter)
+        table.setItem(row, 1, cliente_item)
+
+        # Columna 2: Valor  
+        # Puedes cambiar la alineación a derecha si lo prefieres: Qt.AlignRight | Qt.AlignVCenter
+        valor_item = QTableWidgetItem(str(opp_valor))
+        valor_item.setTextAlignment(Qt.AlignCenter)
+        table.setItem(row, 2, valor_item)
+
+        # Columna 3: ComboBox para cambiar de etapa
+        change_stage_combo = QComboBox()
+        change_stage_combo.setStyleSheet(self.combo_style())
+        change_stage_combo.setMinimumHeight(35)
+        # Excluir la etapa actual
+        other_stages = [s for s in self.stage_tables.keys() if s != opp_stage]
+        change_stage_combo.addItem("Mover a...")
+        change_stage_combo.addItems(other_stages)
+
+        # Se usa un argumento por defecto para capturar el id actual de la oportunidad
+        change_stage_combo.currentTextChanged.connect(
+            lambda new_stage, opp_id=opp_id: self.handle_stage_change(opp_id, new_stage)
+        )
+        table.setCellWidget(row, 3, change_stage_combo)
+
+    def remove_opportunity_row(self, opp_id):
+        """Quita la fila de la oportunidad de la tabla en la que esté."""
+        for table in self.stage_tables.values():
+            for row in range(table.rowCount()):
+                item = table.item(row, 0)
+                if item is not None and item.text() == str(opp_id):
+                    table.removeRow(row)
+                    return
+
+    # --- Cambios en la base de datos ---
+    def on_table_changed(self, change):
+        """
+        Aplica a las tablas sólo la oportunidad que ha cambiado. Si la vista
+        no está visible o el cambio es masivo, se recarga el pipeline completo
+        (al mostrarse, en el primer caso).
+        """
+        if change.table != "OPORTUNIDADES":
+            return
+        if not self.isVisible():
+            self.dirty = True
+            return
+        if change.key is None:
+            self.refresh_pipeline()
+            return
+
+        self.remove_opportunity_row(change.key)
+        if change.operation != "delete":
+            opp = self.db_manager.get_oportunidad_by_id(change.key)
+            if opp:
+                self.add_opportunity_row(opp[0], opp[2], opp[5], opp[6])
+        self.update_stage_totals()
+
+    def showEvent(self, event):
+        if self.dirty:
+            self.refresh_pipeline()
+        super().showEvent(event)
 
     def handle_stage_change(self, opp_id, new_stage):
         """
-        Actualiza el stage de la oportunidad en la DB y refresca el pipeline.
-        Se ignora la opción por defecto "Mover a...".
+        Actualiza el stage de la oportunidad en la DB; la fila se mueve de
+        tabla al llegar el aviso del cambio. Se ignora la opción por defecto "Mover a...".
         """
         if new_stage in ("Mover a...", ""):
             return
         try:
             self.db_manager.update_opportunity_stage(opp_id, new_stage)
-            self.refresh_pipeline()
             self.show_message(f"Oportunidad {opp_id} movida a la etapa '{new_stage}'")
         except Exception as e:
             self.show_message(f"Error al cambiar la etapa de la oportunidad: {str(e)}")
@@ -1,12 +1,13 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QFormLayout, QMessageBox, QTableWidget, QTableWidgetItem, QComboBox,
-    QDateEdit, QFrame, QSizePolicy, QHeaderView, QAction
+    QDateEdit, QFrame, QSizePolicy, QHeaderView, QAction, QDialog, QSpinBox
 )
 from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor
 from PyQt5.QtCore import Qt, QDate, QSize, pyqtSignal
 
 from asistentes.burbujaAsistente_presupuestos import AssistantBubblePresupuestos
+from services.change_bus import ChangeBus, apply_row_change, find_row
 
 
 class PresupuestosView(QWidget):
@@ -16,11 +17,13 @@ class PresupuestosView(QWidget):
         super().__init__()
         self.db_manager = db_manager
         self.empresa_nombre = empresa_nombre
-        self.db_manager.connect()
         self.assistant_bubble = None
+        # Hay cambios que llegaron con la vista oculta
+        self.dirty = False
         self.init_ui()
         self.load_presupuestos()
         self.load_clientes()
+        ChangeBus.instance(self.db_manager).table_changed.connect(self.on_table_changed)
 
     #  INICIALIZACIÓN DE LA INTERFAZ
     def init_ui(self):
@@ -180,7 +183,7 @@ class PresupuestosView(QWidget):
         self.save_button = self.create_styled_button("Guardar Presupuesto", "#2ECC71", self.save_presupuesto)
         self.update_button = self.create_styled_button("Actualizar Presupuesto", "#F39C12", self.update_presupuesto)
         self.delete_button = self.create_styled_button("Borrar Presupuesto", "#E74C3C", self.delete_presupuesto)
-        self.view_products_button = self.create_styled_button("Ver Inventario", "#9B59B6", self.view_products)
+        self.view_products_button = self.create_styled_button("Ver Productos", "#9B59B6", self.view_products)
 
         # Por defecto, desactivar botones de actualizar y borrar
         self.update_button.setEnabled(False)
@@ -338,35 +341,62 @@ class PresupuestosView(QWidget):
 
     #  MANEJO DE LA TABLA Y OPERACIONES CRUD
     def load_presupuestos(self):
+        self.dirty = False
         try:
             presupuestos = self.db_manager.get_all_presupuestos()
             self.presupuestos_table.setRowCount(len(presupuestos))
             for row, presupuesto in enumerate(presupuestos):
-                # presupuesto = (id, nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total)
-                for col, value in enumerate(presupuesto[:7]):
-                    item = QTableWidgetItem(str(value))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.presupuestos_table.setItem(row, col, item)
-
-                # Botón para Editar
-                edit_button = QPushButton("Editar")
-                edit_button.setStyleSheet("""
-                    QPushButton {
-                        background-color: #3498DB;
-                        color: white;
-                        border-radius: 5px;
-                        padding: 4px 8px;
-                    }
-                    QPushButton:hover {
-                        background-color: #2980B9;
-                    }
-                """)
-                edit_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-                edit_button.clicked.connect(lambda checked, r=row: self.edit_presupuesto(r))
-                self.presupuestos_table.setCellWidget(row, 7, edit_button)  # Columna 7 es "Acciones"
+                self.fill_presupuesto_row(row, presupuesto)
         except Exception as e:
             self.show_message(f"Error al cargar los presupuestos: {str(e)}")
 
+    def fill_presupuesto_row(self, row, presupuesto):
+        # presupuesto = (id, nombre, cliente, fecha_creacion, fecha_expiracion, subtotal, total)
+        for col, value in enumerate(presupuesto[:7]):
+            item = QTableWidgetItem(str(value))
+            item.setTextAlignment(Qt.AlignCenter)
+            self.presupuestos_table.setItem(row, col, item)
+
+        # Botón para Editar; busca su fila al pulsarse (las altas y bajas la desplazan)
+        edit_button = QPushButton("Editar")
+        edit_button.setStyleSheet("""
+            QPushButton {
+                background-color: #3498DB;
+                color: white;
+                border-radius: 5px;
+                padding: 4px 8px;
+            }
+            QPushButton:hover {
+                background-color: #2980B9;
+            }
+        """)
+        edit_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        edit_button.clicked.connect(
+            lambda checked, key=str(presupuesto[0]): self.edit_presupuesto(find_row(self.presupuestos_table, key)))
+        self.presupuestos_table.setCellWidget(row, 7, edit_button)  # Columna 7 es "Acciones"
+
+    def on_table_changed(self, change):
+        """
+        Aplica sólo la fila del presupuesto que ha cambiado (también cuando las
+        líneas recalculan sus totales). Oculta o ante cambios masivos, la
+        tabla se recarga (al mostrarse, en el primer caso).
+        """
+        if change.table != "PRESUPUESTOS":
+            return
+        if not self.isVisible():
+            self.dirty = True
+            return
+        if change.key is None:
+            self.load_presupuestos()
+            return
+        apply_row_change(self.presupuestos_table, change,
+                         self.db_manager.get_presupuesto_by_id, self.fill_presupuesto_row)
+
+    def showEvent(self, event):
+        if self.dirty:
+            self.load_presupuestos()
+        super().showEvent(event)
+
     def save_presupuesto(self):
         presupuesto_data = self.get_presupuesto_data()
         if not all([
@@ -389,22 +419,20 @@ class PresupuestosView(QWidget):
             return
 
         try:
-            # Verificar si el presupuesto ya existe
-            if self.db_manager.get_presupuesto_by_id(presupuesto_data['id_presupuesto']):
-                self.show_message("El presupuesto con este ID ya existe.")
-                return
-
-            self.db_manager.insert_presupuesto(
+            # Alta en una sola sentencia; no pisa un presupuesto que ya tenga ese ID
+            if not self.db_manager.upsert_presupuesto(
                 presupuesto_data['id_presupuesto'],
                 presupuesto_data['nombre'],
                 presupuesto_data['cliente'],
                 presupuesto_data['fecha_creacion'],
                 presupuesto_data['fecha_expiracion'],
                 subtotal,
-                total
-            )
+                total,
+                update_existing=False
+            ):
+                self.show_message("El presupuesto con este ID ya existe.")
+                return
             self.show_message(f"Presupuesto '{presupuesto_data['nombre']}' guardado correctamente.")
-            self.load_presupuestos()
             self.clear_form()
         except Exception as e:
             self.show_message(f"Error al guardar el presupuesto: {str(e)}")
@@ -451,7 +479,6 @@ class PresupuestosView(QWidget):
                 total
             )
             self.show_message(f"Presupuesto '{presupuesto_data['nombre']}' actualizado correctamente.")
-            self.load_presupuestos()
             self.clear_form()
         except Exception as e:
             self.show_message(f"Error al actualizar el presupuesto: {str(e)}")
@@ -470,7 +497,6 @@ class PresupuestosView(QWidget):
             if reply == QMessageBox.Yes:
                 self.db_manager.delete_presupuesto(id_presupuesto)
                 self.show_message(f"Presupuesto '{nombre}' borrado correctamente.")
-                self.load_presupuestos()
                 self.clear_form()
         except Exception as e:
             self.show_message(f"Error al borrar el presupuesto: {str(e)}")
@@ -496,7 +522,6 @@ class PresupuestosView(QWidget):
             if reply == QMessageBox.Yes:
                 self.db_manager.delete_presupuesto(id_presupuesto)
                 self.show_message(f"Presupuesto '{nombre}' borrado correctamente.")
-                self.load_presupuestos()
                 self.clear_form()
         except Exception as e:
             self.show_message(f"Error al borrar el presupuesto: {str(e)}")
@@ -547,6 +572,16 @@ class PresupuestosView(QWidget):
         self.fecha_expiracion_input.setDate(QDate.fromString(presupuesto[4], "yyyy-MM-dd"))
         self.subtotal_input.setText(str(presupuesto[5]))
         self.total_input.setText(str(presupuesto[6]))
+        # Con líneas, subtotal y total los calculan los triggers y el
+        # guardado no los toca: no se dejan editar
+        lineas, _ = self.db_manager.get_presupuesto_lineas_page(presupuesto[0], limit=1)
+        self.set_importes_editables(not lineas)
+
+    def set_importes_editables(self, editable):
+        tooltip = "" if editable else "Se calcula a partir de los productos del presupuesto"
+        for field in (self.subtotal_input, self.total_input):
+            field.setEnabled(editable)
+            field.setToolTip(tooltip)
 
     def populate_form_from_table(self, row, column):
         """
@@ -574,6 +609,7 @@ class PresupuestosView(QWidget):
         self.fecha_expiracion_input.setDate(QDate.currentDate().addDays(30))
         self.subtotal_input.clear()
         self.total_input.clear()
+        self.set_importes_editables(True)
 
         self.id_presupuesto_input.setEnabled(True)
         self.update_button.setEnabled(False)
@@ -634,6 +670,212 @@ class PresupuestosView(QWidget):
 
     def view_products(self):
         """
-        Navega directamente a la vista de Inventario.
+        Abre las líneas (productos) del presupuesto cargado en el formulario.
+        Sin presupuesto seleccionado navega a la vista de Inventario.
         """
-        self.switch_to_inventario.emit(3)
+        id_presupuesto = self.id_presupuesto_input.text()
+        if not id_presupuesto or self.id_presupuesto_input.isEnabled():
+            self.switch_to_inventario.emit(3)
+            return
+        dialog = PresupuestoLineasDialog(self.db_manager, id_presupuesto)
+        dialog.exec_()
+        # Los totales los han actualizado los triggers de las líneas (la fila de la tabla llega por el bus)
+        presupuesto = self.db_manager.get_presupuesto_by_id(id_presupuesto)
+        if presupuesto:
+            self.populate_form(presupuesto)
+
+
+#  DIÁLOGO CON LAS LÍNEAS (PRODUCTOS) DE UN PRESUPUESTO
+class PresupuestoLineasDialog(QDialog):
+    """
+    Lista las líneas del presupuesto por páginas y permite añadir y borrar.
+    Subtotal y total se leen de PRESUPUESTOS (los mantienen los triggers),
+    así que abrir o guardar no depende del número de líneas. Los productos
+    tampoco se leen todos: el buscador salta, por el índice de nombre, al
+    primero que empieza por lo escrito y carga una página cada vez.
+    """
+    def __init__(self, db_manager, id_presupuesto):
+        super().__init__()
+        self.db_manager = db_manager
+        self.id_presupuesto = id_presupuesto
+        self.next_key = None
+        self.products_next_key = None
+        self.init_ui()
+        self.load_products()
+        self.load_lineas()
+
+    def init_ui(self):
+        self.setWindowTitle(f"Productos del presupuesto {self.id_presupuesto}")
+        self.setModal(True)
+
+        main_layout = QVBoxLayout(self)
+        main_layout.setContentsMargins(0, 0, 0, 0)
+        main_layout.setSpacing(0)
+
+        # -- Encabezado del diálogo --
+        header_frame = QFrame()
+        header_frame.setFixedHeight(60)
+        header_frame.setStyleSheet("""
+            QFrame {
+                background-color: #2C3E50;
+                border-top-left-radius: 8px;
+                border-top-right-radius: 8px;
+            }
+        """)
+        header_layout = QHBoxLayout(header_frame)
+        header_layout.setContentsMargins(10, 10, 10, 10)
+
+        header_label = QLabel(f"Presupuesto {self.id_presupuesto}")
+        header_label.setStyleSheet("color: #ECF0F1;")
+        header_label.setFont(QFont("Segoe UI", 16, QFont.Bold))
+        self.totales_label = QLabel()
+        self.totales_label.setStyleSheet("color: #ECF0F1;")
+        self.totales_label.setFont(QFont("Segoe UI", 12))
+
+        header_layout.addWidget(header_label)
+        header_layout.addStretch()
+        header_layout.addWidget(self.totales_label)
+
+        # -- Contenido del diálogo (blanco) --
+        content_frame = QFrame()
+        content_frame.setStyleSheet("QFrame { background-color: #FFFFFF; }")
+        content_layout = QVBoxLayout(content_frame)
+        content_layout.setContentsMargins(20, 20, 20, 20)
+        content_layout.setSpacing(15)
+
+        self.lineas_table = QTableWidget(self)
+        self.lineas_table.setColumnCount(6)
+        self.lineas_table.setHorizontalHeaderLabels([
+            "Producto", "Cantidad", "Precio", "IVA (%)", "Importe", "Total"
+        ])
+        self.lineas_table.setAlternatingRowColors(True)
+        self.lineas_table.setStyleSheet("""
+            QTableWidget {
+                background-color: #FFFFFF;
+                alternate-background-color: #ECF0F1;
+                font-size: 12px;
+            }
+            QHeaderView::section {
+                background-color: #3498DB;
+                color: white;
+                font-weight: bold;
+                border: none;
+            }
+        """)
+        self.lineas_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.lineas_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.lineas_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.lineas_table.setSelectionMode(QTableWidget.SingleSelection)
+        content_layout.addWidget(self.lineas_table)
+
+        self.more_button = self.create_button("Cargar más", "#2980B9", self.load_more)
+        content_layout.addWidget(self.more_button)
+
+        # Alta de líneas: producto + cantidad (precio e IVA se copian del producto)
+        add_layout = QHBoxLayout()
+        self.product_search = QLineEdit(self)
+        self.product_search.setPlaceholderText("Buscar producto por nombre...")
+        self.product_search.setClearButtonEnabled(True)
+        self.product_search.textChanged.connect(self.load_products)
+        self.product_combo = QComboBox(self)
+        self.product_combo.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.more_products_button = self.create_button("Más", "#2980B9", self.load_more_products)
+        self.cantidad_input = QSpinBox(self)
+        self.cantidad_input.setRange(1, 1000000)
+        add_layout.addWidget(self.product_search, 2)
+        add_layout.addWidget(self.product_combo, 3)
+        add_layout.addWidget(self.more_products_button)
+        add_layout.addWidget(self.cantidad_input, 1)
+        add_layout.addWidget(self.create_button("Añadir línea", "#2ECC71", self.add_linea))
+        add_layout.addWidget(self.create_button("Borrar línea", "#E74C3C", self.delete_linea))
+        content_layout.addLayout(add_layout)
+
+        main_layout.addWidget(header_frame)
+        main_layout.addWidget(content_frame)
+        self.setMinimumWidth(700)
+
+    def create_button(self, text, color, callback):
+        button = QPushButton(text, self)
+        button.setFont(QFont("Segoe UI", 10, QFont.Bold))
+        button.setStyleSheet(f"""
+            QPushButton {{
+                background-color: {color};
+                color: white;
+                padding: 8px 20px;
+                border-radius: 5px;
+                border: none;
+            }}
+        """)
+        button.clicked.connect(callback)
+        return button
+
+    def load_products(self):
+        """Primera página de productos, por nombre, desde lo escrito en el buscador."""
+        self.product_combo.clear()
+        text = self.product_search.text().strip()
+        # (nombre, id) > (texto, 0): desde el primer producto cuyo nombre es >= texto
+        self.products_next_key = (text, 0) if text else None
+        self.load_more_products()
+
+    def load_more_products(self):
+        try:
+            products, self.products_next_key = self.db_manager.get_products_page(
+                self.products_next_key, order_by="nombre"
+            )
+            for product in products:
+                # product = (id, proveedor, nombre, descripcion, iva, precio, stock)
+                self.product_combo.addItem(f"{product[2]} ({product[1]}) - {product[5]:.2f}", product[0])
+            self.more_products_button.setEnabled(self.products_next_key is not None)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Error al cargar los productos: {str(e)}")
+
+    def load_lineas(self):
+        """Vuelve a la primera página y refresca los totales."""
+        self.lineas_table.setRowCount(0)
+        self.next_key = None
+        self.load_more()
+        presupuesto = self.db_manager.get_presupuesto_by_id(self.id_presupuesto)
+        if presupuesto:
+            self.totales_label.setText(f"Subtotal: {presupuesto[5]:.2f}   Total: {presupuesto[6]:.2f}")
+
+    def load_more(self):
+        try:
+            lineas, self.next_key = self.db_manager.get_presupuesto_lineas_page(
+                self.id_presupuesto, self.next_key
+            )
+            for linea in lineas:
+                # linea = (id, presupuesto, producto, descripcion, cantidad, precio, iva, importe, total)
+                row = self.lineas_table.rowCount()
+                self.lineas_table.insertRow(row)
+                values = (linea[3], linea[4], f"{linea[5]:.2f}", linea[6], f"{linea[7]:.2f}", f"{linea[8]:.2f}")
+                for col, value in enumerate(values):
+                    item = QTableWidgetItem(str(value))
+                    item.setTextAlignment(Qt.AlignCenter)
+                    self.lineas_table.setItem(row, col, item)
+                self.lineas_table.item(row, 0).setData(Qt.UserRole, linea[0])
+            self.more_button.setEnabled(self.next_key is not None)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Error al cargar las líneas: {str(e)}")
+
+    def add_linea(self):
+        product_id = self.product_combo.currentData()
+        if product_id is None:
+            QMessageBox.warning(self, "Error", "No hay productos en el inventario.")
+            return
+        try:
+            self.db_manager.add_presupuesto_linea(self.id_presupuesto, product_id, self.cantidad_input.value())
+            self.load_lineas()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Error al añadir la línea: {str(e)}")
+
+    def delete_linea(self):
+        row = self.lineas_table.currentRow()
+        if row < 0:
+            QMessageBox.warning(self, "Error", "Selecciona una línea para borrar.")
+            return
+        try:
+            linea_id = self.lineas_table.item(row, 0).data(Qt.UserRole)
+            self.db_manager.delete_presupuesto_linea(self.id_presupuesto, linea_id)
+            self.load_lineas()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Error al borrar la línea: {str(e)}")
@@ -8,6 +8,7 @@ from PyQt5.QtGui import QPixmap, QFont, QColor, QIcon
 from PyQt5.QtCore import Qt, QDate, QSize
 
 from asistentes.burbujaAsistente_tareas import AssistantBubbleTareas
+from services.change_bus import ChangeBus, apply_row_change
 
 
 class TareasView(QWidget):
@@ -17,7 +18,10 @@ class TareasView(QWidget):
         self.empresa_nombre = empresa_nombre
         self.main_window = main_window
         self.assistant_bubble = None
+        # Hay cambios que llegaron con la vista oculta
+        self.dirty = False
         self.init_ui()
+        ChangeBus.instance(self.db_manager).table_changed.connect(self.on_table_changed)
 
     #  Construcción de la Interfaz
     def init_ui(self):
@@ -228,19 +232,41 @@ class TareasView(QWidget):
             fecha_vencimiento, asignado_a, prioridad, estado
         )
         self.show_message(f"Tarea '{titulo}' creada con éxito.")
-        self.load_tareas()
         self.clear_form()
 
     def load_tareas(self):
+        self.dirty = False
         tareas = self.db_manager.get_all_tareas()
         self.tareas_table.setRowCount(len(tareas))
-
         for row, tarea in enumerate(tareas):
-            # tarea = (ID_TAREA, TITULO, DESCRIPCION, FECHA_CREACION, FECHA_VENCIMIENTO, ASIGNADO_A, PRIORIDAD, ESTADO)
-            for col, value in enumerate(tarea):
-                item = QTableWidgetItem(str(value))
-                item.setTextAlignment(Qt.AlignCenter)
-                self.tareas_table.setItem(row, col, item)
+            self.fill_tarea_row(row, tarea)
+
+    def fill_tarea_row(self, row, tarea):
+        # tarea = (ID_TAREA, TITULO, DESCRIPCION, FECHA_CREACION, FECHA_VENCIMIENTO, ASIGNADO_A, PRIORIDAD, ESTADO)
+        for col, value in enumerate(tarea):
+            item = QTableWidgetItem(str(value))
+            item.setTextAlignment(Qt.AlignCenter)
+            self.tareas_table.setItem(row, col, item)
+
+    def on_table_changed(self, change):
+        """
+        Altas, bajas y modificaciones se aplican sólo a la fila de la tarea;
+        oculta o ante cambios masivos, la tabla se recarga (al mostrarse).
+        """
+        if change.table != "TAREAS":
+            return
+        if not self.isVisible():
+            self.dirty = True
+            return
+        if change.key is None:
+            self.load_tareas()
+            return
+        apply_row_change(self.tareas_table, change, self.db_manager.get_tarea_by_id, self.fill_tarea_row)
+
+    def showEvent(self, event):
+        if self.dirty:
+            self.load_tareas()
+        super().showEvent(event)
 
     def update_tarea(self):
         id_tarea = self.id_tarea_input.text().strip()
@@ -261,7 +287,6 @@ class TareasView(QWidget):
             fecha_vencimiento, asignado_a, prioridad, estado
         )
         self.show_message(f"Tarea '{titulo}' actualizada con éxito.")
-        self.load_tareas()
         self.clear_form()
 
     def delete_tarea(self):
@@ -278,7 +303,6 @@ class TareasView(QWidget):
         if reply == QMessageBox.Yes:
             self.db_manager.delete_tarea(id_tarea)
             self.show_message("Tarea eliminada con éxito.")
-            self.load_tareas()
             self.clear_form()
 
     #  Selección en la tabla